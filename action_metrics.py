@@ -0,0 +1,109 @@
+"""
+Painel de desempenho das ações do sistema Austral (administradores).
+Mostra p50, p95 e p99 da duração de cada ação decorada com @log_action, no
+total e por loja do terminal, a partir dos histogramas de metricas_acoes.
+"""
+
+import tkinter as tk
+import ttkbootstrap as ttk
+from config import ConfigManager
+from logger import AustralLogger, log_action
+from metrics import MetricsRegistry, merge_by_action
+from utils import FONT_TITLE, FONT_LABEL, UIHelper, setup_window_icon
+
+
+class ActionMetricsApp:
+    """Percentis de duração por ação e por ação e loja"""
+
+    PERIODOS = ["1", "7", "30", "90"]
+    COLUNAS_PERCENTIS = ("CHAMADAS", "ERROS", "P50 (MS)", "P95 (MS)", "P99 (MS)")
+
+    def __init__(self, root):
+        self.root = root
+        self.root.title("SISTEMA AUSTRAL - DESEMPENHO DAS AÇÕES")
+        self.config = ConfigManager()
+        self.logger = AustralLogger()
+        self.metricas = MetricsRegistry()
+
+        setup_window_icon(self.root)
+        self.setup_ui()
+        self.carregar_dados()
+        UIHelper.center_window(self.root, 1100, 700)
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.root, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        header = ttk.Frame(main_frame)
+        header.pack(fill=tk.X, pady=(0, 10))
+        ttk.Label(header, text="DESEMPENHO DAS AÇÕES", font=FONT_TITLE, bootstyle="primary").pack(side=tk.LEFT)
+        ttk.Button(header, text="ATUALIZAR", command=self.carregar_dados, bootstyle="secondary").pack(side=tk.RIGHT)
+
+        self.periodo = ttk.Combobox(header, values=self.PERIODOS, width=5, state='readonly')
+        self.periodo.set("7")
+        self.periodo.bind('<<ComboboxSelected>>', lambda e: self.carregar_dados())
+        self.periodo.pack(side=tk.RIGHT, padx=5)
+        ttk.Label(header, text="ÚLTIMOS (DIAS):", font=FONT_LABEL).pack(side=tk.RIGHT)
+
+        body = ttk.Frame(main_frame)
+        body.pack(fill=tk.BOTH, expand=True)
+        body.grid_columnconfigure(0, weight=1)
+        body.grid_rowconfigure((0, 1), weight=1)
+
+        self.tree_acoes = self._criar_tabela(body, "POR AÇÃO", ("AÇÃO", *self.COLUNAS_PERCENTIS), 0)
+        self.tree_terminais = self._criar_tabela(
+            body, "POR AÇÃO E LOJA", ("AÇÃO", "LOJA", *self.COLUNAS_PERCENTIS), 1
+        )
+
+    def _criar_tabela(self, parent, titulo, colunas, row):
+        frame = ttk.Labelframe(parent, text=titulo, padding=5)
+        frame.grid(row=row, column=0, sticky='nsew', padx=5, pady=5)
+        frame.grid_rowconfigure(0, weight=1)
+        frame.grid_columnconfigure(0, weight=1)
+
+        tree = ttk.Treeview(frame, columns=colunas, show="headings", height=10)
+        for coluna in colunas:
+            texto = coluna in ("AÇÃO", "LOJA")
+            tree.heading(coluna, text=coluna, anchor='center')
+            tree.column(coluna, width=240 if texto else 100, anchor='w' if texto else 'center')
+
+        vsb = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=vsb.set)
+        tree.grid(row=0, column=0, sticky='nsew')
+        vsb.grid(row=0, column=1, sticky='ns')
+        return tree
+
+    @staticmethod
+    def _percentis(hist):
+        return (
+            hist.chamadas,
+            hist.erros,
+            *(f"{hist.percentile(p):.1f}" for p in (50, 95, 99))
+        )
+
+    @log_action("load_action_metrics", audit=False)
+    def carregar_dados(self):
+        try:
+            # Inclui as execuções deste terminal ainda não gravadas
+            self.metricas.flush()
+            por_terminal = self.metricas.load(int(self.periodo.get()))
+
+            # Das ações mais lentas (p95) para as mais rápidas
+            self.tree_acoes.delete(*self.tree_acoes.get_children())
+            por_acao = merge_by_action(por_terminal.items())
+            for acao, hist in sorted(por_acao.items(), key=lambda item: -item[1].percentile(95)):
+                self.tree_acoes.insert("", "end", values=(acao, *self._percentis(hist)))
+
+            self.tree_terminais.delete(*self.tree_terminais.get_children())
+            for (acao, loja), hist in sorted(por_terminal.items(), key=lambda item: (item[0][0], -item[1].percentile(95))):
+                self.tree_terminais.insert("", "end", values=(acao, loja or "(NÃO INFORMADO)",
+                                                              *self._percentis(hist)))
+        except Exception as e:
+            self.logger.logger.error(f"Erro ao carregar desempenho das ações: {str(e)}")
+            UIHelper.show_message("ERRO", "Erro ao carregar desempenho das ações", "error")
+
+
+if __name__ == "__main__":
+    root = ttk.Window(themename="litera")
+    app = ActionMetricsApp(root)
+    root.mainloop()
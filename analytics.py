@@ -0,0 +1,263 @@
+"""
+Painel de análise de defeitos do sistema Austral.
+Lê as contagens de defeitos_resumo, mantidas por triggers, em vez de
+percorrer a tabela de defeitos a cada abertura.
+"""
+
+import tkinter as tk
+import ttkbootstrap as ttk
+from typing import Dict, List, Tuple
+from config import ConfigManager
+from logger import AustralLogger, log_action
+from database import DatabaseManager
+from virtual_tree import DataVersionWatcher
+from utils import FONT_TITLE, FONT_LABEL, ThemeManager, UIHelper, setup_window_icon
+
+
+class AnalyticsApp:
+    """Contagens por categoria, loja, produto e mês, com gráfico de tendência"""
+
+    TOP_N = 20
+    TREND_MONTHS = 12
+    # Categorias com linha própria no gráfico de tendência
+    TREND_CATEGORIES = 3
+    TREND_COLORS = ['#0d47a1', '#d93025', '#0f9d58', '#f4b400']
+
+    CHART_WIDTH = 560
+    CHART_HEIGHT = 320
+    CHART_MARGIN = 45
+
+    def __init__(self, root):
+        self.root = root
+        self.root.title("SISTEMA AUSTRAL - ANÁLISE DE DEFEITOS")
+        self.config = ConfigManager()
+        self.logger = AustralLogger()
+        self.db = DatabaseManager()
+
+        setup_window_icon(self.root)
+        self.setup_ui()
+        self.carregar_dados()
+        UIHelper.center_window(self.root, 1200, 720)
+
+        # Atualiza o painel quando outro terminal registra defeitos
+        self.watcher = DataVersionWatcher(self.root, self.carregar_dados)
+        self.watcher.start()
+        self.root.bind('<Destroy>', self._on_destroy, add='+')
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self.watcher.stop()
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.root, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        header = ttk.Frame(main_frame)
+        header.pack(fill=tk.X, pady=(0, 10))
+        ttk.Label(header, text="ANÁLISE DE DEFEITOS", font=FONT_TITLE, bootstyle="primary").pack(side=tk.LEFT)
+        ttk.Button(header, text="ATUALIZAR", command=self.carregar_dados, bootstyle="secondary").pack(side=tk.RIGHT)
+
+        self.total_var = tk.StringVar()
+        ttk.Label(header, textvariable=self.total_var, font=FONT_LABEL).pack(side=tk.RIGHT, padx=20)
+
+        body = ttk.Frame(main_frame)
+        body.pack(fill=tk.BOTH, expand=True)
+        body.grid_columnconfigure((0, 1), weight=1)
+        body.grid_rowconfigure((0, 1), weight=1)
+
+        self.tree_categoria = self._criar_tabela(body, "POR GRUPO E CATEGORIA", "CATEGORIA", 0, 0,
+                                                 hierarquia=True)
+        self.tree_produto = self._criar_tabela(body, f"TOP {self.TOP_N} PRODUTOS", "PRODUTO", 0, 1)
+        self.tree_loja = self._criar_tabela(body, "POR LOJA", "LOJA", 1, 0)
+
+        chart_frame = ttk.Labelframe(body, text="TENDÊNCIA MENSAL", padding=5)
+        chart_frame.grid(row=1, column=1, sticky='nsew', padx=5, pady=5)
+        self.canvas = tk.Canvas(
+            chart_frame,
+            width=self.CHART_WIDTH,
+            height=self.CHART_HEIGHT,
+            background=ThemeManager.get_color('background'),
+            highlightthickness=0
+        )
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+
+    def _criar_tabela(self, parent, titulo, coluna, row, column, hierarquia=False):
+        frame = ttk.Labelframe(parent, text=titulo, padding=5)
+        frame.grid(row=row, column=column, sticky='nsew', padx=5, pady=5)
+        frame.grid_rowconfigure(0, weight=1)
+        frame.grid_columnconfigure(0, weight=1)
+
+        tree = ttk.Treeview(
+            frame,
+            columns=(coluna, "TOTAL", "%"),
+            show="tree headings" if hierarquia else "headings",
+            height=8
+        )
+        if hierarquia:
+            tree.column("#0", width=24, minwidth=24, stretch=False)
+        tree.heading(coluna, text=coluna, anchor='center')
+        tree.heading("TOTAL", text="TOTAL", anchor='center')
+        tree.heading("%", text="%", anchor='center')
+        tree.column(coluna, width=320, anchor='w')
+        tree.column("TOTAL", width=80, anchor='center')
+        tree.column("%", width=70, anchor='center')
+
+        vsb = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=vsb.set)
+        tree.grid(row=0, column=0, sticky='nsew')
+        vsb.grid(row=0, column=1, sticky='ns')
+        return tree
+
+    # Consultas
+
+    def _top(self, dimensao: str, limite: int = -1) -> List[Tuple[str, int]]:
+        cursor = self.db.connection().cursor()
+        cursor.execute(
+            "SELECT chave, total FROM defeitos_resumo WHERE dimensao = ? "
+            "ORDER BY total DESC LIMIT ?",
+            (dimensao, limite)
+        )
+        return cursor.fetchall()
+
+    def _categorias(self) -> List[Tuple[str, str, str, int]]:
+        """Contagens por tipo de defeito: (chave, rótulo, grupo, total)"""
+        cursor = self.db.connection().cursor()
+        cursor.execute(
+            "SELECT r.chave, t.rotulo, g.nome, r.total FROM defeitos_resumo r "
+            "LEFT JOIN defeito_tipos t ON t.id = r.chave "
+            "LEFT JOIN defeito_grupos g ON g.id = t.grupo_id "
+            "WHERE r.dimensao = 'categoria' ORDER BY r.total DESC"
+        )
+        return cursor.fetchall()
+
+    def _meses(self) -> List[str]:
+        cursor = self.db.connection().cursor()
+        cursor.execute(
+            "SELECT chave FROM defeitos_resumo WHERE dimensao = 'mes' AND chave != '' "
+            "ORDER BY chave DESC LIMIT ?",
+            (self.TREND_MONTHS,)
+        )
+        return sorted(row[0] for row in cursor.fetchall())
+
+    def _serie_mensal(self, meses: List[str], categoria: str = None) -> List[int]:
+        cursor = self.db.connection().cursor()
+        if categoria is None:
+            cursor.execute(
+                f"SELECT chave, total FROM defeitos_resumo WHERE dimensao = 'mes' "
+                f"AND chave IN ({','.join('?' * len(meses))})",
+                meses
+            )
+        else:
+            cursor.execute(
+                f"SELECT substr(chave, 1, 7), total FROM defeitos_resumo WHERE dimensao = 'mes_categoria' "
+                f"AND chave IN ({','.join('?' * len(meses))})",
+                [f"{mes}|{categoria}" for mes in meses]
+            )
+        totais = dict(cursor.fetchall())
+        return [totais.get(mes, 0) for mes in meses]
+
+    # Exibição
+
+    @log_action("load_defect_analytics", audit=False)
+    def carregar_dados(self):
+        try:
+            categorias = self._categorias()
+            total = sum(qtd for *_, qtd in categorias)
+            self.total_var.set(f"TOTAL DE DEFEITOS: {total}")
+
+            self._preencher_categorias(categorias, total)
+            self._preencher(self.tree_loja, self._top('loja'), total)
+            self._preencher(self.tree_produto, self._top('produto', self.TOP_N), total)
+
+            meses = self._meses()
+            series: Dict[str, List[int]] = {}
+            if meses:
+                series['TOTAL'] = self._serie_mensal(meses)
+                for chave, rotulo, _, _ in categorias[:self.TREND_CATEGORIES]:
+                    series[rotulo or 'SEM CATEGORIA'] = self._serie_mensal(meses, chave)
+            self.desenhar_tendencia(meses, series)
+
+            if hasattr(self, 'watcher'):
+                self.watcher.mark_seen()
+        except Exception as e:
+            self.logger.logger.error(f"Erro ao carregar análise de defeitos: {str(e)}")
+            UIHelper.show_message("ERRO", "Erro ao carregar análise de defeitos", "error")
+
+    @staticmethod
+    def _preencher(tree, linhas, total):
+        tree.delete(*tree.get_children())
+        for chave, qtd in linhas:
+            percentual = f"{qtd * 100 / total:.1f}" if total else "0.0"
+            tree.insert("", "end", values=(chave or "(VAZIO)", qtd, percentual))
+
+    def _preencher_categorias(self, categorias, total):
+        """Agrupa as categorias sob o grupo da taxonomia, do grupo mais frequente ao menos"""
+        tree = self.tree_categoria
+        tree.delete(*tree.get_children())
+        grupos: Dict[str, List[Tuple[str, int]]] = {}
+        for _, rotulo, grupo, qtd in categorias:
+            grupos.setdefault(grupo or "SEM GRUPO", []).append((rotulo or "(VAZIO)", qtd))
+
+        def percentual(qtd):
+            return f"{qtd * 100 / total:.1f}" if total else "0.0"
+
+        for grupo, linhas in sorted(grupos.items(), key=lambda item: -sum(q for _, q in item[1])):
+            soma = sum(qtd for _, qtd in linhas)
+            pai = tree.insert("", "end", values=(grupo, soma, percentual(soma)))
+            for rotulo, qtd in linhas:
+                tree.insert(pai, "end", values=(rotulo, qtd, percentual(qtd)))
+
+    def desenhar_tendencia(self, meses: List[str], series: Dict[str, List[int]]):
+        """Desenha as séries mensais no Canvas"""
+        canvas = self.canvas
+        canvas.delete("all")
+        width = max(canvas.winfo_width(), self.CHART_WIDTH)
+        height = max(canvas.winfo_height(), self.CHART_HEIGHT)
+        margin = self.CHART_MARGIN
+
+        if not meses:
+            canvas.create_text(width // 2, height // 2, text="SEM DADOS", font=FONT_LABEL)
+            return
+
+        maximo = max(max(valores) for valores in series.values()) or 1
+        plot_w = width - 2 * margin
+        plot_h = height - 2 * margin - 20  # espaço para a legenda
+
+        def x(i):
+            return margin + (plot_w * i / max(len(meses) - 1, 1))
+
+        def y(valor):
+            return margin + plot_h - (plot_h * valor / maximo)
+
+        # Eixos e grade
+        canvas.create_line(margin, margin, margin, margin + plot_h, fill='#475569')
+        canvas.create_line(margin, margin + plot_h, margin + plot_w, margin + plot_h, fill='#475569')
+        for passo in range(5):
+            valor = maximo * passo / 4
+            canvas.create_line(margin, y(valor), margin + plot_w, y(valor), fill='#e2e8f0')
+            canvas.create_text(margin - 5, y(valor), text=f"{valor:.0f}", anchor='e', font=('Helvetica', 8))
+        for i, mes in enumerate(meses):
+            ano, mm = mes.split('-') if '-' in mes else (mes, '')
+            canvas.create_text(x(i), margin + plot_h + 12, text=f"{mm}/{ano[2:]}", font=('Helvetica', 8))
+
+        # Séries e legenda
+        legenda_x = margin
+        for idx, (nome, valores) in enumerate(series.items()):
+            cor = self.TREND_COLORS[idx % len(self.TREND_COLORS)]
+            pontos = [coord for i, v in enumerate(valores) for coord in (x(i), y(v))]
+            if len(valores) > 1:
+                canvas.create_line(*pontos, fill=cor, width=3 if idx == 0 else 2)
+            for i, v in enumerate(valores):
+                canvas.create_oval(x(i) - 2, y(v) - 2, x(i) + 2, y(v) + 2, fill=cor, outline=cor)
+
+            legenda_y = height - 15
+            canvas.create_rectangle(legenda_x, legenda_y - 5, legenda_x + 10, legenda_y + 5, fill=cor, outline=cor)
+            rotulo = nome if len(nome) <= 28 else nome[:27] + '…'
+            texto = canvas.create_text(legenda_x + 14, legenda_y, text=rotulo, anchor='w', font=('Helvetica', 8))
+            legenda_x = canvas.bbox(texto)[2] + 15
+
+
+if __name__ == "__main__":
+    root = ttk.Window(themename="litera")
+    app = AnalyticsApp(root)
+    root.mainloop()
@@ -0,0 +1,376 @@
+"""
+Backup automático do banco de dados do sistema Austral.
+Usa a API de backup online do SQLite em pequenos passos numa thread de
+fundo, compacta o resultado com gzip, aplica a retenção de database.max_backups
+e registra cada cópia em um manifesto.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from config import ConfigManager
+
+
+class BackupError(Exception):
+    pass
+
+
+class _BackupRestarted(Exception):
+    """O banco foi alterado durante a cópia vezes demais"""
+
+
+class BackupService:
+    _instance = None
+
+    MANIFEST_NAME = 'manifest.json'
+    FILE_PREFIX = 'austral_'
+    FILE_SUFFIX = '.db.gz'
+
+    # Páginas copiadas por passo e pausa entre passos (cede I/O para a interface)
+    PAGES_PER_STEP = 256
+    STEP_PAUSE = 0.005
+    # Reinícios tolerados antes de copiar tudo em um único passo
+    MAX_RESTARTS = 3
+    # Frequência com que o agendador verifica se um backup está vencido
+    CHECK_INTERVAL_SECONDS = 3600
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.config = ConfigManager()
+            self.logger = logging.getLogger('austral.backup')
+            self._run_lock = threading.Lock()
+            self._manifest_lock = threading.Lock()
+            self._stop = threading.Event()
+            self._scheduler: Optional[threading.Thread] = None
+            self.initialized = True
+
+    @property
+    def backup_dir(self) -> Path:
+        return Path(self.config.get('database.backup_dir'))
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.backup_dir / self.MANIFEST_NAME
+
+    # Manifesto
+
+    def load_manifest(self) -> List[Dict[str, Any]]:
+        """Retorna as entradas do manifesto, da mais antiga para a mais nova"""
+        with self._manifest_lock:
+            return self._read_manifest()
+
+    def _read_manifest(self) -> List[Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            return sorted(entries, key=lambda e: e['criado_em'])
+        except FileNotFoundError:
+            return []
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            self.logger.error(f"Manifesto de backups inválido, será recriado: {e}")
+            return []
+
+    def _write_manifest(self, entries: List[Dict[str, Any]]) -> None:
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        temp_file = self.manifest_path.with_suffix('.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=4, ensure_ascii=False)
+        temp_file.replace(self.manifest_path)
+
+    def last_backup_time(self) -> Optional[datetime]:
+        entries = self.load_manifest()
+        if not entries:
+            return None
+        return datetime.fromisoformat(entries[-1]['criado_em'])
+
+    def is_due(self) -> bool:
+        """Indica se o último backup é mais antigo que database.backup_interval_days"""
+        last = self.last_backup_time()
+        if last is None:
+            return True
+        interval = timedelta(days=self.config.get('database.backup_interval_days', 1))
+        return datetime.now() - last >= interval
+
+    # Execução
+
+    def run_backup(self, progress: Optional[Callable[[int, int], None]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Executa um backup completo (bloqueante; chame fora da thread da interface)
+
+        Args:
+            progress: Função opcional chamada com (páginas copiadas, total de páginas)
+
+        Returns:
+            Dict: Entrada registrada no manifesto, ou None se outro backup já está em andamento
+        """
+        if not self._run_lock.acquire(blocking=False):
+            self.logger.info("Backup já em andamento, nova solicitação ignorada")
+            return None
+
+        try:
+            self.backup_dir.mkdir(parents=True, exist_ok=True)
+            self._cleanup_partial_files()
+
+            timestamp = datetime.now()
+            name = f"{self.FILE_PREFIX}{timestamp.strftime('%Y%m%d_%H%M%S')}"
+            temp_db = self.backup_dir / f"{name}.db.part"
+            final_path = self.backup_dir / f"{name}{self.FILE_SUFFIX}"
+
+            started = time.monotonic()
+            pages = self._copy_database(temp_db, progress)
+            db_size = temp_db.stat().st_size
+            sha256 = self._compress(temp_db, final_path)
+            temp_db.unlink(missing_ok=True)
+
+            entry = {
+                'arquivo': final_path.name,
+                'criado_em': timestamp.isoformat(timespec='seconds'),
+                'paginas': pages,
+                'tamanho_db': db_size,
+                'tamanho_arquivo': final_path.stat().st_size,
+                'sha256': sha256,
+                'duracao_s': round(time.monotonic() - started, 2)
+            }
+
+            with self._manifest_lock:
+                entries = self._read_manifest()
+                entries.append(entry)
+                entries = self._apply_retention(entries)
+                self._write_manifest(entries)
+
+            self.logger.info(f"Backup concluído: {final_path.name} ({entry['duracao_s']}s)")
+            return entry
+
+        except Exception as e:
+            self.logger.error(f"Erro ao executar backup: {e}")
+            raise BackupError(f"Erro ao executar backup: {e}")
+        finally:
+            self._run_lock.release()
+
+    def _copy_database(self, target: Path, progress: Optional[Callable[[int, int], None]]) -> int:
+        """Copia o banco com a API de backup online, em passos de PAGES_PER_STEP páginas"""
+        db_path = self.config.get('database.path', 'austral.db')
+        state = {'remaining': None, 'restarts': 0, 'total': 0}
+
+        def on_step(status, remaining, total):
+            # Uma escrita de outra conexão reinicia a cópia; detecta pelo aumento do restante
+            if state['remaining'] is not None and remaining > state['remaining']:
+                state['restarts'] += 1
+                if state['restarts'] > self.MAX_RESTARTS:
+                    raise _BackupRestarted()
+            state['remaining'] = remaining
+            state['total'] = total
+            if progress:
+                progress(total - remaining, total)
+            time.sleep(self.STEP_PAUSE)
+
+        source = sqlite3.connect(db_path)
+        dest = sqlite3.connect(target)
+        try:
+            try:
+                source.backup(dest, pages=self.PAGES_PER_STEP, progress=on_step)
+            except _BackupRestarted:
+                # Com WAL a cópia em passo único não bloqueia os escritores
+                self.logger.info("Banco alterado durante o backup; copiando em um único passo")
+                source.backup(dest)
+            return source.execute('PRAGMA page_count').fetchone()[0]
+        finally:
+            dest.close()
+            source.close()
+
+    @staticmethod
+    def _compress(source: Path, target: Path) -> str:
+        """Compacta o arquivo com gzip e retorna o SHA-256 do resultado"""
+        partial = target.with_name(target.name + '.part')
+        with open(source, 'rb') as f_in, gzip.open(partial, 'wb', compresslevel=6) as f_out:
+            shutil.copyfileobj(f_in, f_out, length=1024 * 1024)
+
+        digest = hashlib.sha256()
+        with open(partial, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+
+        partial.replace(target)
+        return digest.hexdigest()
+
+    def _apply_retention(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Remove os backups mais antigos além de database.max_backups"""
+        max_backups = max(int(self.config.get('database.max_backups', 30)), 1)
+        excess = entries[:-max_backups]
+        for entry in excess:
+            try:
+                (self.backup_dir / entry['arquivo']).unlink(missing_ok=True)
+            except OSError as e:
+                self.logger.error(f"Erro ao remover backup antigo {entry['arquivo']}: {e}")
+        return entries[-max_backups:]
+
+    def _cleanup_partial_files(self) -> None:
+        """Remove sobras de backups interrompidos"""
+        for partial in self.backup_dir.glob(f"{self.FILE_PREFIX}*.part"):
+            try:
+                partial.unlink()
+            except OSError:
+                pass
+
+    # Restauração
+
+    def list_snapshots(self) -> List[Dict[str, Any]]:
+        """
+        Lista os backups disponíveis, do mais novo para o mais antigo.
+        Arquivos presentes na pasta mas ausentes do manifesto também são listados.
+        """
+        entries = {e['arquivo']: dict(e) for e in self.load_manifest()}
+        for path in self.backup_dir.glob(f"{self.FILE_PREFIX}*{self.FILE_SUFFIX}"):
+            if path.name not in entries:
+                entries[path.name] = {
+                    'arquivo': path.name,
+                    'criado_em': datetime.fromtimestamp(path.stat().st_mtime).isoformat(timespec='seconds'),
+                    'tamanho_arquivo': path.stat().st_size
+                }
+
+        snapshots = []
+        for entry in entries.values():
+            path = self.backup_dir / entry['arquivo']
+            if path.exists():
+                entry['caminho'] = path
+                snapshots.append(entry)
+        return sorted(snapshots, key=lambda e: e['criado_em'], reverse=True)
+
+    def restore_snapshot(self, snapshot_path: Path, verify: bool = True) -> Optional[Path]:
+        """
+        Substitui o conteúdo do banco em uso pelo snapshot informado (bloqueante).
+        O snapshot é descompactado ao lado do banco, verificado com
+        integrity_check, migrado para a versão atual do esquema e copiado
+        sobre o banco pela API de backup do SQLite, que obtém os bloqueios
+        normais de escrita e mantém o WAL consistente para as conexões
+        abertas (deste e de outros terminais).
+
+        Args:
+            snapshot_path: Arquivo .db.gz do backup
+            verify: Executa PRAGMA integrity_check antes da cópia
+
+        Returns:
+            Optional[Path]: Cópia do banco anterior, mantida ao lado do
+            original (None se ainda não existia banco); apenas a cópia da
+            restauração mais recente é mantida
+        """
+        from integrity import verify_async
+        from schema import ensure_schema
+
+        db_path = Path(self.config.get('database.path', 'austral.db'))
+        staging = db_path.with_name(db_path.name + '.restore')
+        busy_timeout = int(self.config.get('database.busy_timeout_ms', 5000)) / 1000
+
+        with self._run_lock:
+            try:
+                with gzip.open(snapshot_path, 'rb') as f_in, open(staging, 'wb') as f_out:
+                    shutil.copyfileobj(f_in, f_out, length=1024 * 1024)
+
+                if verify:
+                    result = verify_async(str(staging), quick=False).result()
+                    if not result['ok']:
+                        raise BackupError(
+                            f"Snapshot corrompido: {'; '.join(result['mensagens'])}"
+                        )
+
+                # Snapshots antigos podem estar em uma versão anterior do esquema
+                ensure_schema(str(staging))
+
+                previous = None
+                if db_path.exists():
+                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                    previous = db_path.with_name(f"{db_path.stem}.pre-restore-{timestamp}{db_path.suffix}")
+                    self._copy_over(db_path, previous, busy_timeout)
+
+                # Cópia em um único passo: as outras conexões veem o banco antigo ou o restaurado
+                self._copy_over(staging, db_path, busy_timeout)
+
+                self.logger.info(f"Banco restaurado a partir de {Path(snapshot_path).name}")
+                if previous is not None:
+                    self._remove_pre_restore_copies(db_path, keep=previous)
+                return previous
+
+            except BackupError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Erro ao restaurar backup: {e}")
+                raise BackupError(f"Erro ao restaurar backup: {e}")
+            finally:
+                for suffix in ('', '-wal', '-shm'):
+                    Path(str(staging) + suffix).unlink(missing_ok=True)
+
+    def _remove_pre_restore_copies(self, db_path: Path, keep: Path) -> None:
+        """Remove as cópias de restaurações anteriores, exceto `keep`"""
+        for path in db_path.parent.glob(f"{db_path.stem}.pre-restore-*{db_path.suffix}"):
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+            except OSError as e:
+                self.logger.error(f"Erro ao remover cópia anterior à restauração {path.name}: {e}")
+
+    @staticmethod
+    def _copy_over(origem: Path, destino: Path, busy_timeout: float) -> None:
+        """Copia o conteúdo de um banco sobre outro com a API de backup do SQLite"""
+        src = sqlite3.connect(origem, timeout=busy_timeout)
+        try:
+            dst = sqlite3.connect(destino, timeout=busy_timeout)
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+        finally:
+            src.close()
+
+    # Agendamento
+
+    def start_async(self, progress: Optional[Callable[[int, int], None]] = None) -> threading.Thread:
+        """Executa um backup em uma thread de fundo"""
+        def worker():
+            try:
+                self.run_backup(progress)
+            except BackupError:
+                pass  # Já registrado em run_backup
+
+        thread = threading.Thread(target=worker, name='austral-backup', daemon=True)
+        thread.start()
+        return thread
+
+    def start_scheduler(self) -> None:
+        """Inicia o agendador que executa backups vencidos enquanto o sistema está aberto"""
+        if not self.config.get('database.auto_backup', True):
+            return
+        if self._scheduler is not None and self._scheduler.is_alive():
+            return
+
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    if self.is_due():
+                        self.run_backup()
+                except BackupError:
+                    pass
+                except Exception as e:
+                    self.logger.error(f"Erro no agendador de backups: {e}")
+                self._stop.wait(self.CHECK_INTERVAL_SECONDS)
+
+        self._stop.clear()
+        self._scheduler = threading.Thread(target=loop, name='austral-backup-scheduler', daemon=True)
+        self._scheduler.start()
+
+    def stop_scheduler(self) -> None:
+        self._stop.set()
@@ -5,7 +5,9 @@ from datetime import datetime
 import shutil
 import logging
 from dataclasses import dataclass
+import atexit
 import os
+import threading
 
 class ConfigurationError(Exception):
     pass
@@ -17,6 +19,10 @@ class DatabaseConfig:
     auto_backup: bool = True
     backup_interval_days: int = 1
     max_backups: int = 30
+    journal_mode: str = "WAL"
+    busy_timeout_ms: int = 5000
+    verify_interval_hours: int = 24
+    analyze_interval_days: int = 7
 
 @dataclass
 class LogConfig:
@@ -24,6 +30,7 @@ class LogConfig:
     level: str = "INFO"
     max_size_mb: int = 10
     backup_count: int = 5
+    flush_interval_ms: int = 1000
 
 @dataclass
 class ThemeConfig:
@@ -45,8 +52,14 @@ class ConfigManager:
             self.base_dir = Path.home() / '.austral'
             self.config_file = self.base_dir / 'config.json'
             self.config: Dict[str, Any] = {}
+            # Escrita adiada (write-behind): set() altera a memória e agenda a gravação
+            self._lock = threading.RLock()
+            self._write_lock = threading.Lock()
+            self._dirty = False
+            self._flush_timer: Optional[threading.Timer] = None
             self._load_default_config()
             self._ensure_directories()
+            atexit.register(self.flush)
             self.initialized = True
 
     def _load_default_config(self) -> None:
@@ -63,13 +76,19 @@ class ConfigManager:
                 'backup_dir': str(self.base_dir / 'backups'),
                 'auto_backup': True,
                 'backup_interval_days': 1,
-                'max_backups': 30
+                'max_backups': 30,
+                'journal_mode': 'WAL',
+                'busy_timeout_ms': 5000,
+                'verify_interval_hours': 24,
+                'analyze_interval_days': 7
             },
             'logs': {
                 'path': str(self.base_dir / 'logs' / 'austral.log'),
                 'level': 'INFO',
                 'max_size_mb': 10,
-                'backup_count': 5
+                'backup_count': 5,
+                # Intervalo máximo entre a gravação de um registro e sua ida ao disco
+                'flush_interval_ms': 1000
             },
             'email': {
                 'templates_dir': str(self.base_dir / 'templates'),
@@ -82,7 +101,30 @@ class ConfigManager:
             },
             'performance': {
                 'cache_size_mb': 100,
-                'max_concurrent_operations': 5
+                'max_concurrent_operations': 5,
+                'config_flush_interval_ms': 1000,
+                'prewarm_tools': True,
+                'data_version_poll_ms': 2000
+            },
+            'terminal': {
+                # Loja deste terminal (uma das lojas de lojas.py), escolhida no
+                # Controle de Pedidos SinOMS e gravada nos pedidos e nas métricas
+                'loja': ''
+            },
+            'sinoms': {
+                'prazo_envio_dias': 2,
+                'metricas_dias': 90
+            },
+            'diagnostics': {
+                # Detector de travamentos da interface (stall_watchdog.py)
+                'stall_watchdog': False,
+                'stall_threshold_ms': 500,
+                'heartbeat_ms': 100
+            },
+            'metrics': {
+                # Duração das ações de @log_action, gravada em metricas_acoes
+                'enabled': True,
+                'flush_interval_s': 60
             },
             'last_values': {
                 'email_generator': {},
@@ -125,18 +167,66 @@ class ConfigManager:
         update_recursive(self.config, new_config)
 
     def _save_config(self) -> None:
+        # _write_lock garante que gravações concorrentes cheguem ao disco em ordem
+        with self._write_lock:
+            with self._lock:
+                self._cancel_flush_timer()
+                self._dirty = False
+                payload = json.dumps(self.config, indent=4, ensure_ascii=False)
+
+            try:
+                self.config_file.parent.mkdir(parents=True, exist_ok=True)
+                temp_file = self.config_file.with_suffix('.tmp')
+
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    f.write(payload)
+
+                temp_file.replace(self.config_file)
+
+            except Exception as e:
+                with self._lock:
+                    self._dirty = True
+                self.logger.error(f"Erro ao salvar configurações: {e}")
+                raise ConfigurationError(f"Erro ao salvar configurações: {e}")
+
+    def _flush_interval(self) -> float:
+        """Intervalo da gravação adiada em segundos (0 desativa o modo write-behind)"""
+        interval_ms = self.get('performance.config_flush_interval_ms', 0)
         try:
-            self.config_file.parent.mkdir(parents=True, exist_ok=True)
-            temp_file = self.config_file.with_suffix('.tmp')
-            
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=4, ensure_ascii=False)
-            
-            temp_file.replace(self.config_file)
-            
-        except Exception as e:
-            self.logger.error(f"Erro ao salvar configurações: {e}")
-            raise ConfigurationError(f"Erro ao salvar configurações: {e}")
+            return max(float(interval_ms), 0.0) / 1000
+        except (TypeError, ValueError):
+            return 0.0
+
+    def _cancel_flush_timer(self) -> None:
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+    def _schedule_flush(self, interval: float) -> None:
+        """Marca a configuração como alterada e agenda uma única gravação para o lote"""
+        with self._lock:
+            self._dirty = True
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(interval, self._background_flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _background_flush(self) -> None:
+        with self._lock:
+            self._flush_timer = None
+        try:
+            self.flush()
+        except ConfigurationError:
+            # Já registrado em _save_config; a próxima alteração ou o flush final tenta novamente
+            pass
+
+    def flush(self) -> None:
+        """Grava imediatamente as alterações pendentes no disco"""
+        with self._lock:
+            if not self._dirty:
+                self._cancel_flush_timer()
+                return
+        self._save_config()
 
     def _ensure_directories(self) -> None:
         try:
@@ -169,18 +259,45 @@ class ConfigManager:
             keys = key_path.split('.')
             config = self.config
             
-            for key in keys[:-1]:
-                config = config.setdefault(key, {})
-            
-            config[keys[-1]] = value
-            
+            with self._lock:
+                for key in keys[:-1]:
+                    config = config.setdefault(key, {})
+
+                config[keys[-1]] = value
+
             if save:
-                self._save_config()
-                
+                interval = self._flush_interval()
+                if interval > 0:
+                    self._schedule_flush(interval)
+                else:
+                    self._save_config()
+
+        except ConfigurationError:
+            raise
         except Exception as e:
             self.logger.error(f"Erro ao definir configuração '{key_path}': {e}")
             raise ConfigurationError(f"Erro ao definir configuração '{key_path}': {e}")
 
+    def remove(self, key_path: str, save: bool = True) -> None:
+        """Remove uma chave da configuração, se existir"""
+        keys = key_path.split('.')
+        with self._lock:
+            config = self.config
+            for key in keys[:-1]:
+                config = config.get(key)
+                if not isinstance(config, dict):
+                    return
+            if keys[-1] not in config:
+                return
+            del config[keys[-1]]
+
+        if save:
+            interval = self._flush_interval()
+            if interval > 0:
+                self._schedule_flush(interval)
+            else:
+                self._save_config()
+
     def backup_config(self) -> None:
         try:
             backup_dir = self.base_dir / 'backups' / 'config'
@@ -188,7 +305,8 @@ class ConfigManager:
             
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             backup_file = backup_dir / f'config_{timestamp}.json'
-            
+
+            self.flush()
             shutil.copy2(self.config_file, backup_file)
             
             self._cleanup_old_backups(backup_dir)
@@ -206,7 +324,8 @@ class ConfigManager:
 
     def reset_to_default(self) -> None:
         try:
-            self.config = self.default_config.copy()
+            with self._lock:
+                self.config = self.default_config.copy()
             self._save_config()
             self._ensure_directories()
         except Exception as e:
@@ -245,20 +364,8 @@ class ConfigManager:
     def setup_all_databases(self):
         """Configura todos os bancos de dados e tabelas necessárias."""
         try:
-            # Configuração do banco de dados para DefectManagerApp
-            from defects import DefectManagerApp
-            DefectManagerApp.setup_database_static(self)
-
-            # Configuração do banco de dados para PedidoSinOMSApp
-            from sinoms import PedidoSinOMSApp
-            PedidoSinOMSApp.setup_database_static(self)
-
-            # Configuração do banco de dados para UserManager
-            from user_manager import UserManager
-            UserManager.setup_database_static(self)
-
-            # Adicione chamadas para outros módulos, se necessário
-
+            from schema import ensure_schema
+            ensure_schema(self.get('database.path', 'austral.db'))
         except Exception as e:
             self.logger.error(f"Erro ao configurar bancos de dados: {e}")
             raise ConfigurationError(f"Erro ao configurar bancos de dados: {e}")
@@ -0,0 +1,206 @@
+"""
+Gerenciador de conexões SQLite do sistema Austral.
+Mantém uma conexão de longa duração por thread, com WAL, synchronous=NORMAL,
+busy_timeout e cache de instruções preparadas, e expõe transações via
+gerenciador de contexto.
+"""
+
+import atexit
+import logging
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Sequence
+
+from config import ConfigManager
+
+
+class _ThreadConnection:
+    """
+    Conexão de uma thread, guardada no threading.local. Quando a thread
+    termina, o objeto é descartado e o finalizador fecha a conexão.
+    """
+
+    __slots__ = ('conn', '__weakref__')
+
+    def __init__(self):
+        self.conn: Optional[sqlite3.Connection] = None
+
+
+def _close_connection(conn: sqlite3.Connection) -> None:
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+class DatabaseManager:
+    _instance = None
+
+    # Frequência da manutenção das estatísticas do planejador
+    MAINTENANCE_INTERVAL_SECONDS = 6 * 3600
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.config = ConfigManager()
+            self.logger = logging.getLogger('austral.database')
+            self._local = threading.local()
+            # Conexões das threads vivas (as de threads encerradas saem sozinhas)
+            self._connections: 'weakref.WeakSet[_ThreadConnection]' = weakref.WeakSet()
+            self._lock = threading.Lock()
+            self._stop = threading.Event()
+            self._maintenance: Optional[threading.Thread] = None
+            atexit.register(self.close_all)
+            self.initialized = True
+
+    @property
+    def db_path(self) -> str:
+        return self.config.get('database.path', 'austral.db')
+
+    def _connect(self) -> sqlite3.Connection:
+        busy_timeout_ms = int(self.config.get('database.busy_timeout_ms', 5000))
+        journal_mode = self.config.get('database.journal_mode', 'WAL')
+
+        # isolation_level=None: leituras não abrem transação implícita; as escritas
+        # usam transaction(). check_same_thread=False apenas para permitir close_all()
+        # e o fechamento pelo finalizador quando a thread termina.
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=busy_timeout_ms / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256
+        )
+        conn.execute(f'PRAGMA journal_mode={journal_mode}')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={busy_timeout_ms}')
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Retorna a conexão da thread atual, abrindo-a no primeiro uso"""
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            holder = self._local.holder = _ThreadConnection()
+            with self._lock:
+                self._connections.add(holder)
+        if holder.conn is None:
+            holder.conn = self._connect()
+            # No encerramento do interpretador quem fecha é close_all()
+            weakref.finalize(holder, _close_connection, holder.conn).atexit = False
+        return holder.conn
+
+    @contextmanager
+    def transaction(self, immediate: bool = True) -> Iterator[sqlite3.Connection]:
+        """
+        Executa o bloco dentro de uma transação (commit ao sair, rollback em erro).
+        Blocos aninhados participam da transação externa.
+
+        Args:
+            immediate: Reserva o bloqueio de escrita já no BEGIN, evitando
+                       SQLITE_BUSY no meio da transação
+        """
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+
+        conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        """Executa uma consulta e retorna todas as linhas"""
+        return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[tuple]:
+        """Executa uma consulta e retorna a primeira linha (ou None)"""
+        return self.connection().execute(sql, params).fetchone()
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        """Executa uma única instrução de escrita em sua própria transação"""
+        with self.transaction() as conn:
+            return conn.execute(sql, params)
+
+    def optimize(self) -> bool:
+        """
+        Atualiza as estatísticas do planejador (PRAGMA optimize e, a cada
+        database.analyze_interval_days, um ANALYZE completo)
+
+        Returns:
+            bool: True se um ANALYZE completo foi executado
+        """
+        from schema import optimize
+
+        interval_days = int(self.config.get('database.analyze_interval_days', 7))
+        executou_analyze = optimize(self.connection(), interval_days)
+        if executou_analyze:
+            self.logger.info("ANALYZE executado")
+        return executou_analyze
+
+    def start_maintenance(self) -> None:
+        """Inicia a manutenção periódica das estatísticas em uma thread de fundo"""
+        if self._maintenance is not None and self._maintenance.is_alive():
+            return
+
+        def loop():
+            # Aguarda a abertura do sistema antes da primeira execução
+            if self._stop.wait(120):
+                return
+            while not self._stop.is_set():
+                try:
+                    self.optimize()
+                except sqlite3.Error as e:
+                    self.logger.error(f"Erro na manutenção do banco: {e}")
+                self._stop.wait(self.MAINTENANCE_INTERVAL_SECONDS)
+            self.close()
+
+        self._stop.clear()
+        self._maintenance = threading.Thread(target=loop, name='austral-db-maintenance', daemon=True)
+        self._maintenance.start()
+
+    def stop_maintenance(self) -> None:
+        self._stop.set()
+
+    def close(self) -> None:
+        """Fecha a conexão da thread atual"""
+        holder = getattr(self._local, 'holder', None)
+        if holder is not None and holder.conn is not None:
+            conn, holder.conn = holder.conn, None
+            conn.close()
+
+    def close_all(self) -> None:
+        """
+        Fecha as conexões ociosas de todas as threads (encerramento do
+        sistema). Conexões com transação em andamento continuam com suas
+        threads; cada thread reabre a conexão no próximo uso.
+        """
+        with self._lock:
+            holders = list(self._connections)
+        for holder in holders:
+            conn = holder.conn
+            if conn is None or conn.in_transaction:
+                continue
+            holder.conn = None
+            try:
+                # Recomendado pelo SQLite antes de fechar conexões de longa duração
+                conn.execute('PRAGMA optimize')
+            except sqlite3.Error:
+                pass
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                self.logger.warning(f"Erro ao fechar conexão: {e}")
+
+
+db_manager = DatabaseManager()
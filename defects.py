@@ -1,23 +1,56 @@
 # defect_manager_app.py
 
+import re
 import tkinter as tk
 from tkinter import messagebox, filedialog
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
-import pandas as pd
 from datetime import datetime
-import sqlite3
 from config import ConfigManager
 from logger import AustralLogger, log_action
 from utils import FONT_TITLE, FONT_LABEL, FONT_ENTRY, FONT_BUTTON
 from utils import UIHelper
 from lojas import lojas
+from schema import ensure_schema
+from database import DatabaseManager
+from virtual_tree import KeysetTreeview, DataVersionWatcher
+from exporter import export_query, ExportCancelled, FILETYPES
+from jobs import JobRunner, JobCancelled
+from taxonomy import Taxonomy, PLACEHOLDERS, campos_faltando
+import importer
 
 class DefectManagerApp:
+    # Resultados exibidos por busca, em ordem de relevância
+    SEARCH_LIMIT = 500
+    # Espera após a digitação antes de buscar
+    SEARCH_DELAY_MS = 300
+
+    # Colunas lidas para a Treeview; origem e tamanho são chaves da taxonomia
+    COLUNAS_LISTA = (
+        "id", "origem_id", "codigo_produto", "descricao", "nome_vendedor",
+        "data_defeito", "cor", "tamanho_id", "loja", "observacoes"
+    )
+
+    # Registro completo para o formulário, com os rótulos da taxonomia
+    SELECT_DEFEITO = '''
+        SELECT d.id, o.nome, d.codigo_produto, d.descricao, d.cor, tm.nome,
+               d.nome_cliente, d.nome_vendedor, d.data_defeito, t.rotulo,
+               d.observacoes, d.loja
+        FROM defeitos d
+        LEFT JOIN defeito_origens o ON o.id = d.origem_id
+        LEFT JOIN tamanhos tm ON tm.id = d.tamanho_id
+        LEFT JOIN defeito_tipos t ON t.id = d.tipo_id
+        WHERE d.id = ?
+    '''
+
     def __init__(self, root):
         self.root = root
         self.config = ConfigManager()
         self.logger = AustralLogger()
+        self.db = DatabaseManager()
+        self.taxonomia = Taxonomy()
+        self.busca_ativa = None
+        self._busca_after_id = None
         
         # Configuração inicial da janela
         self.root.title("SISTEMA AUSTRAL - REGISTRO DE DEFEITOS")
@@ -53,32 +86,10 @@ class DefectManagerApp:
         self.root.geometry(f"{window_width}x{window_height}+{x}+{y}")
 
     def setup_database(self):
-        """Configura a tabela de defeitos no banco de dados"""
+        """Garante que o esquema do banco de dados esteja atualizado"""
         try:
             db_path = self.config.get('database.path', 'austral.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS defeitos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    tipo_defeito TEXT,
-                    codigo_produto TEXT,
-                    descricao TEXT,
-                    cor TEXT,
-                    tamanho TEXT,
-                    nome_cliente TEXT,
-                    nome_vendedor TEXT,
-                    data_defeito TEXT,
-                    descricao_defeito TEXT,
-                    observacoes TEXT,
-                    loja TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            conn.commit()
-            
+            ensure_schema(db_path)
         except Exception as e:
             self.logger.logger.error(f"Erro ao configurar banco de dados: {str(e)}")
             UIHelper.show_message(
@@ -86,44 +97,6 @@ class DefectManagerApp:
                 "Erro ao configurar banco de dados",
                 "error"
             )
-        finally:
-            if 'conn' in locals():
-                conn.close()
-
-    @staticmethod
-    def setup_database_static(config):
-        """Método estático para configurar o banco de dados sem instanciar a classe."""
-        try:
-            db_path = config.get('database.path', 'austral.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-
-            # Criação da tabela 'defeitos'
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS defeitos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    tipo_defeito TEXT,
-                    codigo_produto TEXT,
-                    descricao TEXT,
-                    cor TEXT,
-                    tamanho TEXT,
-                    nome_cliente TEXT,
-                    nome_vendedor TEXT,
-                    data_defeito TEXT,
-                    descricao_defeito TEXT,
-                    observacoes TEXT,
-                    loja TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            conn.commit()
-        except Exception as e:
-            # ... tratamento de erro existente ...
-            pass
-        finally:
-            if 'conn' in locals():
-                conn.close()
 
     def setup_ui(self):
         """Configura a interface do usuário"""
@@ -165,6 +138,12 @@ class DefectManagerApp:
         # Configuração dos botões
         self.setup_buttons(button_frame)
         
+        # Busca textual
+        search_frame = ttk.Frame(self.main_frame)
+        search_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.setup_search(search_frame)
+        
         # Frame e configuração do Treeview
         tree_frame = ttk.Frame(self.main_frame)
         tree_frame.pack(fill=tk.BOTH, expand=True)
@@ -174,14 +153,21 @@ class DefectManagerApp:
         # Carregar dados iniciais
         self.carregar_dados()
 
+        # Recarrega a lista apenas quando outro terminal grava no banco
+        self.watcher = DataVersionWatcher(self.root, self.carregar_dados)
+        self.watcher.start()
+        self.root.bind('<Destroy>', self._on_destroy, add='+')
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self.watcher.stop()
+
     def setup_entry_fields(self, left_frame, right_frame):
         """Configura os campos de entrada"""
-        # Listas de opções
-        self.tipos_defeito = ["SELECIONE A ORIGEM", "CLIENTE", "LOJA", "UNIFORME"]
-        self.tamanhos = ["SELECIONE O TAMANHO", "ÚNICO", "XPP", "PP", "P", "M", "G", "GG", "XGG",
-                       "36", "38", "40", "42", "44", "46", "48",
-                       "38-39", "40-41", "42-43", "44-45", "36-37", "34-35"]
-        self.lojas_lista = ["SELECIONE A LOJA"]
+        # Listas de opções (tabelas de referência, lidas uma vez)
+        self.tipos_defeito = self.taxonomia.opcoes('origem')
+        self.tamanhos = self.taxonomia.opcoes('tamanho')
+        self.lojas_lista = [PLACEHOLDERS['loja']]
         self.lojas_lista.extend([loja.get("loja", "") for loja in lojas if isinstance(loja, dict)])
         
         # Campos da esquerda
@@ -242,7 +228,9 @@ class DefectManagerApp:
             ("ATUALIZAR", self.atualizar_defeito, "info"),
             ("EXCLUIR", self.excluir_defeito, "danger"),
             ("LIMPAR", self.limpar_campos, "warning"),
-            ("EXPORTAR", self.exportar_excel, "success")
+            ("EXPORTAR", self.exportar_excel, "success"),
+            ("IMPORTAR", self.importar_arquivo, "success-outline"),
+            ("RECARREGAR", self.carregar_dados, "secondary")
         ]
         
         for i, (text, command, style) in enumerate(buttons):
@@ -258,6 +246,30 @@ class DefectManagerApp:
             # Expandir os botões para preencher o espaço disponível
             btn.grid(row=0, column=i, sticky='nsew', padx=2, pady=5)
 
+    def setup_search(self, search_frame):
+        """Configura a caixa de busca"""
+        ttk.Label(search_frame, text="BUSCAR:", font=FONT_LABEL).pack(side=tk.LEFT, padx=(2, 5))
+
+        self.busca_entry = ttk.Entry(search_frame, font=FONT_ENTRY)
+        self.busca_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=2)
+        self.busca_entry.bind('<Return>', lambda e: self.buscar_defeitos())
+        self.busca_entry.bind('<KeyRelease>', self._agendar_busca)
+
+        ttk.Button(
+            search_frame,
+            text="BUSCAR",
+            command=self.buscar_defeitos,
+            bootstyle="primary",
+            width=15
+        ).pack(side=tk.LEFT, padx=2)
+        ttk.Button(
+            search_frame,
+            text="LIMPAR BUSCA",
+            command=self.limpar_busca,
+            bootstyle="secondary",
+            width=15
+        ).pack(side=tk.LEFT, padx=2)
+
     def setup_treeview(self, tree_frame):
         """Configura o Treeview"""
         # Configurar grid do frame
@@ -309,6 +321,22 @@ class DefectManagerApp:
         vsb.grid(row=0, column=1, sticky='ns')
         hsb.grid(row=1, column=0, sticky='ew')
 
+        # Total de registros (a lista mantém apenas algumas páginas carregadas)
+        self.total_var = tk.StringVar()
+        ttk.Label(tree_frame, textvariable=self.total_var, font=FONT_LABEL).grid(
+            row=2, column=0, sticky='w', pady=(5, 0)
+        )
+
+        # Paginação por id: busca as linhas conforme a rolagem
+        self.pager = KeysetTreeview(
+            self.tree,
+            vsb,
+            table='defeitos',
+            columns=self.COLUNAS_LISTA,
+            on_count=self._mostrar_total,
+            row_values=self._valores_linha
+        )
+
         # Vincular eventos
         self.tree.bind('<<TreeviewSelect>>', self.on_select)
         self.tree.bind('<Double-1>', self.on_double_click)
@@ -331,13 +359,9 @@ class DefectManagerApp:
         
         try:
             # Consulta o banco de dados
-            db_path = self.config.get('database.path', 'austral.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
+            cursor = self.db.connection().cursor()
             
-            cursor.execute("""
-                SELECT * FROM defeitos WHERE id = ?
-            """, (self.selected_id,))
+            cursor.execute(self.SELECT_DEFEITO, (self.selected_id,))
             
             row = cursor.fetchone()
             if row:
@@ -345,144 +369,24 @@ class DefectManagerApp:
                 self.limpar_campos()
                 
                 # Preenche os campos com os dados do item selecionado
-                self.tipo_defeito_entry.set(row[1])
+                self.tipo_defeito_entry.set(row[1] or self.tipos_defeito[0])
                 self.codigo_produto_entry.insert(0, row[2])
                 self.descricao_entry.insert(0, row[3] or '')
                 self.cor_entry.insert(0, row[4] or '')
-                self.tamanho_entry.set(row[5])
+                self.tamanho_entry.set(row[5] or self.tamanhos[0])
                 self.nome_cliente_entry.insert(0, row[6] or '')
                 self.nome_vendedor_entry.insert(0, row[7])
-                self.descricao_defeito_entry.set(row[9])
+                self.descricao_defeito_entry.set(row[9] or self.get_tipos_defeito()[0])
                 self.observacoes_entry.insert('1.0', row[10] or '')
                 self.loja_entry.set(row[11] if row[11] else self.lojas_lista[0])
                 
         except Exception as e:
             self.logger.logger.error(f"Erro ao carregar dados do item: {str(e)}")
             UIHelper.show_message("ERRO", "Erro ao carregar dados do item selecionado", "error")
-        finally:
-            if 'conn' in locals():
-                conn.close()
 
     def get_tipos_defeito(self):
-        """Retorna a lista expandida e organizada de tipos de defeito"""
-        return [
-        "SELECIONE UM TIPO DE DEFEITO",
-        
-        # Defeitos em Peças Novas
-        "1. FUROS EM PEÇA NOVA",
-        "2. MANCHA EM PEÇA NOVA",
-        "3. FIO PUXADO EM PEÇA NOVA",
-        "4. COSTURA TORTA",
-        "5. COSTURA FROUXA",
-        "6. COSTURA ROMPIDA",
-        "7. ACABAMENTO IRREGULAR - SOBRAS DE LINHAS",
-        "8. ACABAMENTO IRREGULAR - SOBRAS DE TECIDO",
-        "9. ACABAMENTO IRREGULAR - PONTO SOLTO",
-        "10. TECIDO TRANSPARENTE",
-        "11. TECIDO COM FALHA DE TECELAGEM",
-        "12. TECIDO COM FALHA DE TINGIMENTO",
-        "13. TAMANHO INCORRETO",
-        "14. ETIQUETA FALTANDO",
-        "15. ETIQUETA COM INFORMAÇÃO INCORRETA",
-        "16. ETIQUETA MAL POSICIONADA",
-        "17. BOTÃO DIFERENTE DO PADRÃO",
-        "18. BOTÃO MAL POSICIONADO",
-        "19. ZÍPER QUEBRADO",
-        "20. ZÍPER TRAVANDO",
-        "21. BARRA SOLTA",
-        "22. BARRA TORTA",
-        "23. BARRA DESALINHADA",
-        "24. PRODUTO TROCADO",
-        "25. PRODUTO INCOMPLETO",
-        
-        # Defeitos em Aviamentos e Acabamentos
-        "26. APLICAÇÃO SOLTANDO",
-        "27. APLICAÇÃO MAL POSICIONADA",
-        "28. APLICAÇÃO COM DEFEITO",
-        "29. FALTA DE AVIAMENTOS",
-        "30. AVIAMENTOS INCORRETOS",
-        "31. AVIAMENTOS DANIFICADOS",
-        "32. DEFEITO NA ESTAMPA - RACHADURA",
-        "33. DEFEITO NA ESTAMPA - DESBOTAMENTO",
-        "34. DEFEITO NA ESTAMPA - DESCASCAMENTO",
-        "35. DEFEITO NA ESTAMPA - MANCHAS",
-        "36. DEFEITO NO BORDADO - FALHAS",
-        "37. DEFEITO NO BORDADO - PONTOS SOLTOS",
-        "38. DEFEITO NO BORDADO - DESALINHAMENTO",
-        "39. DEFEITO NO FORRO - COSTURA",
-        "40. DEFEITO NO FORRO - MATERIAL",
-        
-        # Defeitos Após Uso e Lavagem
-        "41. PILLING OU BOLINHAS",
-        "42. PENUGEM APÓS LAVAGEM",
-        "43. FURO APÓS USO",
-        "44. FURO APÓS LAVAGEM",
-        "45. MANCHA APÓS USO",
-        "46. MANCHA APÓS LAVAGEM",
-        "47. PEÇA DESCOSTURADA APÓS USO",
-        "48. PEÇA DESCOSTURADA APÓS LAVAGEM",
-        "49. DESBOTAMENTO APÓS USO",
-        "50. DESBOTAMENTO APÓS LAVAGEM",
-        "51. DESCOLORAÇÃO APÓS USO",
-        "52. DESCOLORAÇÃO APÓS LAVAGEM",
-        "53. MIGRAÇÃO DE COR",
-        "54. BOTÃO CAINDO",
-        "55. ENCOLHIMENTO APÓS LAVAGEM",
-        "56. ENCOLHIMENTO IRREGULAR",
-        "57. DEFORMAÇÃO APÓS LAVAGEM",
-        
-        # Defeitos por Condições Específicas
-        "58. DEFEITO APÓS LAVAGEM E SECAGEM",
-        "59. DEFEITO APÓS LAVAGEM E PASSAGEM",
-        "60. DEFEITO APÓS ARMAZENAMENTO",
-        "61. DEFEITO APÓS EXPOSIÇÃO AO SOL",
-        "62. DEFEITO APÓS EXPOSIÇÃO À UMIDADE",
-        "63. DESGASTE PRECOCE DO TECIDO",
-        "64. DESGASTE IRREGULAR",
-        "65. DESGASTE EM COSTURA",
-        
-        # Defeitos de Odor e Conservação
-        "66. MAU CHEIRO PERSISTENTE",
-        "67. MAU CHEIRO APÓS LAVAGEM",
-        "68. MOFO",
-        "69. MANCHAS DE UMIDADE",
-        "70. AMARELAMENTO DO TECIDO",
-        
-        # Defeitos Estruturais
-        "71. MODELAGEM INCORRETA",
-        "72. PROPORÇÕES INCORRETAS",
-        "73. CAIMENTO IRREGULAR",
-        "74. ASSIMETRIA",
-        "75. DEFEITO NA ESTRUTURA DO TECIDO",
-        
-        # Defeitos em Detalhes e Acessórios
-        "76. DETALHE DESCOLADO",
-        "77. DETALHE QUEBRADO",
-        "78. DETALHE MAL POSICIONADO",
-        "79. ACESSÓRIO DANIFICADO",
-        "80. ACESSÓRIO FALTANTE",
-        
-        # Defeitos de Acabamento Especial
-        "81. DEFEITO EM LAVANDERIA",
-        "82. DEFEITO EM TINGIMENTO",
-        "83. DEFEITO EM ESTAMPARIA",
-        "84. DEFEITO EM BORDADO INDUSTRIAL",
-        "85. DEFEITO EM TERMOCOLANTE",
-        
-        # Defeitos de Características Funcionais
-        "86. PERDA DE ELASTICIDADE",
-        "87. PERDA DE FORMA",
-        "88. PERDA DE TEXTURA",
-        "89. PERDA DE BRILHO",
-        "90. FALHA NO ACABAMENTO ANTÍPILLING",
-        
-        # Outros Defeitos
-        "91. FALHA NA COSTURA DECORATIVA",
-        "92. FALHA NO ACABAMENTO IMPERMEÁVEL",
-        "93. FALHA NO ACABAMENTO UV",
-        "94. DEFEITO EM PEDRARIA",
-        "95. DEFEITO EM APLICAÇÕES METÁLICAS"
-    ]
+        """Retorna os tipos de defeito ativos, na ordem dos grupos da taxonomia"""
+        return self.taxonomia.opcoes('tipo')
 
     def limpar_campos(self):
         """Limpa todos os campos do formulário"""
@@ -516,13 +420,9 @@ class DefectManagerApp:
 
         try:
             # Consulta o banco de dados para obter os dados completos
-            db_path = self.config.get('database.path', 'austral.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
+            cursor = self.db.connection().cursor()
 
-            cursor.execute("""
-                SELECT * FROM defeitos WHERE id = ?
-            """, (self.selected_id,))
+            cursor.execute(self.SELECT_DEFEITO, (self.selected_id,))
 
             row = cursor.fetchone()
             if row:
@@ -539,48 +439,112 @@ class DefectManagerApp:
                 self.observacoes_entry.delete('1.0', tk.END)
 
                 # Preenche os campos com os dados do item selecionado
-                self.tipo_defeito_entry.set(row[1])
+                self.tipo_defeito_entry.set(row[1] or self.tipos_defeito[0])
                 self.codigo_produto_entry.insert(0, row[2])
                 self.descricao_entry.insert(0, row[3] or '')
                 self.cor_entry.insert(0, row[4] or '')
-                self.tamanho_entry.set(row[5])
+                self.tamanho_entry.set(row[5] or self.tamanhos[0])
                 self.nome_cliente_entry.insert(0, row[6] or '')
                 self.nome_vendedor_entry.insert(0, row[7])
-                self.descricao_defeito_entry.set(row[9])
+                self.descricao_defeito_entry.set(row[9] or self.get_tipos_defeito()[0])
                 self.observacoes_entry.insert('1.0', row[10] or '')
                 self.loja_entry.set(row[11] if row[11] else self.lojas_lista[0])
 
         except Exception as e:
             self.logger.logger.error(f"Erro ao carregar dados do item: {str(e)}")
             UIHelper.show_message("ERRO", "Erro ao carregar dados do item selecionado", "error")
-        finally:
-            if 'conn' in locals():
-                conn.close()
 
-    def carregar_dados(self):
-        """Carrega os dados do banco de dados para a Treeview"""
-        # Limpar dados existentes
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+    def _valores_linha(self, row):
+        """Troca as chaves de origem e tamanho pelos rótulos da taxonomia"""
+        valores = list(row)
+        valores[1] = self.taxonomia.rotulo('origem', row[1])
+        valores[7] = self.taxonomia.rotulo('tamanho', row[7])
+        return valores
+
+    def _mostrar_total(self, total):
+        if self.busca_ativa:
+            texto = f"{total} RESULTADO(S) PARA \"{self.busca_ativa}\""
+            if total > self.SEARCH_LIMIT:
+                texto += f" (EXIBINDO OS {self.SEARCH_LIMIT} MAIS RELEVANTES)"
+            self.total_var.set(texto)
+        else:
+            self.total_var.set(f"TOTAL: {total} REGISTROS")
+
+    @staticmethod
+    def _consulta_fts(texto):
+        """Converte o texto digitado em uma consulta FTS5 (todos os termos, por prefixo)"""
+        termos = re.findall(r'\w+', texto)
+        if not termos:
+            return None
+        return ' '.join(f'"{termo}"*' for termo in termos)
+
+    def _agendar_busca(self, event=None):
+        """Busca enquanto o usuário digita, após uma pequena pausa"""
+        if event is not None and event.keysym == 'Return':
+            return
+        if self._busca_after_id is not None:
+            self.root.after_cancel(self._busca_after_id)
+        self._busca_after_id = self.root.after(self.SEARCH_DELAY_MS, self.buscar_defeitos)
+
+    def buscar_defeitos(self):
+        """Exibe na Treeview os defeitos que correspondem à busca, por relevância"""
+        if self._busca_after_id is not None:
+            self.root.after_cancel(self._busca_after_id)
+            self._busca_after_id = None
+
+        texto = self.busca_entry.get().strip()
+        consulta = self._consulta_fts(texto)
+        if consulta is None:
+            if self.busca_ativa:
+                self.busca_ativa = None
+                self.carregar_dados()
+            return
 
         try:
-            db_path = self.config.get('database.path', 'austral.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT id, tipo_defeito, codigo_produto, descricao,
-                       nome_vendedor, data_defeito, cor, tamanho,
-                       loja, observacoes
-                FROM defeitos
-                ORDER BY id DESC
-            """)
-            
+            colunas = ', '.join(f"d.{col}" for col in self.COLUNAS_LISTA)
+            cursor = self.db.connection().cursor()
+            cursor.execute(f"""
+                SELECT {colunas}
+                FROM defeitos_fts f
+                JOIN defeitos d ON d.id = f.rowid
+                WHERE defeitos_fts MATCH ?
+                ORDER BY f.rank
+                LIMIT ?
+            """, (consulta, self.SEARCH_LIMIT))
             rows = cursor.fetchall()
-            
-            for row in rows:
-                self.tree.insert("", "end", values=row)
-                
+
+            total = len(rows)
+            if total == self.SEARCH_LIMIT:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM defeitos_fts WHERE defeitos_fts MATCH ?",
+                    (consulta,)
+                )
+                total = cursor.fetchone()[0]
+
+            self.busca_ativa = texto
+            self.pager.show_rows(rows, total)
+            self.watcher.mark_seen()
+
+        except Exception as e:
+            self.logger.logger.error(f"Erro ao buscar defeitos: {str(e)}")
+            UIHelper.show_message("ERRO", "Erro ao buscar defeitos", "error")
+
+    def limpar_busca(self):
+        """Limpa a busca e volta à lista completa"""
+        self.busca_entry.delete(0, tk.END)
+        self.busca_ativa = None
+        self.carregar_dados()
+
+    def carregar_dados(self):
+        """Carrega a primeira página de defeitos na Treeview (ou refaz a busca ativa)"""
+        if self.busca_ativa:
+            self.buscar_defeitos()
+            return
+
+        try:
+            self.pager.reload()
+            if hasattr(self, 'watcher'):
+                self.watcher.mark_seen()
         except Exception as e:
             self.logger.logger.error(f"Erro ao carregar dados: {str(e)}")
             UIHelper.show_message(
@@ -588,9 +552,6 @@ class DefectManagerApp:
                 "Erro ao carregar dados da tabela",
                 "error"
             )
-        finally:
-            if 'conn' in locals():
-                conn.close()
 
     def adicionar_defeito(self):
         """Adiciona um novo defeito ao banco de dados"""
@@ -599,31 +560,26 @@ class DefectManagerApp:
             return
 
         try:
-            db_path = self.config.get('database.path', 'austral.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO defeitos (
-                    tipo_defeito, codigo_produto, descricao, cor, tamanho,
-                    nome_cliente, nome_vendedor, data_defeito,
-                    descricao_defeito, observacoes, loja
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                self.tipo_defeito_entry.get(),
-                self.codigo_produto_entry.get(),
-                self.descricao_entry.get(),
-                self.cor_entry.get(),
-                self.tamanho_entry.get(),
-                self.nome_cliente_entry.get(),
-                self.nome_vendedor_entry.get(),
-                datetime.now().strftime('%Y-%m-%d'),
-                self.descricao_defeito_entry.get(),
-                self.observacoes_entry.get('1.0', tk.END).strip(),
-                self.loja_entry.get()
-            ))
-            
-            conn.commit()
+            with self.db.transaction() as conn:
+                cursor = conn.execute('''
+                    INSERT INTO defeitos (
+                        origem_id, codigo_produto, descricao, cor, tamanho_id,
+                        nome_cliente, nome_vendedor, data_defeito,
+                        tipo_id, observacoes, loja
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    self.taxonomia.id_de('origem', self.tipo_defeito_entry.get()),
+                    self.codigo_produto_entry.get(),
+                    self.descricao_entry.get(),
+                    self.cor_entry.get(),
+                    self.taxonomia.id_de('tamanho', self.tamanho_entry.get()),
+                    self.nome_cliente_entry.get(),
+                    self.nome_vendedor_entry.get(),
+                    datetime.now().strftime('%Y-%m-%d'),
+                    self.taxonomia.id_de('tipo', self.descricao_defeito_entry.get()),
+                    self.observacoes_entry.get('1.0', tk.END).strip(),
+                    self.loja_entry.get()
+                ))
             
             # Registrar ação no log
             self.logger.log_action(
@@ -631,7 +587,7 @@ class DefectManagerApp:
                 f"Código: {self.codigo_produto_entry.get()}"
             )
             
-            self.carregar_dados()
+            self.pager.refresh_row(cursor.lastrowid)
             self.limpar_campos()
             
             UIHelper.show_message(
@@ -647,9 +603,6 @@ class DefectManagerApp:
                 "Erro ao adicionar defeito",
                 "error"
             )
-        finally:
-            if 'conn' in locals():
-                conn.close()
 
     def atualizar_defeito(self):
         """Atualiza um defeito existente"""
@@ -665,46 +618,41 @@ class DefectManagerApp:
             return
 
         try:
-            db_path = self.config.get('database.path', 'austral.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                UPDATE defeitos SET
-                    tipo_defeito = ?,
-                    codigo_produto = ?,
-                    descricao = ?,
-                    cor = ?,
-                    tamanho = ?,
-                    nome_cliente = ?,
-                    nome_vendedor = ?,
-                    descricao_defeito = ?,
-                    observacoes = ?,
-                    loja = ?,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (
-                self.tipo_defeito_entry.get(),
-                self.codigo_produto_entry.get(),
-                self.descricao_entry.get(),
-                self.cor_entry.get(),
-                self.tamanho_entry.get(),
-                self.nome_cliente_entry.get(),
-                self.nome_vendedor_entry.get(),
-                self.descricao_defeito_entry.get(),
-                self.observacoes_entry.get('1.0', tk.END).strip(),
-                self.loja_entry.get(),
-                self.selected_id
-            ))
-            
-            conn.commit()
+            with self.db.transaction() as conn:
+                conn.execute('''
+                    UPDATE defeitos SET
+                        origem_id = ?,
+                        codigo_produto = ?,
+                        descricao = ?,
+                        cor = ?,
+                        tamanho_id = ?,
+                        nome_cliente = ?,
+                        nome_vendedor = ?,
+                        tipo_id = ?,
+                        observacoes = ?,
+                        loja = ?,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (
+                    self.taxonomia.id_de('origem', self.tipo_defeito_entry.get()),
+                    self.codigo_produto_entry.get(),
+                    self.descricao_entry.get(),
+                    self.cor_entry.get(),
+                    self.taxonomia.id_de('tamanho', self.tamanho_entry.get()),
+                    self.nome_cliente_entry.get(),
+                    self.nome_vendedor_entry.get(),
+                    self.taxonomia.id_de('tipo', self.descricao_defeito_entry.get()),
+                    self.observacoes_entry.get('1.0', tk.END).strip(),
+                    self.loja_entry.get(),
+                    self.selected_id
+                ))
             
             self.logger.log_action(
                 "defeito_atualizado",
                 f"ID: {self.selected_id}"
             )
             
-            self.carregar_dados()
+            self.pager.refresh_row(self.selected_id)
             self.limpar_campos()
             
             UIHelper.show_message(
@@ -720,9 +668,6 @@ class DefectManagerApp:
                 "Erro ao atualizar defeito",
                 "error"
             )
-        finally:
-            if 'conn' in locals():
-                conn.close()
 
     def excluir_defeito(self):
         """Exclui um defeito do banco de dados"""
@@ -741,19 +686,17 @@ class DefectManagerApp:
             return
 
         try:
-            db_path = self.config.get('database.path', 'austral.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-
-            cursor.execute('DELETE FROM defeitos WHERE id = ?', (self.selected_id,))
-            conn.commit()
+            with self.db.transaction() as conn:
+                conn.execute('DELETE FROM defeitos WHERE id = ?', (self.selected_id,))
 
             self.logger.log_action(
                 "defeito_excluido",
                 f"ID: {self.selected_id}"
             )
 
-            self.carregar_dados()
+            self.pager.remove(self.selected_id)
+            self.selected_item = None
+            self.selected_id = None
             self.limpar_campos()
 
             UIHelper.show_message(
@@ -769,17 +712,14 @@ class DefectManagerApp:
                 "Erro ao excluir defeito",
                 "error"
             )
-        finally:
-            if 'conn' in locals():
-                conn.close()
 
     def exportar_excel(self):
-        """Exporta os dados para um arquivo Excel"""
+        """Exporta os dados para um arquivo Excel (ou CSV)"""
         try:
             # Diálogo para escolher o local de salvamento
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
-                filetypes=[("Excel files", "*.xlsx")],
+                filetypes=FILETYPES,
                 title="Salvar Arquivo Excel",
                 initialfile=f"defeitos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             )
@@ -787,66 +727,126 @@ class DefectManagerApp:
             if not file_path:
                 return
 
-            # Carregar dados do banco
-            db_path = self.config.get('database.path', 'austral.db')
-            conn = sqlite3.connect(db_path)
-            
             query = """
                 SELECT 
-                    tipo_defeito as 'TIPO DE DEFEITO',
-                    codigo_produto as 'CÓDIGO DO PRODUTO',
-                    descricao as 'DESCRIÇÃO',
-                    cor as 'COR',
-                    tamanho as 'TAMANHO',
-                    nome_cliente as 'NOME DO CLIENTE',
-                    nome_vendedor as 'NOME DO VENDEDOR',
-                    data_defeito as 'DATA DO DEFEITO',
-                    descricao_defeito as 'DESCRIÇÃO DO DEFEITO',
-                    observacoes as 'OBSERVAÇÕES',
-                    loja as 'LOJA',
-                    created_at as 'DATA DE CRIAÇÃO',
-                    updated_at as 'ÚLTIMA ATUALIZAÇÃO'
-                FROM defeitos
-                ORDER BY id DESC
+                    o.nome as 'TIPO DE DEFEITO',
+                    d.codigo_produto as 'CÓDIGO DO PRODUTO',
+                    d.descricao as 'DESCRIÇÃO',
+                    d.cor as 'COR',
+                    tm.nome as 'TAMANHO',
+                    d.nome_cliente as 'NOME DO CLIENTE',
+                    d.nome_vendedor as 'NOME DO VENDEDOR',
+                    d.data_defeito as 'DATA DO DEFEITO',
+                    t.rotulo as 'DESCRIÇÃO DO DEFEITO',
+                    g.nome as 'GRUPO DO DEFEITO',
+                    d.observacoes as 'OBSERVAÇÕES',
+                    d.loja as 'LOJA',
+                    d.created_at as 'DATA DE CRIAÇÃO',
+                    d.updated_at as 'ÚLTIMA ATUALIZAÇÃO'
+                FROM defeitos d
+                LEFT JOIN defeito_origens o ON o.id = d.origem_id
+                LEFT JOIN tamanhos tm ON tm.id = d.tamanho_id
+                LEFT JOIN defeito_tipos t ON t.id = d.tipo_id
+                LEFT JOIN defeito_grupos g ON g.id = t.grupo_id
+                ORDER BY d.id DESC
             """
             
-            df = pd.read_sql_query(query, conn)
+            def exportar(job):
+                # Roda no pool de tarefas, com a conexão da própria thread
+                conn = self.db.connection()
+                total = conn.execute("SELECT COUNT(*) FROM defeitos").fetchone()[0]
+                try:
+                    # Grava em blocos direto do cursor, sem carregar a tabela inteira
+                    return export_query(
+                        conn, query, file_path, sheet_name='DEFEITOS',
+                        progress=lambda n: job.report(n, total, f"{n} de {total} registros exportados"),
+                        cancelled=lambda: job.cancelled
+                    )
+                except ExportCancelled:
+                    raise JobCancelled()
+
+            def concluido(linhas):
+                self.logger.log_action(
+                    "dados_exportados",
+                    f"Arquivo: {file_path}"
+                )
+                UIHelper.show_message(
+                    "Sucesso",
+                    f"Dados exportados com sucesso para:\n{file_path}",
+                    "info"
+                )
 
-            # Configurar o writer do Excel
-            writer = pd.ExcelWriter(file_path, engine='openpyxl')
+            def falhou(e):
+                self.logger.logger.error(f"Erro ao exportar dados: {str(e)}")
+                UIHelper.show_message(
+                    "ERRO",
+                    f"Erro ao exportar dados:\n{str(e)}",
+                    "error"
+                )
+
+            JobRunner().run_with_progress(
+                self.root, "Exportando defeitos", exportar,
+                on_done=concluido, on_error=falhou
+            )
+            
+        except Exception as e:
+            self.logger.logger.error(f"Erro ao exportar dados: {str(e)}")
+            UIHelper.show_message(
+                "ERRO",
+                f"Erro ao exportar dados:\n{str(e)}",
+                "error"
+            )
 
-            # Exportar para Excel com formatação
-            df.to_excel(writer, index=False, sheet_name='DEFEITOS')
+    def importar_arquivo(self):
+        """Importa defeitos de uma planilha ou CSV, em segundo plano"""
+        file_path = filedialog.askopenfilename(
+            title="Importar Defeitos",
+            filetypes=importer.FILETYPES
+        )
+        if not file_path:
+            return
 
-            # Ajustar larguras das colunas
-            worksheet = writer.sheets['DEFEITOS']
-            for idx, col in enumerate(df.columns):
-                max_length = max(df[col].astype(str).apply(len).max(), len(col))
-                worksheet.column_dimensions[chr(65 + idx)].width = max_length + 2
+        def importar(job):
+            try:
+                return importer.import_file(
+                    'defeitos', file_path,
+                    progress=lambda ok, rej: job.report(ok, None, f"{ok} importados, {rej} rejeitados"),
+                    cancelled=lambda: job.cancelled
+                )
+            except importer.ImportCancelled:
+                raise JobCancelled()
 
-            writer.close()
-            
+        def concluido(resultado):
             self.logger.log_action(
-                "dados_exportados",
-                f"Arquivo: {file_path}"
+                "defeitos_importados",
+                f"Arquivo: {file_path} | Importados: {resultado.importados} | "
+                f"Rejeitados: {resultado.rejeitados}"
             )
-            
+            self.carregar_dados()
+            mensagem = f"{resultado.importados} defeito(s) importado(s)."
+            if resultado.rejeitados:
+                mensagem += (
+                    f"\n{resultado.rejeitados} linha(s) rejeitada(s), "
+                    f"detalhadas em:\n{resultado.arquivo_rejeitados}"
+                )
             UIHelper.show_message(
-                "Sucesso",
-                f"Dados exportados com sucesso para:\n{file_path}",
-                "info"
+                "Importação concluída",
+                mensagem,
+                "warning" if resultado.rejeitados else "info"
             )
-            
-        except Exception as e:
-            self.logger.logger.error(f"Erro ao exportar dados: {str(e)}")
+
+        def falhou(e):
+            self.logger.logger.error(f"Erro ao importar defeitos: {str(e)}")
             UIHelper.show_message(
                 "ERRO",
-                f"Erro ao exportar dados:\n{str(e)}",
+                f"Erro ao importar defeitos:\n{str(e)}",
                 "error"
             )
-        finally:
-            if 'conn' in locals():
-                conn.close()
+
+        JobRunner().run_with_progress(
+            self.root, "Importando defeitos", importar,
+            on_done=concluido, on_error=falhou
+        )
 
     def _validar_campos_obrigatorios(self):
         """Valida os campos obrigatórios do formulário"""
@@ -858,17 +858,8 @@ class DefectManagerApp:
             'DESCRIÇÃO DEFEITO': self.descricao_defeito_entry.get()
         }
 
-        # Opções inválidas que devem ser ignoradas
-        opcoes_invalidas = [
-            "SELECIONE A ORIGEM", "SELECIONE O TAMANHO", "SELECIONE A LOJA", 
-            "SELECIONE UM TIPO DE DEFEITO"
-        ]
-
-        # Filtra os campos que estão vazios ou têm opções inválidas
-        campos_vazios = [
-            campo for campo, valor in campos_obrigatorios.items()
-            if not valor or valor in opcoes_invalidas
-        ]
+        # Campos vazios ou ainda com a opção "SELECIONE ..."
+        campos_vazios = campos_faltando(campos_obrigatorios)
 
         if campos_vazios:
             UIHelper.show_message(
@@ -13,6 +13,7 @@ from lojas import lojas
 from utils import setup_window_icon
 from utils import UIHelper
 from utils import FONT_LABEL, FONT_ENTRY
+from jobs import JobRunner
 
 import sys
 from pathlib import Path
@@ -40,6 +41,9 @@ def get_resource_path(filename: str) -> str:
 
 
 class EtiquetaClientesApp:
+    # Tempo máximo de espera pela API ViaCEP, em segundos
+    CEP_TIMEOUT = 10
+
     def __init__(self, root):
         self.root = root
         self.root.title("SISTEMA AUSTRAL - ETIQUETA ENVIO CLIENTES")
@@ -287,19 +291,30 @@ class EtiquetaClientesApp:
         return imagem
 
     def consultar_cep_evento(self, event):
-        """Consulta o CEP quando o campo perde o foco"""
+        """Consulta o CEP em segundo plano quando o campo perde o foco"""
         cep = self.cep_entry.get().replace('-', '').strip()
         if len(cep) == 8:
-            self.endereco_completo = self.consultar_cep(cep)
-            if self.endereco_completo:
-                self.atualizar_preview()
-            else:
-                self.atualizar_preview("CEP não encontrado")
+            self.atualizar_preview("Consultando CEP...")
+
+            def concluido(endereco):
+                # Ignora a resposta se o CEP foi alterado durante a consulta
+                if self.cep_entry.get().replace('-', '').strip() != cep:
+                    return
+                self.endereco_completo = endereco
+                if self.endereco_completo:
+                    self.atualizar_preview()
+                else:
+                    self.atualizar_preview("CEP não encontrado")
+
+            JobRunner().submit(
+                self.root, "consulta_cep", lambda job: self.consultar_cep(cep),
+                on_done=concluido
+            )
 
     def consultar_cep(self, cep):
         """Consulta o CEP usando a API ViaCEP"""
         try:
-            response = requests.get(f'https://viacep.com.br/ws/{cep}/json/')
+            response = requests.get(f'https://viacep.com.br/ws/{cep}/json/', timeout=self.CEP_TIMEOUT)
             response.raise_for_status()
             dados = response.json()
             return None if 'erro' in dados else dados
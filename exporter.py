@@ -0,0 +1,179 @@
+"""
+Exportação de dados do sistema Austral.
+Grava linhas em fluxo, em blocos lidos do cursor, numa planilha openpyxl
+em modo write-only ou em CSV (opcionalmente compactado com gzip), sem
+carregar o resultado inteiro na memória.
+"""
+
+import csv
+import gzip
+import logging
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger('austral.exporter')
+
+# Linhas lidas do cursor por vez
+CHUNK_SIZE = 1000
+# Linhas usadas para estimar a largura das colunas do Excel
+WIDTH_SAMPLE_ROWS = 1000
+MAX_COLUMN_WIDTH = 80
+# Separador usado pelo Excel em português
+CSV_DELIMITER = ';'
+
+FILETYPES = [
+    ("Excel files", "*.xlsx"),
+    ("CSV", "*.csv"),
+    ("CSV compactado", "*.csv.gz")
+]
+
+
+class ExportError(Exception):
+    pass
+
+
+class ExportCancelled(ExportError):
+    pass
+
+
+def iter_cursor(cursor, chunk_size: int = CHUNK_SIZE) -> Iterator[Sequence[Any]]:
+    """Percorre o resultado do cursor em blocos de fetchmany"""
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def export_query(conn, sql: str, path: str, params: Sequence[Any] = (),
+                 headers: Optional[Sequence[str]] = None, sheet_name: str = 'DADOS',
+                 progress: Optional[Callable[[int], None]] = None,
+                 cancelled: Optional[Callable[[], bool]] = None) -> int:
+    """
+    Exporta o resultado de uma consulta
+
+    Args:
+        conn: Conexão SQLite
+        sql: Consulta a exportar
+        path: Arquivo de destino (.xlsx, .csv ou .csv.gz)
+        params: Parâmetros da consulta
+        headers: Cabeçalhos; por padrão os nomes das colunas da consulta
+        sheet_name: Nome da planilha (apenas Excel)
+        progress: Chamada a cada bloco com o total de linhas gravadas
+        cancelled: Consultada a cada bloco; retornando True a exportação é interrompida
+
+    Returns:
+        int: Linhas exportadas
+    """
+    cursor = conn.cursor()
+    cursor.arraysize = CHUNK_SIZE
+    cursor.execute(sql, params)
+    if headers is None:
+        headers = [col[0] for col in cursor.description]
+    return export_rows(iter_cursor(cursor), headers, path, sheet_name, progress, cancelled)
+
+
+def export_rows(rows: Iterable[Sequence[Any]], headers: Sequence[str], path: str,
+                sheet_name: str = 'DADOS',
+                progress: Optional[Callable[[int], None]] = None,
+                cancelled: Optional[Callable[[], bool]] = None) -> int:
+    """Exporta linhas já obtidas (qualquer iterável); o formato vem da extensão de path"""
+    target = Path(path)
+    name = target.name.lower()
+    # Grava num arquivo temporário para não deixar um arquivo pela metade
+    partial = target.with_name(target.name + '.part')
+
+    try:
+        if name.endswith('.csv.gz'):
+            with gzip.open(partial, 'wt', compresslevel=6, encoding='utf-8-sig', newline='') as f:
+                count = _write_csv(f, rows, headers, progress, cancelled)
+        elif name.endswith('.csv'):
+            with open(partial, 'w', encoding='utf-8-sig', newline='') as f:
+                count = _write_csv(f, rows, headers, progress, cancelled)
+        else:
+            count = _write_xlsx(partial, rows, headers, sheet_name, progress, cancelled)
+        partial.replace(target)
+        return count
+    except ExportCancelled:
+        partial.unlink(missing_ok=True)
+        raise
+    except Exception as e:
+        partial.unlink(missing_ok=True)
+        logger.error(f"Erro ao exportar {target.name}: {e}")
+        raise ExportError(str(e))
+
+
+def _check(count: int, progress, cancelled) -> None:
+    if count % CHUNK_SIZE:
+        return
+    if cancelled and cancelled():
+        raise ExportCancelled("Exportação cancelada")
+    if progress:
+        progress(count)
+
+
+def _write_csv(f, rows, headers, progress, cancelled) -> int:
+    writer = csv.writer(f, delimiter=CSV_DELIMITER)
+    writer.writerow(headers)
+    count = 0
+    for row in rows:
+        writer.writerow(['' if value is None else value for value in row])
+        count += 1
+        _check(count, progress, cancelled)
+    if progress:
+        progress(count)
+    return count
+
+
+def _column_widths(headers: Sequence[str], sample: List[Sequence[Any]]) -> List[int]:
+    """Largura de cada coluna: maior texto entre o cabeçalho e a amostra, + 2"""
+    widths = [len(str(h)) for h in headers]
+    for row in sample:
+        for idx, value in enumerate(row):
+            if value is not None:
+                widths[idx] = max(widths[idx], len(str(value)))
+    return [min(w, MAX_COLUMN_WIDTH) + 2 for w in widths]
+
+
+def _write_xlsx(path: Path, rows, headers, sheet_name, progress, cancelled) -> int:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+
+    # No modo write-only as larguras precisam ser definidas antes das linhas:
+    # guarda apenas as primeiras WIDTH_SAMPLE_ROWS para estimá-las
+    rows = iter(rows)
+    sample = []
+    for row in rows:
+        sample.append(row)
+        if len(sample) >= WIDTH_SAMPLE_ROWS:
+            break
+    for idx, width in enumerate(_column_widths(headers, sample), start=1):
+        sheet.column_dimensions[get_column_letter(idx)].width = width
+
+    # Cabeçalho no mesmo estilo usado pelo pandas
+    thin = Side(style='thin')
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(sheet, value=header)
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(horizontal='center', vertical='top')
+        cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        header_cells.append(cell)
+    sheet.append(header_cells)
+
+    count = 0
+    for source in (sample, rows):
+        for row in source:
+            sheet.append(list(row))
+            count += 1
+            _check(count, progress, cancelled)
+
+    workbook.save(path)
+    if progress:
+        progress(count)
+    return count
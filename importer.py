@@ -0,0 +1,394 @@
+"""
+Importação em lote de defeitos e pedidos SinOMS para o sistema Austral.
+Lê planilhas openpyxl em modo read-only ou CSV (opcionalmente compactado com
+gzip) linha a linha, valida cada registro com as mesmas regras dos
+formulários e grava em blocos de executemany numa única transação. Linhas
+rejeitadas vão para um CSV ao lado do arquivo importado, com o motivo.
+"""
+
+import csv
+import gzip
+import logging
+import unicodedata
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import ConfigManager
+from database import DatabaseManager
+from exporter import CSV_DELIMITER
+from taxonomy import Taxonomy, campos_faltando
+
+logger = logging.getLogger('austral.importer')
+
+# Linhas gravadas por executemany
+BATCH_SIZE = 5000
+
+FILETYPES = [
+    ("Planilhas e CSV", "*.xlsx *.csv *.csv.gz"),
+    ("Excel files", "*.xlsx"),
+    ("CSV", "*.csv"),
+    ("CSV compactado", "*.csv.gz")
+]
+
+
+class ImporterError(Exception):
+    pass
+
+
+class ImportCancelled(ImporterError):
+    pass
+
+
+class RowRejected(Exception):
+    """Linha inválida; a mensagem é o motivo gravado no arquivo de rejeitadas"""
+
+
+@dataclass
+class ImportResult:
+    importados: int
+    rejeitados: int
+    arquivo_rejeitados: Optional[str] = None
+
+
+def _normalizar(texto: Any) -> str:
+    """Cabeçalho em maiúsculas, sem acentos, com '_' e espaços repetidos como um espaço"""
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.replace('_', ' ').upper().split())
+
+
+def _texto(valor: Any) -> str:
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        # Códigos numéricos lidos do Excel (123456.0)
+        return str(int(valor))
+    return str(valor).strip()
+
+
+def _data(valor: Any, formato: str) -> Optional[str]:
+    """Converte uma data dd/mm/aaaa, aaaa-mm-dd ou do Excel para formato; None se vazia"""
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, (datetime, date)):
+        return valor.strftime(formato)
+    texto = _texto(valor)
+    for entrada in ('%d/%m/%Y', '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d/%m/%y'):
+        try:
+            return datetime.strptime(texto, entrada).strftime(formato)
+        except ValueError:
+            continue
+    raise RowRejected(f"DATA INVÁLIDA: {texto}")
+
+
+# Leitura
+
+def read_rows(path: str) -> Tuple[List[str], Iterator[Sequence[Any]]]:
+    """
+    Abre o arquivo para leitura em fluxo
+
+    Returns:
+        Tuple: Cabeçalhos da primeira linha e iterador das linhas seguintes
+    """
+    name = Path(path).name.lower()
+    if name.endswith('.xlsx'):
+        return _read_xlsx(path)
+    if name.endswith('.csv.gz'):
+        return _read_csv(gzip.open(path, 'rt', encoding='utf-8-sig', newline=''))
+    if name.endswith('.csv'):
+        return _read_csv(open(path, 'r', encoding='utf-8-sig', newline=''))
+    raise ImporterError(f"Formato não suportado: {Path(path).name}")
+
+
+def _read_csv(f) -> Tuple[List[str], Iterator[Sequence[Any]]]:
+    primeira = f.readline()
+    # Planilhas salvas pelo Excel em português usam ';'; outras, ','
+    delimitador = CSV_DELIMITER if primeira.count(CSV_DELIMITER) >= primeira.count(',') else ','
+    headers = next(csv.reader([primeira], delimiter=delimitador), [])
+
+    def linhas():
+        with f:
+            yield from csv.reader(f, delimiter=delimitador)
+
+    return headers, linhas()
+
+
+def _read_xlsx(path: str) -> Tuple[List[str], Iterator[Sequence[Any]]]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    rows = workbook.worksheets[0].iter_rows(values_only=True)
+    headers = [_texto(h) for h in next(rows, ())]
+
+    def linhas():
+        try:
+            yield from rows
+        finally:
+            workbook.close()
+
+    return headers, linhas()
+
+
+# Especificações por tabela
+
+class _Spec(ABC):
+    """Como converter uma linha do arquivo num registro da tabela"""
+
+    # Campo -> cabeçalhos aceitos (já normalizados)
+    ALIASES: Dict[str, Tuple[str, ...]] = {}
+    OBRIGATORIOS: Tuple[str, ...] = ()
+    TABELA = ''
+    # Colunas gravadas, na ordem da tupla retornada por converter
+    COLUNAS: Tuple[str, ...] = ()
+
+    def __init__(self, headers: Sequence[str]):
+        normalizados = [_normalizar(h) for h in headers]
+        self.indices: Dict[str, int] = {}
+        for campo, aliases in self.ALIASES.items():
+            for alias in aliases:
+                if alias in normalizados:
+                    self.indices[campo] = normalizados.index(alias)
+                    break
+        faltando = [campo for campo in self.OBRIGATORIOS if campo not in self.indices]
+        if faltando:
+            raise ImporterError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+
+    def campos(self, linha: Sequence[Any]) -> Dict[str, Any]:
+        return {
+            campo: linha[idx] if idx < len(linha) else None
+            for campo, idx in self.indices.items()
+        }
+
+    def begin(self, conn) -> None:
+        """Chamada já dentro da transação, antes da primeira linha"""
+
+    @abstractmethod
+    def converter(self, linha: Sequence[Any]) -> Tuple:
+        """Registro a gravar, na ordem de COLUNAS"""
+
+
+class _DefeitosSpec(_Spec):
+    ALIASES = {
+        'origem': ('ORIGEM DEFEITO', 'ORIGEM', 'TIPO DE DEFEITO', 'TIPO DEFEITO'),
+        'codigo_produto': ('CODIGO DO PRODUTO', 'CODIGO PRODUTO', 'CODIGO'),
+        'descricao': ('NOME PRODUTO', 'DESCRICAO'),
+        'cor': ('COR',),
+        'tamanho': ('TAMANHO', 'TAM'),
+        'nome_cliente': ('NOME DO CLIENTE', 'NOME CLIENTE', 'CLIENTE'),
+        'nome_vendedor': ('NOME DO VENDEDOR', 'NOME VENDEDOR', 'VENDEDOR'),
+        'data_defeito': ('DATA DO DEFEITO', 'DATA DEFEITO', 'DATA'),
+        'tipo': ('DESCRICAO DO DEFEITO', 'DESCRICAO DEFEITO'),
+        'observacoes': ('OBSERVACOES',),
+        'loja': ('LOJA', 'FILIAL'),
+    }
+    OBRIGATORIOS = ('origem', 'codigo_produto', 'tamanho', 'nome_vendedor', 'tipo')
+    TABELA = 'defeitos'
+    COLUNAS = (
+        'origem_id', 'codigo_produto', 'descricao', 'cor', 'tamanho_id',
+        'nome_cliente', 'nome_vendedor', 'data_defeito',
+        'tipo_id', 'observacoes', 'loja'
+    )
+
+    def begin(self, conn) -> None:
+        self.taxonomia = Taxonomy()
+        self.hoje = datetime.now().strftime('%Y-%m-%d')
+
+    def converter(self, linha: Sequence[Any]) -> Tuple:
+        brutos = self.campos(linha)
+        campos = {campo: _texto(valor) for campo, valor in brutos.items()}
+
+        # Mesma regra de DefectManagerApp._validar_campos_obrigatorios
+        faltando = campos_faltando({
+            'ORIGEM DEFEITO': campos['origem'],
+            'CÓDIGO PRODUTO': campos['codigo_produto'],
+            'TAMANHO': campos['tamanho'],
+            'NOME DO VENDEDOR': campos['nome_vendedor'],
+            'DESCRIÇÃO DEFEITO': campos['tipo']
+        })
+        if faltando:
+            raise RowRejected(f"CAMPOS OBRIGATÓRIOS: {', '.join(faltando)}")
+
+        chaves = {}
+        for categoria, campo, nome in (('origem', 'origem', 'ORIGEM'),
+                                       ('tamanho', 'tamanho', 'TAMANHO'),
+                                       ('tipo', 'tipo', 'TIPO DE DEFEITO')):
+            chaves[categoria] = self.taxonomia.id_de(categoria, campos[campo].upper())
+            if chaves[categoria] is None:
+                raise RowRejected(f"{nome} DESCONHECIDO: {campos[campo]}")
+
+        return (
+            chaves['origem'],
+            campos['codigo_produto'],
+            campos.get('descricao', ''),
+            campos.get('cor', ''),
+            chaves['tamanho'],
+            campos.get('nome_cliente', ''),
+            campos['nome_vendedor'],
+            _data(brutos.get('data_defeito'), '%Y-%m-%d') or self.hoje,
+            chaves['tipo'],
+            campos.get('observacoes', ''),
+            campos.get('loja', '')
+        )
+
+
+class _PedidosSpec(_Spec):
+    ALIASES = {
+        'data_faturamento': ('DATA FATURAMENTO', 'DATA'),
+        'responsavel': ('RESPONSAVEL FATURAMENTO', 'RESPONSAVEL'),
+        'numero_pedido': ('NUMERO PEDIDO', 'NUMERO DO PEDIDO', 'PEDIDO'),
+        'status': ('STATUS',),
+        'data_envio': ('DATA ENVIO', 'ENVIO'),
+        'responsavel_envio': ('RESPONSAVEL ENVIO',),
+        'loja': ('LOJA', 'FILIAL'),
+    }
+    OBRIGATORIOS = ('responsavel', 'numero_pedido')
+    TABELA = 'pedidos'
+    COLUNAS = (
+        'data_faturamento', 'responsavel_faturamento', 'numero_pedido',
+        'status', 'data_envio', 'responsavel_envio', 'loja'
+    )
+
+    def begin(self, conn) -> None:
+        # Lido dentro da transação de escrita: nenhum outro terminal grava até o commit
+        self.existentes = {row[0] for row in conn.execute('SELECT numero_pedido FROM pedidos')}
+        self.hoje = datetime.now().strftime('%Y-%m-%d')
+        self.loja = ConfigManager().get('terminal.loja', '')
+
+    def converter(self, linha: Sequence[Any]) -> Tuple:
+        brutos = self.campos(linha)
+        campos = {campo: _texto(valor).upper() for campo, valor in brutos.items()}
+
+        # Mesma regra de PedidoSinOMSApp.adicionar_pedido
+        if not campos['responsavel'] or not campos['numero_pedido']:
+            raise RowRejected("CAMPOS OBRIGATÓRIOS: RESPONSÁVEL, NÚMERO DO PEDIDO")
+        if campos['numero_pedido'] in self.existentes:
+            raise RowRejected("NÚMERO DE PEDIDO JÁ EXISTE")
+        self.existentes.add(campos['numero_pedido'])
+
+        data_envio = _data(brutos.get('data_envio'), '%Y-%m-%d')
+        status = campos.get('status') or ('ENVIADO' if data_envio else 'FATURADO')
+        return (
+            _data(brutos.get('data_faturamento'), '%Y-%m-%d') or self.hoje,
+            campos['responsavel'],
+            campos['numero_pedido'],
+            # Mesma grafia gravada pela interface
+            status.capitalize(),
+            data_envio,
+            campos.get('responsavel_envio') or None,
+            campos.get('loja') or self.loja or None
+        )
+
+
+SPECS = {
+    'defeitos': _DefeitosSpec,
+    'pedidos': _PedidosSpec,
+}
+
+
+def rejects_path_for(path: str) -> str:
+    """Arquivo de rejeitadas ao lado do importado: <nome>_rejeitados_<data>.csv"""
+    origem = Path(path)
+    base = origem.name
+    for sufixo in ('.csv.gz', '.csv', '.xlsx'):
+        if base.lower().endswith(sufixo):
+            base = base[:-len(sufixo)]
+            break
+    carimbo = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return str(origem.with_name(f"{base}_rejeitados_{carimbo}.csv"))
+
+
+def import_file(tabela: str, path: str, rejects_path: Optional[str] = None,
+                progress: Optional[Callable[[int, int], None]] = None,
+                cancelled: Optional[Callable[[], bool]] = None) -> ImportResult:
+    """
+    Importa um arquivo para defeitos ou pedidos
+
+    Args:
+        tabela: 'defeitos' ou 'pedidos'
+        path: Arquivo de origem (.xlsx, .csv ou .csv.gz) com cabeçalho na primeira linha
+        rejects_path: CSV das linhas rejeitadas; por padrão ao lado do arquivo de origem
+        progress: Chamada a cada bloco com (importadas, rejeitadas)
+        cancelled: Consultada a cada bloco; retornando True nada é gravado
+
+    Returns:
+        ImportResult: Totais e o arquivo de rejeitadas (None se não houve rejeições)
+    """
+    if tabela not in SPECS:
+        raise ImporterError(f"Tabela não suportada: {tabela}")
+
+    headers, linhas = read_rows(path)
+    spec = SPECS[tabela](headers)
+    rejects_path = rejects_path or rejects_path_for(path)
+
+    importados = 0
+    rejeitados = 0
+    rejects_file = None
+    rejects_writer = None
+    lote: List[Tuple] = []
+
+    # Cada INSERT direto em defeitos dispara o trigger do FTS5 como uma instrução
+    # própria, e o FTS5 grava um segmento novo a cada uma. Os blocos passam por
+    # uma tabela temporária (sem triggers) e entram com um único INSERT ... SELECT.
+    colunas = ', '.join(spec.COLUNAS)
+    temporaria = f"importacao_{tabela}"
+
+    def gravar(conn) -> None:
+        conn.executemany(
+            f"INSERT INTO temp.{temporaria} VALUES ({', '.join('?' * len(spec.COLUNAS))})",
+            lote
+        )
+        conn.execute(f"INSERT INTO {spec.TABELA} ({colunas}) SELECT {colunas} FROM temp.{temporaria}")
+        conn.execute(f"DELETE FROM temp.{temporaria}")
+
+    try:
+        with DatabaseManager().transaction() as conn:
+            conn.execute(f"DROP TABLE IF EXISTS temp.{temporaria}")
+            conn.execute(f"CREATE TEMP TABLE {temporaria} AS SELECT {colunas} FROM {spec.TABELA} WHERE 0")
+            spec.begin(conn)
+            for numero, linha in enumerate(linhas, start=2):
+                if not any(_texto(valor) for valor in linha):
+                    continue
+                try:
+                    lote.append(spec.converter(linha))
+                except RowRejected as motivo:
+                    if rejects_writer is None:
+                        rejects_file = open(rejects_path, 'w', encoding='utf-8-sig', newline='')
+                        rejects_writer = csv.writer(rejects_file, delimiter=CSV_DELIMITER)
+                        rejects_writer.writerow(['LINHA', 'MOTIVO', *headers])
+                    rejects_writer.writerow([numero, str(motivo), *('' if v is None else v for v in linha)])
+                    rejeitados += 1
+
+                if len(lote) >= BATCH_SIZE:
+                    if cancelled and cancelled():
+                        raise ImportCancelled("Importação cancelada")
+                    gravar(conn)
+                    importados += len(lote)
+                    lote.clear()
+                    if progress:
+                        progress(importados, rejeitados)
+
+            if cancelled and cancelled():
+                raise ImportCancelled("Importação cancelada")
+            if lote:
+                gravar(conn)
+                importados += len(lote)
+            conn.execute(f"DROP TABLE temp.{temporaria}")
+    except Exception as e:
+        # Nada foi gravado: o arquivo de rejeitadas não vale mais
+        if rejects_file is not None:
+            rejects_file.close()
+            Path(rejects_path).unlink(missing_ok=True)
+        if isinstance(e, ImporterError):
+            raise
+        logger.error(f"Erro ao importar {Path(path).name}: {e}")
+        raise ImporterError(str(e))
+    if rejects_file is not None:
+        rejects_file.close()
+
+    if progress:
+        progress(importados, rejeitados)
+    logger.info(f"{Path(path).name}: {importados} linhas importadas em {tabela}, {rejeitados} rejeitadas")
+    return ImportResult(importados, rejeitados, rejects_path if rejeitados else None)
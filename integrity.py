@@ -0,0 +1,182 @@
+"""
+Verificação de integridade do banco de dados do sistema Austral.
+As verificações rodam em um processo separado de baixa prioridade, para
+que um PRAGMA integrity_check longo não congele a interface.
+"""
+
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import ConfigManager
+
+logger = logging.getLogger('austral.integrity')
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _lower_priority() -> None:
+    """Reduz a prioridade do processo de verificação"""
+    try:
+        if os.name == 'nt':
+            import ctypes
+            BELOW_NORMAL_PRIORITY_CLASS = 0x00004000
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), BELOW_NORMAL_PRIORITY_CLASS)
+        else:
+            os.nice(10)
+    except Exception:
+        pass
+
+
+def check_database(path: str, quick: bool = True) -> Dict[str, Any]:
+    """
+    Executa quick_check ou integrity_check sobre um banco ou snapshot .gz.
+    Roda no processo verificador; também pode ser chamada diretamente.
+
+    Args:
+        path: Caminho do banco (.db) ou do backup compactado (.db.gz)
+        quick: Usa PRAGMA quick_check (mais rápido) em vez de integrity_check
+
+    Returns:
+        Dict: {'arquivo', 'ok', 'mensagens', 'verificado_em', 'tipo'}
+    """
+    temp_dir = None
+    target = path
+    try:
+        if str(path).endswith('.gz'):
+            temp_dir = tempfile.mkdtemp(prefix='austral_verify_')
+            target = os.path.join(temp_dir, 'snapshot.db')
+            with gzip.open(path, 'rb') as f_in, open(target, 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out, length=1024 * 1024)
+
+        pragma = 'quick_check' if quick else 'integrity_check'
+        uri = Path(target).resolve().as_uri() + '?mode=ro'
+        conn = sqlite3.connect(uri, uri=True)
+        try:
+            mensagens = [row[0] for row in conn.execute(f'PRAGMA {pragma}')]
+        finally:
+            conn.close()
+        ok = mensagens == ['ok']
+    except (sqlite3.DatabaseError, OSError, EOFError) as e:
+        mensagens = [str(e)]
+        ok = False
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return {
+        'arquivo': str(path),
+        'ok': ok,
+        'mensagens': mensagens[:20],
+        'verificado_em': datetime.now().isoformat(timespec='seconds'),
+        'tipo': 'quick_check' if quick else 'integrity_check'
+    }
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=1, initializer=_lower_priority)
+        return _executor
+
+
+def verify_async(path: str, quick: bool = True) -> Future:
+    """Agenda a verificação no processo verificador e retorna um Future"""
+    return _get_executor().submit(check_database, str(path), quick)
+
+
+def shutdown() -> None:
+    """Encerra o processo verificador"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+class IntegrityMonitor:
+    """Verificação periódica do banco em uso e do backup mais recente"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.config = ConfigManager()
+            self._stop = threading.Event()
+            self._thread: Optional[threading.Thread] = None
+            self._lock = threading.Lock()
+            self._alerts: List[Dict[str, Any]] = []
+            self.last_results: List[Dict[str, Any]] = []
+            self.initialized = True
+
+    def run_once(self) -> List[Dict[str, Any]]:
+        """Verifica o banco em uso (quick_check) e o backup mais recente (integrity_check)"""
+        from backup import BackupService
+
+        targets = [(self.config.get('database.path', 'austral.db'), True)]
+        snapshots = BackupService().list_snapshots()
+        if snapshots:
+            targets.append((str(snapshots[0]['caminho']), False))
+
+        results = []
+        for path, quick in targets:
+            if not Path(path).exists():
+                continue
+            result = verify_async(path, quick).result()
+            results.append(result)
+            if result['ok']:
+                logger.info(f"Integridade OK: {path}")
+            else:
+                logger.error(f"Falha de integridade em {path}: {'; '.join(result['mensagens'])}")
+                with self._lock:
+                    self._alerts.append(result)
+
+        self.last_results = results
+        return results
+
+    def pending_alerts(self) -> List[Dict[str, Any]]:
+        """Retorna (e limpa) as falhas encontradas desde a última consulta"""
+        with self._lock:
+            alerts, self._alerts = self._alerts, []
+        return alerts
+
+    def start(self) -> None:
+        """Inicia as verificações periódicas (database.verify_interval_hours)"""
+        interval_hours = float(self.config.get('database.verify_interval_hours', 24))
+        if interval_hours <= 0:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def loop():
+            # Aguarda um pouco após a abertura para não competir com a inicialização
+            if self._stop.wait(300):
+                return
+            while not self._stop.is_set():
+                try:
+                    self.run_once()
+                except Exception as e:
+                    logger.error(f"Erro na verificação de integridade: {e}")
+                self._stop.wait(interval_hours * 3600)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name='austral-integrity', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -12,8 +12,9 @@ import csv
 import os
 from typing import Dict, List
 from config import ConfigManager
-from logger import AustralLogger, log_action
+from logger import AustralLogger, log_action, SCAN_LOG_AGGREGATE_S
 from utils import ThemeManager, UIHelper, FONT_TITLE, FONT_LABEL
+from jobs import JobRunner
 
 class InventoryApp:
     def __init__(self, window):
@@ -216,7 +217,7 @@ class InventoryApp:
         )
         self.totais_var.set(f"Total de itens: {total_geral}")
 
-    @log_action("registrar_codigo_inventario")
+    @log_action("registrar_codigo_inventario", aggregate=SCAN_LOG_AGGREGATE_S)
     def registrar_codigo(self, event=None):
         """Registra um código no inventário"""
         codigo = self.codigo.get().strip()
@@ -294,73 +295,87 @@ class InventoryApp:
             return
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        try:
-            # Arquivo detalhado
-            caminho_detalhado = os.path.join(
-                diretorio,
-                f'inventario_{timestamp}_detalhado.csv'
-            )
-            with open(caminho_detalhado, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Local', 'Código', 'Quantidade'])
-                for local in self.inventario:
-                    for codigo, qtd in self.inventario[local].items():
-                        writer.writerow([local.upper(), codigo, qtd])
-
-            # Arquivo consolidado
-            caminho_consolidado = os.path.join(
-                diretorio,
-                f'inventario_{timestamp}_consolidado.csv'
-            )
-            with open(caminho_consolidado, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Código', 'Quantidade Total'])
-                
-                codigos_totais = {}
-                for local in self.inventario:
-                    for codigo, qtd in self.inventario[local].items():
-                        codigos_totais[codigo] = codigos_totais.get(codigo, 0) + qtd
-                
-                for codigo, qtd in sorted(codigos_totais.items()):
-                    writer.writerow([codigo, qtd])
-
-            # Lista completa (agora em CSV)
-            caminho_lista = os.path.join(
-                diretorio,
-                f'inventario_{timestamp}_lista_completa.csv'
-            )
-            with open(caminho_lista, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Código'])  # Cabeçalho
-                for local in self.inventario:
-                    for codigo, qtd in self.inventario[local].items():
-                        # Repete o código conforme a quantidade
-                        for _ in range(qtd):
-                            writer.writerow([codigo])
-
-            # Mostra resumo
-            self.mostrar_resumo(
-                caminho_detalhado,
-                caminho_consolidado,
-                caminho_lista
-            )
-            
-        except Exception as e:
+
+        # Cópia da contagem lida pela thread de gravação
+        inventario = {local: dict(codigos) for local, codigos in self.inventario.items()}
+
+        def concluido(caminhos):
+            self.mostrar_resumo(*caminhos, inventario=inventario)
+
+        def falhou(e):
             self.logger.logger.error(f"Erro ao salvar arquivos: {str(e)}")
             messagebox.showerror(
                 "Erro",
                 "Ocorreu um erro ao salvar os arquivos do inventário!"
             )
 
-    def mostrar_resumo(self, caminho_detalhado, caminho_consolidado, caminho_lista):
+        JobRunner().run_with_progress(
+            self.window, "Gravando arquivos do inventário", self._gravar_arquivos,
+            diretorio, timestamp, inventario,
+            on_done=concluido, on_error=falhou, cancellable=False
+        )
+
+    @staticmethod
+    def _gravar_arquivos(job, diretorio, timestamp, inventario):
+        """Grava os três arquivos do inventário (executado em segundo plano)"""
+        # Arquivo detalhado
+        job.report(0, 3, "Gravando arquivo detalhado...")
+        caminho_detalhado = os.path.join(
+            diretorio,
+            f'inventario_{timestamp}_detalhado.csv'
+        )
+        with open(caminho_detalhado, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Local', 'Código', 'Quantidade'])
+            for local in inventario:
+                for codigo, qtd in inventario[local].items():
+                    writer.writerow([local.upper(), codigo, qtd])
+
+        # Arquivo consolidado
+        job.report(1, 3, "Gravando arquivo consolidado...")
+        caminho_consolidado = os.path.join(
+            diretorio,
+            f'inventario_{timestamp}_consolidado.csv'
+        )
+        with open(caminho_consolidado, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Código', 'Quantidade Total'])
+            
+            codigos_totais = {}
+            for local in inventario:
+                for codigo, qtd in inventario[local].items():
+                    codigos_totais[codigo] = codigos_totais.get(codigo, 0) + qtd
+            
+            for codigo, qtd in sorted(codigos_totais.items()):
+                writer.writerow([codigo, qtd])
+
+        # Lista completa (agora em CSV)
+        job.report(2, 3, "Gravando lista completa...")
+        caminho_lista = os.path.join(
+            diretorio,
+            f'inventario_{timestamp}_lista_completa.csv'
+        )
+        with open(caminho_lista, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Código'])  # Cabeçalho
+            for local in inventario:
+                for codigo, qtd in inventario[local].items():
+                    # Repete o código conforme a quantidade
+                    writer.writerows([codigo] for _ in range(qtd))
+
+        job.report(3, 3)
+        return caminho_detalhado, caminho_consolidado, caminho_lista
+
+    def mostrar_resumo(self, caminho_detalhado, caminho_consolidado, caminho_lista, inventario=None):
         """Mostra o resumo do inventário"""
+        if inventario is None:
+            inventario = self.inventario
         total_geral = 0
         resumo = "Resumo do Inventário:\n\n"
         
-        for local in self.inventario:
-            total_local = sum(self.inventario[local].values())
-            qtd_itens = len(self.inventario[local])
+        for local in inventario:
+            total_local = sum(inventario[local].values())
+            qtd_itens = len(inventario[local])
             resumo += f"{local.upper()}:\n"
             resumo += f"Total de itens únicos: {qtd_itens}\n"
             resumo += f"Total de peças: {total_local}\n\n"
@@ -0,0 +1,162 @@
+"""
+Execução de tarefas longas em segundo plano para o sistema Austral.
+As tarefas rodam num pool de threads limitado por
+performance.max_concurrent_operations; progresso, conclusão e erros voltam
+à interface por uma fila lida com root.after, nunca direto da thread.
+"""
+
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from config import ConfigManager
+
+logger = logging.getLogger('austral.jobs')
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """
+    Tarefa em execução. A função recebe a própria Job como primeiro argumento
+    e a usa para informar o progresso e verificar o cancelamento.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.future = None
+        self.events: "queue.Queue[tuple]" = queue.Queue()
+        self._cancel = threading.Event()
+
+    def report(self, done: int, total: Optional[int] = None, message: Optional[str] = None) -> None:
+        """Informa o progresso (chamada pela thread da tarefa)"""
+        self.events.put((done, total, message))
+
+    def cancel(self) -> None:
+        """Solicita o cancelamento (chamada pela interface)"""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self) -> None:
+        """Interrompe a tarefa com JobCancelled se o cancelamento foi solicitado"""
+        if self._cancel.is_set():
+            raise JobCancelled(f"{self.name} cancelada")
+
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+
+class JobRunner:
+    _instance = None
+
+    # Intervalo de leitura da fila de eventos pela interface
+    POLL_MS = 100
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.config = ConfigManager()
+            max_workers = max(int(self.config.get('performance.max_concurrent_operations', 5)), 1)
+            self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='austral-job')
+            self.initialized = True
+
+    def submit(self, widget, name: str, func: Callable[..., Any], *args,
+               on_done: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None,
+               on_progress: Optional[Callable[[int, Optional[int], Optional[str]], None]] = None,
+               on_cancel: Optional[Callable[[], None]] = None,
+               **kwargs) -> Job:
+        """
+        Executa func(job, *args, **kwargs) no pool. Os callbacks são chamados
+        na thread da interface, a partir do root.after de widget.
+
+        Args:
+            widget: Widget cuja janela acompanha a tarefa
+            name: Nome da tarefa (logs e mensagens)
+            func: Função executada em segundo plano
+            on_done: Recebe o retorno de func
+            on_error: Recebe a exceção lançada por func
+            on_progress: Recebe (feito, total, mensagem) do último job.report
+            on_cancel: Chamada quando func termina com JobCancelled
+
+        Returns:
+            Job: Tarefa submetida
+        """
+        job = Job(name)
+        job.future = self.executor.submit(func, job, *args, **kwargs)
+
+        def poll():
+            # Janela fechada: a tarefa termina sozinha, sem callbacks
+            if not widget.winfo_exists():
+                return
+
+            latest = None
+            try:
+                while True:
+                    latest = job.events.get_nowait()
+            except queue.Empty:
+                pass
+            if latest is not None and on_progress:
+                on_progress(*latest)
+
+            if not job.future.done():
+                widget.after(self.POLL_MS, poll)
+                return
+
+            try:
+                result = job.future.result()
+            except JobCancelled:
+                logger.info(f"Tarefa cancelada: {name}")
+                if on_cancel:
+                    on_cancel()
+            except Exception as e:
+                logger.error(f"Erro na tarefa {name}: {e}")
+                if on_error:
+                    on_error(e)
+            else:
+                if on_done:
+                    on_done(result)
+
+        widget.after(self.POLL_MS, poll)
+        return job
+
+    def run_with_progress(self, parent, title: str, func: Callable[..., Any], *args,
+                          on_done: Optional[Callable[[Any], None]] = None,
+                          on_error: Optional[Callable[[Exception], None]] = None,
+                          on_cancel: Optional[Callable[[], None]] = None,
+                          cancellable: bool = True, **kwargs) -> Job:
+        """Como submit, exibindo um UIHelper.ProgressDialog até a tarefa terminar"""
+        from utils import UIHelper
+
+        dialog = UIHelper.show_progress(parent, title)
+
+        def finish(callback, *result):
+            dialog.close()
+            if callback:
+                callback(*result)
+
+        job = self.submit(
+            parent, title, func, *args,
+            on_done=lambda result: finish(on_done, result),
+            on_error=lambda error: finish(on_error, error),
+            on_cancel=lambda: finish(on_cancel),
+            on_progress=dialog.update_progress,
+            **kwargs
+        )
+        if cancellable:
+            dialog.set_cancel(job.cancel)
+        return job
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,127 @@
+"""
+Diário de leituras (journal) append-only para sessões de bipagem.
+Cada leitura, desfazer ou limpeza grava uma única linha JSON, de modo que
+o custo por leitura independe do tamanho da sessão.
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+class ScanJournal:
+    """Diário de uma sessão de leituras com recuperação após falha"""
+
+    OP_SCAN = 'scan'
+    OP_UNDO = 'undo'
+    OP_CLEAR = 'clear'
+
+    def __init__(self, path: Path, fsync: bool = False):
+        self.path = Path(path)
+        self.fsync = fsync
+        self.logger = logging.getLogger('austral.journal')
+        self._lock = threading.Lock()
+        self._file = None
+
+    def _open(self):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            # Isola uma linha truncada por queda para não corromper o próximo registro
+            if self._file.tell() > 0:
+                with open(self.path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        self._file.write('\n')
+        return self._file
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            f = self._open()
+            f.write(line + '\n')
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def append_scan(self, registro: Dict[str, Any]) -> None:
+        """Registra uma nova leitura"""
+        self._append({'op': self.OP_SCAN, 'registro': registro})
+
+    def append_undo(self) -> None:
+        """Registra a remoção da última leitura"""
+        self._append({'op': self.OP_UNDO})
+
+    def append_clear(self) -> None:
+        """Registra a limpeza de todas as leituras"""
+        self._append({'op': self.OP_CLEAR})
+
+    def replay(self) -> List[Dict[str, Any]]:
+        """
+        Reconstrói a lista de leituras a partir do diário
+
+        Returns:
+            List[Dict]: Leituras ainda ativas, na ordem em que foram feitas
+        """
+        registros: List[Dict[str, Any]] = []
+        if not self.path.exists():
+            return registros
+
+        with self._lock, open(self.path, 'r', encoding='utf-8') as f:
+            for numero, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Última linha truncada por uma queda durante a escrita
+                    self.logger.warning(f"Linha {numero} inválida no diário {self.path.name}, ignorada")
+                    continue
+
+                op = record.get('op')
+                if op == self.OP_SCAN:
+                    registros.append(record['registro'])
+                elif op == self.OP_UNDO:
+                    if registros:
+                        registros.pop()
+                elif op == self.OP_CLEAR:
+                    registros.clear()
+
+        return registros
+
+    def compact(self, registros: Optional[List[Dict[str, Any]]] = None) -> None:
+        """
+        Reescreve o diário contendo apenas as leituras informadas
+
+        Args:
+            registros: Leituras que devem continuar no diário (vazio remove tudo)
+        """
+        with self._lock:
+            self._close_file()
+            if not registros:
+                self.path.unlink(missing_ok=True)
+                return
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.path.with_suffix('.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                for registro in registros:
+                    record = {'op': self.OP_SCAN, 'registro': registro}
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            temp_file.replace(self.path)
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self) -> None:
+        """Fecha o arquivo do diário"""
+        with self._lock:
+            self._close_file()
@@ -1,12 +1,139 @@
 import logging
+import logging.handlers
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 from functools import wraps
+import atexit
 import inspect
+import itertools
 import json
-import pandas as pd  # pip install pandas
+import os
+import queue
+import sqlite3
+import threading
+import time
 from config import ConfigManager
+from lojas import lojas
+from telemetry import TelemetryDatabase
+from metrics import MetricsRegistry
+
+# Buffer do arquivo de log; o conteúdo vai ao disco a cada flush periódico
+LOG_BUFFER_BYTES = 64 * 1024
+
+
+class _BatchedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler que acumula os registros no buffer do arquivo em vez
+    de descarregá-lo a cada linha. Erros vão ao disco imediatamente; o resto
+    no flush periódico do _LogWriter ou no encerramento.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Tamanho aproximado do arquivo (em caracteres), sem consultar o stream a cada registro
+        self._tamanho = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=LOG_BUFFER_BYTES,
+                    encoding=self.encoding, errors=self.errors)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            msg = self.format(record) + self.terminator
+            if self.maxBytes > 0 and self._tamanho and self._tamanho + len(msg) >= self.maxBytes:
+                self.doRollover()
+                self._tamanho = 0
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(msg)
+            self._tamanho += len(msg)
+            if record.levelno >= logging.ERROR:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+
+class _AuditHandler(logging.Handler):
+    """
+    Grava em lote na tabela auditoria do banco de telemetria os registros de
+    AustralLogger.log_action (os que trazem o atributo `auditoria`); os demais
+    são ignorados
+    """
+
+    LOTE = 500
+
+    def __init__(self):
+        super().__init__()
+        self.config = ConfigManager()
+        self.db = TelemetryDatabase()
+        self._pendentes: List[tuple] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        evento = getattr(record, 'auditoria', None)
+        if evento is None:
+            return
+        self._pendentes.append(evento)
+        if len(self._pendentes) >= self.LOTE:
+            self.flush()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if not self._pendentes:
+                return
+            lote, self._pendentes = self._pendentes, []
+            # Loja do terminal, que pode ser escolhida depois da abertura do sistema
+            terminal = self.config.get('terminal.loja', '')
+            if terminal not in {loja['loja'] for loja in lojas}:
+                terminal = ''
+            try:
+                with self.db.transaction() as conn:
+                    conn.executemany(
+                        'INSERT INTO auditoria (ts, usuario, acao, detalhes, terminal) VALUES (?, ?, ?, ?, ?)',
+                        [evento + (terminal,) for evento in lote]
+                    )
+            except sqlite3.Error as e:
+                logging.getLogger('austral.audit').warning(
+                    f"{len(lote)} eventos de auditoria descartados: {e}"
+                )
+        finally:
+            self.release()
+
+
+class _LogWriter(logging.handlers.QueueListener):
+    """Thread de gravação dos logs; descarrega os handlers a cada intervalo"""
+
+    def __init__(self, fila, *handlers, intervalo: float = 1.0):
+        super().__init__(fila, *handlers, respect_handler_level=True)
+        self.intervalo = intervalo
+        self._proximo_flush = time.monotonic() + intervalo
+
+    def dequeue(self, block: bool):
+        while True:
+            espera = self._proximo_flush - time.monotonic()
+            if espera <= 0:
+                self.flush()
+                continue
+            try:
+                return self.queue.get(block, espera)
+            except queue.Empty:
+                self.flush()
+
+    def flush(self) -> None:
+        self._proximo_flush = time.monotonic() + self.intervalo
+        # Janelas de agregação vencidas sem novas chamadas; os registros
+        # emitidos entram na mesma fila (SimpleQueue, sem limite)
+        _Agregado.emitir_vencidos()
+        for handler in self.handlers:
+            handler.flush()
+
+    def stop(self) -> None:
+        """Grava os registros ainda na fila e descarrega os handlers"""
+        if self._thread is not None:
+            super().stop()
+            self.flush()
+
 
 class AustralLogger:
     _instance = None
@@ -23,108 +150,265 @@ class AustralLogger:
             self.initialized = True
 
     def setup_logger(self) -> None:
-        """Configura o sistema de logs"""
-        log_path = Path(self.config.get('logs.path'))
+        """
+        Configura o sistema de logs: os registros entram numa fila e são
+        gravados em lote por uma thread própria, com rotação do arquivo
+        conforme logs.max_size_mb e logs.backup_count
+        """
+        log_config = self.config.get_log_config()
+        log_path = Path(log_config.path)
         log_path.parent.mkdir(parents=True, exist_ok=True)
 
         self.logger = logging.getLogger('austral')
-        self.logger.setLevel(self.config.get('logs.level', 'INFO'))
+        self.logger.setLevel(log_config.level)
+        self.writer: Optional[_LogWriter] = None
 
         if not self.logger.handlers:
-            file_handler = logging.FileHandler(log_path, encoding='utf-8')
+            file_handler = _BatchedRotatingFileHandler(
+                log_path,
+                maxBytes=int(log_config.max_size_mb * 1024 * 1024),
+                backupCount=log_config.backup_count,
+                encoding='utf-8'
+            )
             file_formatter = logging.Formatter(
                 '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
             )
             file_handler.setFormatter(file_formatter)
-            self.logger.addHandler(file_handler)
 
-    def log_action(self, action: str, user: str, details: Optional[Dict] = None) -> None:
-        """Registra uma ação no sistema"""
+            fila = queue.SimpleQueue()
+            self.writer = _LogWriter(
+                fila, file_handler, _AuditHandler(),
+                intervalo=max(log_config.flush_interval_ms, 50) / 1000
+            )
+            self.logger.addHandler(logging.handlers.QueueHandler(fila))
+            self.writer.start()
+            # Registrado depois do logging.shutdown, portanto executado antes dele
+            atexit.register(self.shutdown)
+
+    def flush(self) -> None:
+        """Descarrega no disco o que a thread de gravação já recebeu"""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def shutdown(self) -> None:
+        """Registra as contagens agregadas, esvazia a fila e encerra a thread de gravação"""
+        _Agregado.emitir_todos()
+        if self.writer is not None:
+            self.writer.stop()
+
+    def log_action(self, action: str, user: str, details: Optional[Dict] = None,
+                   audit: bool = True) -> None:
+        """
+        Registra uma ação no sistema (arquivo de log e, se audit, tabela auditoria)
+        """
+        agora = datetime.now()
         log_entry = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': agora.isoformat(),
             'action': action,
             'user': user,
             'details': details or {}
         }
-        self.logger.info(json.dumps(log_entry, ensure_ascii=False))
+        extra = None
+        if audit:
+            extra = {'auditoria': (
+                agora.isoformat(sep=' ', timespec='milliseconds'),
+                user,
+                action,
+                json.dumps(log_entry['details'], ensure_ascii=False)
+            )}
+        self.logger.info(json.dumps(log_entry, ensure_ascii=False), extra=extra)
+
+    def get_recent_activity(self, days: int = 7, user: Optional[str] = None,
+                            action: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Retorna as ações registradas nos últimos dias, da mais recente à mais antiga
+
+        Args:
+            days: Período consultado
+            user: Apenas as ações deste usuário
+            action: Apenas esta ação
+        """
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat(sep=' ', timespec='milliseconds')
+        sql = 'SELECT ts, usuario, acao, detalhes FROM auditoria WHERE ts >= ?'
+        params: List[Any] = [cutoff]
+        if user:
+            sql += ' AND usuario = ?'
+            params.append(user)
+        if action:
+            sql += ' AND acao = ?'
+            params.append(action)
+        sql += ' ORDER BY ts DESC'
 
-    def get_recent_activity(self, days: int = 7) -> List[Dict[str, Any]]:
-        """Retorna atividades recentes do sistema"""
-        cutoff_date = datetime.now() - timedelta(days=days)
         activities = []
-        
         try:
-            log_path = Path(self.config.get('logs.path'))
-            if log_path.exists():
-                with open(log_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        try:
-                            timestamp_str = line.split(' - ')[0]
-                            timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S,%f')
-                            if timestamp >= cutoff_date:
-                                log_data = json.loads(line.split(' - ')[-1])
-                                activities.append({
-                                    'timestamp': timestamp,
-                                    'user': log_data['user'],
-                                    'action': log_data['action'],
-                                    'details': log_data['details']
-                                })
-                        except:
-                            continue
-        except Exception as e:
+            # Inclui os eventos ainda no lote da thread de gravação
+            self.flush()
+            for ts, usuario, acao, detalhes in TelemetryDatabase().query(sql, params):
+                activities.append({
+                    'timestamp': datetime.fromisoformat(ts),
+                    'user': usuario,
+                    'action': acao,
+                    'details': json.loads(detalhes) if detalhes else {}
+                })
+        except (sqlite3.Error, ValueError) as e:
             self.logger.error(f"Erro ao ler atividades recentes: {e}")
-        
-        return sorted(activities, key=lambda x: x['timestamp'], reverse=True)
+        return activities
 
     def export_activity_report(self, output_file: str, days: int = 30) -> bool:
-        """Exporta relatório de atividades para Excel"""
+        """Exporta relatório de atividades para Excel (ou CSV, conforme a extensão)"""
         try:
             activities = self.get_recent_activity(days)
             if activities:
-                df = pd.DataFrame(activities)
-                df.to_excel(output_file, index=False)
+                from exporter import export_rows
+                headers = ['timestamp', 'user', 'action', 'details']
+                rows = (
+                    (a['timestamp'], a['user'], a['action'], str(a['details']))
+                    for a in activities
+                )
+                export_rows(rows, headers, output_file, sheet_name='Sheet1')
                 return True
         except Exception as e:
             self.logger.error(f"Erro ao exportar relatório: {e}")
         return False
 
-def log_action(action: str):
-    """Decorador para logging automático de ações"""
+# Janela de agregação das ações de leitura de código (uma linha por usuário por minuto)
+SCAN_LOG_AGGREGATE_S = 60
+# Parâmetros que nunca vão para o log
+ARGUMENTOS_EXCLUIDOS = frozenset({'self', 'cls', 'event', 'password', 'senha', 'token'})
+# Tamanho máximo de cada valor registrado
+MAX_VALOR_LOG = 120
+# Tipos registrados pelo valor; os demais aparecem apenas pelo nome do tipo
+_TIPOS_SIMPLES = (str, int, float, bool, type(None))
+
+
+def _valor_log(valor: Any) -> Any:
+    if not isinstance(valor, _TIPOS_SIMPLES):
+        return f"<{type(valor).__name__}>"
+    if isinstance(valor, str) and len(valor) > MAX_VALOR_LOG:
+        return valor[:MAX_VALOR_LOG] + '…'
+    return valor
+
+
+class _Agregado:
+    """
+    Contagem das chamadas de uma ação, registrada em uma linha por janela.
+    As chamadas vêm da thread da interface; as janelas vencidas também são
+    emitidas pela thread de gravação dos logs (_LogWriter.flush), para que a
+    última janela não fique pendente quando a ação deixa de ser chamada.
+    """
+
+    _pendentes: List['_Agregado'] = []
+    _lock = threading.Lock()
+
+    def __init__(self, action: str, janela: float):
+        self.action = action
+        self.janela = janela
+        self.inicio = time.monotonic()
+        self.chamadas: Dict[str, int] = {}
+        with _Agregado._lock:
+            _Agregado._pendentes.append(self)
+
+    def registrar(self, user: str) -> None:
+        with _Agregado._lock:
+            if not self.chamadas:
+                # A janela começa na primeira chamada depois da última emissão
+                self.inicio = time.monotonic()
+            self.chamadas[user] = self.chamadas.get(user, 0) + 1
+            vencida = time.monotonic() - self.inicio >= self.janela
+        if vencida:
+            self.emitir()
+
+    def emitir(self) -> None:
+        with _Agregado._lock:
+            chamadas, self.chamadas = self.chamadas, {}
+            segundos = round(time.monotonic() - self.inicio)
+            self.inicio = time.monotonic()
+        # Fora do lock: log_action apenas enfileira os registros
+        logger = AustralLogger()
+        for user, total in chamadas.items():
+            logger.log_action(self.action, user, {'calls': total, 'seconds': segundos})
+
+    @classmethod
+    def emitir_vencidos(cls) -> None:
+        """Emite as janelas com chamadas cujo prazo já passou"""
+        agora = time.monotonic()
+        with cls._lock:
+            vencidos = [
+                agregado for agregado in cls._pendentes
+                if agregado.chamadas and agora - agregado.inicio >= agregado.janela
+            ]
+        for agregado in vencidos:
+            agregado.emitir()
+
+    @classmethod
+    def emitir_todos(cls) -> None:
+        with cls._lock:
+            pendentes = [agregado for agregado in cls._pendentes if agregado.chamadas]
+        for agregado in pendentes:
+            agregado.emitir()
+
+
+def log_action(action: str, sample: int = 1, aggregate: float = 0, audit: bool = True):
+    """
+    Decorador para logging automático de ações
+
+    Args:
+        action: Nome da ação registrada
+        sample: Registra uma a cada N chamadas (ações muito frequentes)
+        aggregate: Em vez de uma linha por chamada, registra a contagem por
+            usuário a cada `aggregate` segundos
+        audit: Grava a ação na tabela auditoria; False para ações que só
+            leem dados (recargas de listas e painéis)
+
+    Os argumentos registrados são calculados uma vez por função: apenas os
+    parâmetros fora de ARGUMENTOS_EXCLUIDOS, com valores simples limitados a
+    MAX_VALOR_LOG caracteres. Erros são sempre registrados. A duração e o
+    resultado de toda chamada vão para o MetricsRegistry.
+    """
     def decorator(func):
+        parametros = list(inspect.signature(func).parameters.values())
+        posicionais = [
+            p.name for p in parametros
+            if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)
+        ]
+        permitidos = {p.name for p in parametros} - ARGUMENTOS_EXCLUIDOS
+        registrar_posicionais = [
+            (idx, nome) for idx, nome in enumerate(posicionais) if nome in permitidos
+        ]
+        agregado = _Agregado(action, aggregate) if aggregate > 0 else None
+        metricas = MetricsRegistry()
+        contador = itertools.count()
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            instance = args[0] if args and hasattr(args[0], '__class__') else None
-            user = getattr(instance, 'username', 'system') if instance else 'system'
-            
-            sig = inspect.signature(func)
-            bound_args = sig.bind(*args, **kwargs)
-            bound_args.apply_defaults()
-            
-            # Remove argumentos sensíveis
-            safe_args = {
-                k: v for k, v in bound_args.arguments.items() 
-                if k not in ['password', 'senha', 'token']
-            }
-            
-            logger = AustralLogger()
-            logger.log_action(
-                action=action,
-                user=user,
-                details={
-                    'function': func.__name__,
-                    'arguments': str(safe_args)
+            user = getattr(args[0], 'username', 'system') if args else 'system'
+
+            if agregado is not None:
+                agregado.registrar(user)
+            elif sample <= 1 or next(contador) % sample == 0:
+                details = {
+                    nome: _valor_log(args[idx])
+                    for idx, nome in registrar_posicionais if idx < len(args)
                 }
-            )
-            
+                for nome, valor in kwargs.items():
+                    if nome in permitidos:
+                        details[nome] = _valor_log(valor)
+                AustralLogger().log_action(action=action, user=user, details=details, audit=audit)
+
+            inicio = time.perf_counter()
+            ok = False
             try:
                 result = func(*args, **kwargs)
+                ok = True
                 return result
             except Exception as e:
-                logger.logger.error(
+                AustralLogger().logger.error(
                     f"Erro em {action}: {str(e)}",
                     exc_info=True
                 )
                 raise
-            
+            finally:
+                metricas.record(action, time.perf_counter() - inicio, ok)
+
         return wrapper
     return decorator
@@ -6,7 +6,6 @@ from ttkbootstrap.constants import *
 import sqlite3
 import hashlib
 from typing import Callable
-import requests
 import threading
 import time
 from datetime import datetime
@@ -21,6 +20,7 @@ from utils import (
 )
 from config import ConfigManager
 from logger import AustralLogger
+from database import DatabaseManager
 
 class LoginWindow:
     def __init__(self, root: tk.Tk, on_login_success: Callable):
@@ -29,6 +29,7 @@ class LoginWindow:
         self.root.title("AUSTRAL - LOGIN")
         self.config = ConfigManager()
         self.logger = AustralLogger()
+        self.db = DatabaseManager()
         self.resource_manager = resource_manager  # Usando a instância global
         self.ui_helper = ui_helper  # Usando a instância global
         self.theme_manager = theme_manager  # Usando a instância global
@@ -324,6 +325,7 @@ class LoginWindow:
     def update_currency_rates(self):
         """Atualiza as cotações do dólar e euro"""
         try:
+            import requests
             response = requests.get('https://economia.awesomeapi.com.br/json/last/USD-BRL,EUR-BRL')
             data = response.json()
 
@@ -365,10 +367,7 @@ class LoginWindow:
             return
 
         try:
-            # Obter o caminho do banco de dados
-            db_path = self.config.get('database.path')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
+            cursor = self.db.connection().cursor()
 
             # Verifica credenciais
             hashed_password = hashlib.sha256(password.encode()).hexdigest()
@@ -381,12 +380,12 @@ class LoginWindow:
 
             if user:
                 # Atualiza último login
-                cursor.execute('''
-                    UPDATE users 
-                    SET last_login = CURRENT_TIMESTAMP 
-                    WHERE username = ?
-                ''', (username,))
-                conn.commit()
+                with self.db.transaction() as conn:
+                    conn.execute('''
+                        UPDATE users 
+                        SET last_login = CURRENT_TIMESTAMP 
+                        WHERE username = ?
+                    ''', (username,))
 
                 self.error_label.config(text="")
                 self.logger.log_action("login_success", username, {"role": user[3]})
@@ -400,8 +399,6 @@ class LoginWindow:
         except sqlite3.Error as e:
             print(f"Erro ao validar login: {str(e)}")
             self.error_label.config(text="ERRO AO ACESSAR BANCO DE DADOS")
-        finally:
-            conn.close()
 
     def redirect_to_whatsapp(self):
         """Redireciona para o WhatsApp para recuperação de senha"""
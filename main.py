@@ -2,19 +2,38 @@
 from ttkbootstrap import Window
 from system import AustralSystem
 import sys
+import multiprocessing
 from config import ConfigManager
+from logger import AustralLogger
+from backup import BackupService
+from database import DatabaseManager
+from jobs import JobRunner
+import integrity
 
 def main():
     try:
+        # Configura o logging antes dos serviços, para que suas mensagens de início sejam gravadas
+        AustralLogger()
         config = ConfigManager()
         config.setup_all_databases()
+        BackupService().start_scheduler()
+        integrity.IntegrityMonitor().start()
+        DatabaseManager().start_maintenance()
 
         root = Window()
+        if config.get('diagnostics.stall_watchdog', False):
+            from stall_watchdog import StallWatchdog
+            StallWatchdog(root).start()
         app = AustralSystem(root)
         root.mainloop()
+        config.flush()
+        JobRunner().shutdown()
+        integrity.shutdown()
     except Exception as e:
         print(f"Erro crítico ao iniciar sistema: {e}")
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Necessário para o processo verificador de integridade no executável PyInstaller
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
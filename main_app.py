@@ -4,23 +4,74 @@ import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from ttkbootstrap import Window
 from datetime import datetime
-from typing import Callable, List, Dict
+from typing import Callable, List, Dict, Tuple
+import importlib
 from config import ConfigManager
 from logger import AustralLogger, log_action
 from utils import FONT_TITLE, FONT_LABEL, setup_window_icon
-from PIL import Image, ImageTk
-
-# Importação dos módulos
-from mix import MixDiarioApp
-from delivery import EtiquetaClientesApp
-from transfer import EtiquetaTransferenciaApp
-from mail import EmailGeneratorApp
-from defects import DefectManagerApp
-from sinoms import PedidoSinOMSApp
-from inventory import InventoryApp
-from simulador import PontoDeVendaApp  # Importação do Ponto de Venda
+
+# Registro das ferramentas: chave -> (módulo, classe, título da janela).
+# Os módulos só são importados no primeiro uso, para não atrasar a abertura do sistema.
+TOOLS: Dict[str, Tuple[str, str, str]] = {
+    'mix_diario': ('mix', 'MixDiarioApp', 'MIX DIÁRIO'),
+    'sinoms_control': ('sinoms', 'PedidoSinOMSApp', 'CONTROLE DE PEDIDOS SINOMS'),
+    'sinoms_metrics': ('sinoms_metrics', 'SinOMSMetricsApp', 'MÉTRICAS DE ENVIO SINOMS'),
+    'defect_manager': ('defects', 'DefectManagerApp', 'GERENCIADOR DE PEÇAS COM DEFEITO'),
+    'defect_analytics': ('analytics', 'AnalyticsApp', 'ANÁLISE DE DEFEITOS'),
+    'email_generator': ('mail', 'EmailGeneratorApp', 'GERADOR DE E-MAIL - FECHAMENTO'),
+    'etiquetas_clientes': ('delivery', 'EtiquetaClientesApp', 'ETIQUETA DE CLIENTES'),
+    'etiquetas_transferencia': ('transfer', 'EtiquetaTransferenciaApp', 'ETIQUETA DE TRANSFERÊNCIA'),
+    'inventory': ('inventory', 'InventoryApp', 'SISTEMA DE INVENTÁRIO'),
+    'ponto_de_venda': ('simulador', 'PontoDeVendaApp', 'PONTO DE VENDA'),
+    'restore': ('restore', 'RestoreApp', 'BACKUPS E RESTAURAÇÃO'),
+    'action_metrics': ('action_metrics', 'ActionMetricsApp', 'DESEMPENHO DAS AÇÕES'),
+}
+
+# Botões exibidos apenas para administradores: (texto do botão, método de AustralApp, chave em TOOLS)
+ADMIN_TOOLS: List[Tuple[str, str, str]] = [
+    ('BACKUPS', 'open_restore', 'restore'),
+    ('DESEMPENHO', 'open_action_metrics', 'action_metrics'),
+]
+
+_tool_classes: Dict[str, type] = {}
+
+
+def load_tool(key: str) -> type:
+    """Importa (uma única vez) o módulo da ferramenta e retorna sua classe"""
+    tool_class = _tool_classes.get(key)
+    if tool_class is None:
+        module_name, class_name, _ = TOOLS[key]
+        module = importlib.import_module(module_name)
+        tool_class = getattr(module, class_name)
+        _tool_classes[key] = tool_class
+    return tool_class
+
+
+def prewarm_tools(root: tk.Misc, keys: List[str]) -> None:
+    """
+    Pré-carrega os módulos das ferramentas na thread principal, um por vez
+    quando o loop Tk está ocioso. Uma thread separada disputaria o GIL com a
+    interface durante as importações sem deixá-las mais rápidas.
+    """
+    pendentes = list(keys)
+
+    def step():
+        if not pendentes or not root.winfo_exists():
+            return
+        key = pendentes.pop(0)
+        try:
+            load_tool(key)
+        except Exception as e:
+            AustralLogger().logger.warning(f"Falha ao pré-carregar ferramenta '{key}': {e}")
+        if pendentes:
+            root.after_idle(step)
+
+    root.after_idle(step)
+
 
 class AustralApp:
+    INTEGRITY_POLL_MS = 60000
+
     def __init__(self, root: tk.Tk, username: str, role: str):
         self.root = root
         self.username = username
@@ -36,6 +87,13 @@ class AustralApp:
         self.setup_ui()
         self.logger.log_action("app_start", self.username, {"role": self.role})
 
+        # Pré-carrega as ferramentas depois que o menu já está interativo
+        if self.config.get('performance.prewarm_tools', True):
+            self.root.after(1000, lambda: prewarm_tools(self.root, self.prewarm_keys()))
+
+        if self.role == 'admin':
+            self.root.after(self.INTEGRITY_POLL_MS, self.check_integrity_alerts)
+
     def center_window(self):
         window_width = 800
         window_height = 600
@@ -73,6 +131,7 @@ class AustralApp:
         
         # Carrega a imagem do logotipo
         try:
+            from PIL import Image, ImageTk
             logo_image = Image.open("logo.png")
             logo_image = logo_image.resize((100, 50), Image.LANCZOS)
             logo_photo = ImageTk.PhotoImage(logo_image)
@@ -111,10 +170,18 @@ class AustralApp:
                 'title': 'CONTROLE PEDIDOS SINOMS',
                 'command': self.open_sinoms_control,
             },
+            {
+                'title': 'MÉTRICAS DE ENVIO SINOMS',
+                'command': self.open_sinoms_metrics,
+            },
             {
                 'title': 'PLANILHA DE DEFEITOS',
                 'command': self.open_defect_manager,
             },
+            {
+                'title': 'ANÁLISE DE DEFEITOS',
+                'command': self.open_defect_analytics,
+            },
             {
                 'title': 'E-MAIL DE FECHAMENTO',
                 'command': self.open_email_generator,
@@ -153,61 +220,94 @@ class AustralApp:
             )
             button.pack(pady=10)
 
+    def prewarm_keys(self) -> List[str]:
+        """Ferramentas que este usuário pode abrir (as administrativas só para admin)"""
+        if self.role == 'admin':
+            return list(TOOLS)
+        admin_keys = {key for _, _, key in ADMIN_TOOLS}
+        return [key for key in TOOLS if key not in admin_keys]
+
+    def open_tool(self, key: str):
+        """Abre a janela de uma ferramenta registrada em TOOLS"""
+        tool_class = load_tool(key)
+        window = ttk.Toplevel(self.root)
+        window.title(TOOLS[key][2])
+        return tool_class(window)
+
+    def check_integrity_alerts(self):
+        """Avisa o administrador sobre falhas encontradas pela verificação periódica"""
+        from integrity import IntegrityMonitor
+
+        alerts = IntegrityMonitor().pending_alerts()
+        if alerts:
+            detalhes = "\n".join(f"- {a['arquivo']}: {a['mensagens'][0]}" for a in alerts)
+            messagebox.showerror(
+                "INTEGRIDADE DO BANCO",
+                f"A verificação periódica encontrou problemas:\n{detalhes}\n\n"
+                "Use a tela BACKUPS para restaurar um backup válido."
+            )
+        if self.root.winfo_exists():
+            self.root.after(self.INTEGRITY_POLL_MS, self.check_integrity_alerts)
+
+    @log_action("open_restore")
+    def open_restore(self):
+        """Abre a janela de Backups e Restauração (somente administradores)"""
+        self.open_tool('restore')
+
+    @log_action("open_action_metrics")
+    def open_action_metrics(self):
+        """Abre a janela de Desempenho das Ações (somente administradores)"""
+        self.open_tool('action_metrics')
+
     @log_action("open_ponto_de_venda")
     def open_ponto_de_venda(self):
         """Abre a janela do Ponto de Venda"""
-        window = ttk.Toplevel(self.root)
-        window.title("PONTO DE VENDA")
-        PontoDeVendaApp(window)
+        self.open_tool('ponto_de_venda')
 
     @log_action("open_email_generator")
     def open_email_generator(self):
         """Abre a janela do Gerador de E-mail"""
-        window = ttk.Toplevel(self.root)
-        window.title("GERADOR DE E-MAIL - FECHAMENTO")
-        EmailGeneratorApp(window)
+        self.open_tool('email_generator')
 
     @log_action("open_mix_diario")
     def open_mix_diario(self):
         """Abre a janela do Mix Diário"""
-        window = ttk.Toplevel(self.root)
-        window.title("MIX DIÁRIO")
-        MixDiarioApp(window)
+        self.open_tool('mix_diario')
 
     @log_action("open_etiquetas_clientes")
     def open_etiquetas_clientes(self):
         """Abre a janela para gerar etiqueta para clientes"""
-        window = ttk.Toplevel(self.root)
-        window.title("ETIQUETA DE CLIENTES")
-        EtiquetaClientesApp(window)
+        self.open_tool('etiquetas_clientes')
 
     @log_action("open_etiquetas_transferencia")
     def open_etiquetas_transferencia(self):
         """Abre a janela para gerar etiqueta de transferência"""
-        window = ttk.Toplevel(self.root)
-        window.title("ETIQUETA DE TRANSFERÊNCIA")
-        EtiquetaTransferenciaApp(window)
+        self.open_tool('etiquetas_transferencia')
 
     @log_action("open_defect_manager")
     def open_defect_manager(self):
         """Abre a janela do Gerenciador de Peças com Defeito"""
-        window = ttk.Toplevel(self.root)
-        window.title("GERENCIADOR DE PEÇAS COM DEFEITO")
-        DefectManagerApp(window)
+        self.open_tool('defect_manager')
+
+    @log_action("open_defect_analytics")
+    def open_defect_analytics(self):
+        """Abre a janela de Análise de Defeitos"""
+        self.open_tool('defect_analytics')
 
     @log_action("open_sinoms_control")
     def open_sinoms_control(self):
         """Abre a janela do Controle de Pedidos SinOMS"""
-        window = ttk.Toplevel(self.root)
-        window.title("CONTROLE DE PEDIDOS SINOMS")
-        PedidoSinOMSApp(window)
+        self.open_tool('sinoms_control')
+
+    @log_action("open_sinoms_metrics")
+    def open_sinoms_metrics(self):
+        """Abre a janela de Métricas de Envio SinOMS"""
+        self.open_tool('sinoms_metrics')
 
     @log_action("open_inventory")
     def open_inventory(self):
         """Abre a janela do Sistema de Inventário"""
-        window = ttk.Toplevel(self.root)
-        window.title("SISTEMA DE INVENTÁRIO")
-        InventoryApp(window)
+        self.open_tool('inventory')
 
     def create_footer(self):
         """Cria o rodapé com informações e botão de logout"""
@@ -234,6 +334,16 @@ class AustralApp:
         )
         logout_button.pack(side=tk.RIGHT)
 
+        # Ferramentas administrativas
+        if self.role == 'admin':
+            for title, method, _ in ADMIN_TOOLS:
+                ttk.Button(
+                    footer_frame,
+                    text=title,
+                    command=getattr(self, method),
+                    bootstyle="secondary"
+                ).pack(side=tk.RIGHT, padx=(0, 5))
+
         # Marca d'água no canto inferior direito
         watermark = ttk.Label(
             self.main_frame,
@@ -248,6 +358,7 @@ class AustralApp:
         """Realiza o logout do usuário"""
         if messagebox.askyesno("LOGOUT", "Deseja realmente sair do sistema?"):
             self.logger.log_action("logout_success", self.username)
+            self.config.flush()
             self.root.destroy()
 
 
@@ -0,0 +1,199 @@
+"""
+Métricas de desempenho das ações do sistema Austral.
+Cada ação decorada com @log_action registra duração e resultado em um
+histograma logarítmico-linear (no estilo HDR) em memória. Os histogramas são
+gravados periodicamente em metricas_acoes (banco de telemetria), uma linha
+por terminal, ação e dia, e somados na consulta para os percentis.
+"""
+
+import atexit
+import json
+import logging
+import math
+import sqlite3
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from config import ConfigManager
+from lojas import lojas
+from telemetry import TelemetryDatabase
+
+logger = logging.getLogger('austral.metrics')
+
+# 2^6 subdivisões por potência de 2: erro relativo abaixo de 1,6%
+SUB_BUCKET_BITS = 6
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+
+def bucket(micros: int) -> int:
+    """Índice do intervalo do histograma que contém a duração (em microssegundos)"""
+    if micros < 2 * _SUB_BUCKETS:
+        return max(micros, 0)
+    expoente = micros.bit_length() - SUB_BUCKET_BITS - 1
+    return expoente * _SUB_BUCKETS + (micros >> expoente)
+
+
+def bucket_value(indice: int) -> int:
+    """Valor central (em microssegundos) do intervalo do histograma"""
+    if indice < 2 * _SUB_BUCKETS:
+        return indice
+    expoente = indice // _SUB_BUCKETS - 1
+    mantissa = indice - expoente * _SUB_BUCKETS
+    return (mantissa << expoente) + ((1 << expoente) >> 1)
+
+
+class Histogram:
+    """Contagem de durações por intervalo, com total de chamadas e de erros"""
+
+    __slots__ = ('contagens', 'chamadas', 'erros')
+
+    def __init__(self):
+        self.contagens: Dict[int, int] = {}
+        self.chamadas = 0
+        self.erros = 0
+
+    def record(self, micros: int, ok: bool = True) -> None:
+        indice = bucket(micros)
+        self.contagens[indice] = self.contagens.get(indice, 0) + 1
+        self.chamadas += 1
+        if not ok:
+            self.erros += 1
+
+    def merge(self, outro: 'Histogram') -> None:
+        for indice, total in outro.contagens.items():
+            self.contagens[indice] = self.contagens.get(indice, 0) + total
+        self.chamadas += outro.chamadas
+        self.erros += outro.erros
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Percentil pelo posto mais próximo, em milissegundos (None se vazio)"""
+        if not self.chamadas:
+            return None
+        alvo = max(math.ceil(p / 100 * self.chamadas), 1)
+        acumulado = 0
+        for indice in sorted(self.contagens):
+            acumulado += self.contagens[indice]
+            if acumulado >= alvo:
+                return bucket_value(indice) / 1000
+        return bucket_value(max(self.contagens)) / 1000
+
+    def to_json(self) -> str:
+        return json.dumps(self.contagens, separators=(',', ':'))
+
+    @classmethod
+    def from_row(cls, chamadas: int, erros: int, histograma: str) -> 'Histogram':
+        hist = cls()
+        hist.contagens = {int(indice): total for indice, total in json.loads(histograma).items()}
+        hist.chamadas = chamadas
+        hist.erros = erros
+        return hist
+
+
+class MetricsRegistry:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.config = ConfigManager()
+            self.db = TelemetryDatabase()
+            self.enabled = bool(self.config.get('metrics.enabled', True))
+            self._lock = threading.Lock()
+            self._pendentes: Dict[str, Histogram] = {}
+            self._stop = threading.Event()
+            self._thread: Optional[threading.Thread] = None
+            self.initialized = True
+
+    def record(self, action: str, seconds: float, ok: bool = True) -> None:
+        """Registra uma execução da ação (chamado por @log_action)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            hist = self._pendentes.get(action)
+            if hist is None:
+                hist = self._pendentes[action] = Histogram()
+            hist.record(int(seconds * 1_000_000), ok)
+            if self._thread is None:
+                self._start()
+
+    def _start(self) -> None:
+        interval = max(float(self.config.get('metrics.flush_interval_s', 60)), 1.0)
+
+        def loop():
+            while not self._stop.wait(interval):
+                self.flush()
+            self.db.close()
+
+        self._thread = threading.Thread(target=loop, name='austral-metrics', daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def flush(self) -> None:
+        """Soma as execuções pendentes aos histogramas do dia em metricas_acoes"""
+        with self._lock:
+            if not self._pendentes:
+                return
+            lote, self._pendentes = self._pendentes, {}
+
+        dia = date.today().isoformat()
+        # Loja do terminal, que pode ser escolhida depois da abertura do sistema
+        terminal = self.config.get('terminal.loja', '')
+        if terminal not in {loja['loja'] for loja in lojas}:
+            terminal = ''
+        try:
+            with self.db.transaction() as conn:
+                for action, hist in lote.items():
+                    row = conn.execute(
+                        'SELECT chamadas, erros, histograma FROM metricas_acoes '
+                        'WHERE terminal = ? AND acao = ? AND dia = ?',
+                        (terminal, action, dia)
+                    ).fetchone()
+                    total = Histogram.from_row(*row) if row else Histogram()
+                    total.merge(hist)
+                    conn.execute(
+                        'INSERT OR REPLACE INTO metricas_acoes '
+                        '(terminal, acao, dia, chamadas, erros, histograma) VALUES (?, ?, ?, ?, ?, ?)',
+                        (terminal, action, dia, total.chamadas, total.erros, total.to_json())
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"Erro ao gravar métricas das ações: {e}")
+            # Devolve o lote para a próxima gravação
+            with self._lock:
+                for action, hist in lote.items():
+                    pendente = self._pendentes.setdefault(action, Histogram())
+                    pendente.merge(hist)
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self.flush()
+
+    def load(self, days: int) -> Dict[Tuple[str, str], Histogram]:
+        """
+        Histogramas dos últimos dias, somados por ação e terminal
+
+        Returns:
+            Dict: (ação, terminal) -> Histogram
+        """
+        desde = (date.today() - timedelta(days=max(days - 1, 0))).isoformat()
+        rows = self.db.query(
+            'SELECT acao, terminal, chamadas, erros, histograma FROM metricas_acoes WHERE dia >= ?',
+            (desde,)
+        )
+        totais: Dict[Tuple[str, str], Histogram] = {}
+        for action, terminal, chamadas, erros, histograma in rows:
+            hist = totais.setdefault((action, terminal), Histogram())
+            hist.merge(Histogram.from_row(chamadas, erros, histograma))
+        return totais
+
+
+def merge_by_action(histograms: Iterable[Tuple[Tuple[str, str], Histogram]]) -> Dict[str, Histogram]:
+    """Soma os histogramas de todos os terminais de cada ação"""
+    totais: Dict[str, Histogram] = {}
+    for (action, _), hist in histograms:
+        totais.setdefault(action, Histogram()).merge(hist)
+    return totais
@@ -2,14 +2,14 @@ import tkinter as tk
 from tkinter import messagebox
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import PRIMARY, SECONDARY
-
-import pandas as pd
 from datetime import datetime
 from config import ConfigManager
-from logger import AustralLogger, log_action
+from logger import AustralLogger, log_action, SCAN_LOG_AGGREGATE_S
 from utils import FONT_LABEL, FONT_ENTRY, FONT_TITLE
 import os
 from utils import UIHelper
+from journal import ScanJournal
+from jobs import JobRunner
 
 
 user_diretorio = os.path.expanduser('~')
@@ -17,6 +17,16 @@ user_diretorio = os.path.expanduser('~')
 user_diretorio = user_diretorio.replace("\\",'/')
 
 class MixDiarioApp:
+    # Pasta do OneDrive com a planilha do mix de cada filial
+    PASTAS_FILIAIS = {
+        "000002": "Documentos - lojaiguatemi",
+        "000003": "Documentos - Loja Pátio Higienópolis",
+        "000012": "Documentos - Loja Morumbi",
+        "000014": "Documentos - lojaiguatemi",
+        "000015": "Documentos - Loja Iguatemi Alphaville",
+        "000016": "Documentos - Loja JK Iguatemi"
+    }
+
     def __init__(self, root):
         self.root = root
         self.root.title("MIX DIÁRIO - AUSTRAL")
@@ -36,6 +46,10 @@ class MixDiarioApp:
         # Lista para armazenar os códigos
         self.codigos = []
 
+        # Diário append-only da sessão de leituras (recuperação após falha)
+        self.journal = ScanJournal(self.config.base_dir / 'journal' / 'mix_diario.jsonl')
+        self.root.bind('<Destroy>', self._on_destroy, add='+')
+
         # Variável para armazenar a última atualização
         self.last_update = self.config.get('mix_diario.last_update', 'NENHUMA')
 
@@ -53,6 +67,11 @@ class MixDiarioApp:
 
         self.center_window()
 
+    def _on_destroy(self, event):
+        """Fecha o diário quando a janela é destruída"""
+        if event.widget is self.root:
+            self.journal.close()
+
     def center_window(self):
         """Centraliza a janela na tela do usuário"""
         self.root.update_idletasks()
@@ -209,7 +228,7 @@ class MixDiarioApp:
         )
         self.last_update_label.pack(pady=(5, 0), anchor=tk.E)
 
-    @log_action("register_code")
+    @log_action("register_code", aggregate=SCAN_LOG_AGGREGATE_S)
     def registrar_codigo(self, event=None):
         """Registra um novo código na lista"""
         codigo = self.codigo_entry.get().strip()
@@ -243,7 +262,7 @@ class MixDiarioApp:
         self.codigo_entry.delete(0, tk.END)
 
         # Salva o progresso
-        self.save_progress()
+        self.journal.append_scan(new_entry)
 
     def remover_ultimo(self):
         """Remove o último código registrado"""
@@ -252,15 +271,14 @@ class MixDiarioApp:
             items = self.tree.get_children()
             if items:
                 self.tree.delete(items[-1])
-            self.save_progress()
+            self.journal.append_undo()
 
     def limpar_tudo(self):
         """Limpa todos os códigos registrados"""
         if messagebox.askyesno("CONFIRMAR", "DESEJA REALMENTE LIMPAR TODOS OS CÓDIGOS?"):
             self.codigos.clear()
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            self.save_progress()
+            self.tree.delete(*self.tree.get_children())
+            self.journal.append_clear()
 
     @log_action("generate_mix_report")
     def finalizar_mix(self):
@@ -273,57 +291,10 @@ class MixDiarioApp:
             messagebox.showwarning("ATENÇÃO", "SELECIONE UMA LOJA!")
             return
 
-        try:
-            # Cria um DataFrame com os novos dados
-            df_new = pd.DataFrame(self.codigos)
-
-            # Tenta ler o arquivo existente
-            try:
-                filial = self.branch_codes.get(self.loja_var.get(), 'DESCONHECIDO')
-                if filial == "000002":
-                    df_existing = pd.read_excel(f'{user_diretorio}/OneDrive - Austral/Documentos - lojaiguatemi/Mix diário/{self.excel_file_path}')
-                elif filial == "000003":
-                    df_existing = pd.read_excel(f'{user_diretorio}/OneDrive - Austral/Documentos - Loja Pátio Higienópolis/Mix diário/{self.excel_file_path}')
-                elif filial == "000014":
-                    df_existing = pd.read_excel(f'{user_diretorio}/OneDrive - Austral/Documentos - lojaiguatemi/Mix diário/{self.excel_file_path}')
-                elif filial == "000015":
-                    df_existing = pd.read_excel(f'{user_diretorio}/OneDrive - Austral/Documentos - Loja Iguatemi Alphaville/Mix diário/{self.excel_file_path}')
-                elif filial == "000016":
-                    df_existing = pd.read_excel(f'{user_diretorio}/OneDrive - Austral/Documentos - Loja JK Iguatemi/Mix diário/{self.excel_file_path}')
-                elif filial == "000012":
-                    df_existing = pd.read_excel(f'{user_diretorio}/OneDrive - Austral/Documentos - Loja Morumbi/Mix diário/{self.excel_file_path}')
-                else:
-                    print('Filial desconhecida')
-            except FileNotFoundError:
-                df_existing = pd.DataFrame(columns=['data', 'hora', 'filial', 'sku'])
-
-            # Concatena os dados existentes com os novos
-            df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-
-            # Salva no arquivo
-            if filial == "000002":
-                with pd.ExcelWriter(f'{user_diretorio}/OneDrive - Austral/Documentos - lojaiguatemi/Mix diário/{self.excel_file_path}', engine='openpyxl', mode='w') as writer:
-                    df_combined.to_excel(writer, sheet_name='Mix Diário', index=False)
-            elif filial == "000003":
-                with pd.ExcelWriter(f'{user_diretorio}/OneDrive - Austral/Documentos - Loja Pátio Higienópolis/Mix diário/{self.excel_file_path}', engine='openpyxl', mode='w') as writer:
-                    df_combined.to_excel(writer, sheet_name='Mix Diário', index=False)
-            elif filial == "000014":
-                with pd.ExcelWriter(f'{user_diretorio}/OneDrive - Austral/Documentos - lojaiguatemi/Mix diário/{self.excel_file_path}', engine='openpyxl', mode='w') as writer:
-                    df_combined.to_excel(writer, sheet_name='Mix Diário', index=False)
-            elif filial == "000015":
-                with pd.ExcelWriter(f'{user_diretorio}/OneDrive - Austral/Documentos - Loja Iguatemi Alphaville/Mix diário/{self.excel_file_path}', engine='openpyxl', mode='w') as writer:
-                    df_combined.to_excel(writer, sheet_name='Mix Diário', index=False)
-            elif filial == "000016":
-                with pd.ExcelWriter(f'{user_diretorio}/OneDrive - Austral/Documentos - Loja JK Iguatemi/Mix diário/{self.excel_file_path}', engine='openpyxl', mode='w') as writer:
-                    df_combined.to_excel(writer, sheet_name='Mix Diário', index=False)
-            elif filial == "000012":
-                with pd.ExcelWriter(f'{user_diretorio}/OneDrive - Austral/Documentos - Loja Morumbi/Mix diário/{self.excel_file_path}', engine='openpyxl', mode='w') as writer:
-                    df_combined.to_excel(writer, sheet_name='Mix Diário', index=False)
-            else:
-                print('Filial desconhecida')
-                with pd.ExcelWriter(self.excel_file_path, engine='openpyxl', mode='w') as writer:
-                    df_combined.to_excel(writer, sheet_name='Mix Diário', index=False)
+        filial = self.branch_codes.get(self.loja_var.get(), 'DESCONHECIDO')
+        caminho = self._caminho_excel(filial)
 
+        def concluido(_):
             messagebox.showinfo(
                 "SUCESSO",
                 f"ARQUIVO ATUALIZADO COM SUCESSO!\nARQUIVO: {self.excel_file_path}"
@@ -336,12 +307,55 @@ class MixDiarioApp:
             # Limpa os dados após atualizar
             self.limpar_tudo()
 
-        except Exception as e:
+            # Compacta o diário mantendo apenas o que ainda não foi exportado
+            self.journal.compact(self.codigos)
+
+        def falhou(e):
             messagebox.showerror(
                 "ERRO",
                 f"ERRO AO ATUALIZAR O ARQUIVO: {str(e)}"
             )
 
+        # A leitura e regravação da planilha rodam em segundo plano
+        JobRunner().run_with_progress(
+            self.root, "Atualizando planilha do mix", self._gravar_excel,
+            caminho, list(self.codigos),
+            on_done=concluido, on_error=falhou, cancellable=False
+        )
+
+    def _caminho_excel(self, filial):
+        """Caminho do Excel do mix da filial na pasta do OneDrive"""
+        pasta = self.PASTAS_FILIAIS.get(filial)
+        if pasta is None:
+            print('Filial desconhecida')
+            return self.excel_file_path
+        return f'{user_diretorio}/OneDrive - Austral/{pasta}/Mix diário/{self.excel_file_path}'
+
+    @staticmethod
+    def _gravar_excel(job, caminho, codigos):
+        """Acrescenta os códigos à planilha existente (executado em segundo plano)"""
+        import pandas as pd
+
+        job.report(0, 2, "Lendo planilha existente...")
+
+        # Cria um DataFrame com os novos dados
+        df_new = pd.DataFrame(codigos)
+
+        # Tenta ler o arquivo existente
+        try:
+            df_existing = pd.read_excel(caminho)
+        except FileNotFoundError:
+            df_existing = pd.DataFrame(columns=['data', 'hora', 'filial', 'sku'])
+
+        # Concatena os dados existentes com os novos
+        df_combined = pd.concat([df_existing, df_new], ignore_index=True)
+
+        # Salva no arquivo
+        job.report(1, 2, "Gravando planilha...")
+        with pd.ExcelWriter(caminho, engine='openpyxl', mode='w') as writer:
+            df_combined.to_excel(writer, sheet_name='Mix Diário', index=False)
+        job.report(2, 2)
+
     def update_last_update_label(self):
         """Atualiza o label com a última ocorrência de atualização"""
         self.last_update_label.config(
@@ -351,29 +365,26 @@ class MixDiarioApp:
         # Salva a última atualização nas configurações
         self.config.set('mix_diario.last_update', self.last_update)
 
-    def save_progress(self):
-        """Salva o progresso atual"""
-        self.config.set('mix_diario.temp_data', {
-            # Não salvar a loja selecionada
-            'codigos': self.codigos
-        })
-
-        if hasattr(self, 'last_update'):
-            self.config.set('mix_diario.last_update', self.last_update)
-
     def load_temp_data(self):
-        """Carrega dados temporários sem selecionar a loja"""
-        temp_data = self.config.get('mix_diario.temp_data', {})
-        
-        # Carrega códigos temporários
-        for codigo in temp_data.get('codigos', []):
+        """Recupera a sessão em andamento reproduzindo o diário de leituras"""
+        codigos = self.journal.replay()
+
+        # Migra dados temporários antigos gravados no config.json
+        temp_data = self.config.get('mix_diario.temp_data')
+        if temp_data is not None:
+            if not codigos:
+                codigos = list(temp_data.get('codigos', []))
+                self.journal.compact(codigos)
+            self.config.remove('mix_diario.temp_data')
+
+        for codigo in codigos:
             self.tree.insert('', 'end', values=(
                 codigo['data'],
                 codigo['hora'],
                 codigo['filial'],
                 codigo['sku']
             ))
-            self.codigos.append(codigo)
+        self.codigos.extend(codigos)
 
         self.last_update = self.config.get('mix_diario.last_update', 'NENHUMA')
         self.update_last_update_label()
@@ -0,0 +1,179 @@
+import tkinter as tk
+from tkinter import messagebox
+import ttkbootstrap as ttk
+import threading
+from datetime import datetime
+from config import ConfigManager
+from logger import AustralLogger, log_action
+from backup import BackupService, BackupError
+from integrity import verify_async
+from utils import FONT_TITLE, FONT_LABEL, UIHelper, setup_window_icon
+
+
+class RestoreApp:
+    """Lista os backups do banco, verifica a integridade e restaura um snapshot"""
+
+    POLL_MS = 200
+
+    def __init__(self, root):
+        self.root = root
+        self.root.title("SISTEMA AUSTRAL - BACKUPS E RESTAURAÇÃO")
+        self.config = ConfigManager()
+        self.logger = AustralLogger()
+        self.backup_service = BackupService()
+        self.snapshots = {}
+        self.pending = []  # (future ou thread, callback)
+
+        setup_window_icon(self.root)
+        self.setup_ui()
+        self.carregar_snapshots()
+        UIHelper.center_window(self.root, 820, 480)
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(main_frame, text="BACKUPS DO BANCO DE DADOS", font=FONT_TITLE).pack(pady=(0, 10))
+
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.tree = ttk.Treeview(
+            tree_frame,
+            columns=("DATA", "ARQUIVO", "TAMANHO", "INTEGRIDADE"),
+            show="headings",
+            selectmode="browse"
+        )
+        for col, width in (("DATA", 150), ("ARQUIVO", 260), ("TAMANHO", 100), ("INTEGRIDADE", 220)):
+            self.tree.heading(col, text=col, anchor="center")
+            self.tree.column(col, width=width, anchor="center")
+
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.status_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.status_var, font=FONT_LABEL).pack(fill=tk.X, pady=5)
+
+        action_frame = ttk.Frame(main_frame)
+        action_frame.pack(fill=tk.X)
+        action_frame.grid_columnconfigure((0, 1, 2, 3), weight=1)
+
+        ttk.Button(action_frame, text="BACKUP AGORA", command=self.backup_agora, style="primary.TButton").grid(row=0, column=0, padx=5, sticky='ew')
+        ttk.Button(action_frame, text="VERIFICAR", command=self.verificar_selecionado, style="info.TButton").grid(row=0, column=1, padx=5, sticky='ew')
+        ttk.Button(action_frame, text="RESTAURAR", command=self.restaurar_selecionado, style="danger.TButton").grid(row=0, column=2, padx=5, sticky='ew')
+        ttk.Button(action_frame, text="ATUALIZAR LISTA", command=self.carregar_snapshots, style="secondary.TButton").grid(row=0, column=3, padx=5, sticky='ew')
+
+    def carregar_snapshots(self):
+        """Preenche a lista com os backups disponíveis"""
+        self.tree.delete(*self.tree.get_children())
+        self.snapshots = {}
+        for snapshot in self.backup_service.list_snapshots():
+            criado_em = datetime.fromisoformat(snapshot['criado_em']).strftime('%d/%m/%Y %H:%M:%S')
+            tamanho = f"{snapshot.get('tamanho_arquivo', 0) / (1024 * 1024):.1f} MB"
+            item = self.tree.insert("", "end", values=(criado_em, snapshot['arquivo'], tamanho, "NÃO VERIFICADO"))
+            self.snapshots[item] = snapshot
+        self.status_var.set(f"{len(self.snapshots)} BACKUP(S) DISPONÍVEL(IS)")
+
+    def _selecionado(self):
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showwarning("Atenção", "Selecione um backup.")
+            return None, None
+        return selection[0], self.snapshots[selection[0]]
+
+    def _acompanhar(self, tarefa, callback):
+        """Acompanha uma tarefa em segundo plano sem bloquear a interface"""
+        self.pending.append((tarefa, callback))
+        if len(self.pending) == 1:
+            self.root.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        restantes = []
+        for tarefa, callback in self.pending:
+            concluida = tarefa.done() if hasattr(tarefa, 'done') else not tarefa.is_alive()
+            if concluida:
+                callback(tarefa)
+            else:
+                restantes.append((tarefa, callback))
+        self.pending = restantes
+        if self.pending and self.root.winfo_exists():
+            self.root.after(self.POLL_MS, self._poll)
+
+    @log_action("verify_backup")
+    def verificar_selecionado(self):
+        item, snapshot = self._selecionado()
+        if not item:
+            return
+        self.tree.set(item, "INTEGRIDADE", "VERIFICANDO...")
+
+        def concluido(future):
+            if not self.tree.exists(item):
+                return
+            try:
+                result = future.result()
+                texto = "OK" if result['ok'] else f"CORROMPIDO: {result['mensagens'][0]}"
+            except Exception as e:
+                texto = f"ERRO: {e}"
+            self.tree.set(item, "INTEGRIDADE", texto)
+
+        self._acompanhar(verify_async(str(snapshot['caminho']), quick=False), concluido)
+
+    @log_action("backup_now")
+    def backup_agora(self):
+        self.status_var.set("BACKUP EM ANDAMENTO...")
+        thread = self.backup_service.start_async()
+
+        def concluido(_):
+            self.carregar_snapshots()
+            self.status_var.set("BACKUP CONCLUÍDO")
+
+        self._acompanhar(thread, concluido)
+
+    @log_action("restore_backup")
+    def restaurar_selecionado(self):
+        item, snapshot = self._selecionado()
+        if not item:
+            return
+
+        if not messagebox.askyesno(
+            "Confirmar Restauração",
+            f"Restaurar o banco para o backup de {self.tree.set(item, 'DATA')}?\n\n"
+            "Todos os registros posteriores serão substituídos. Feche o sistema nos "
+            "outros terminais antes de continuar."
+        ):
+            return
+
+        resultado = {}
+
+        def worker():
+            try:
+                resultado['anterior'] = self.backup_service.restore_snapshot(snapshot['caminho'])
+            except BackupError as e:
+                resultado['erro'] = str(e)
+
+        def concluido(_):
+            if 'erro' in resultado:
+                self.status_var.set("RESTAURAÇÃO CANCELADA")
+                messagebox.showerror("Erro", resultado['erro'])
+            else:
+                self.status_var.set("RESTAURAÇÃO CONCLUÍDA")
+                anterior = resultado['anterior']
+                messagebox.showinfo(
+                    "Sucesso",
+                    "Banco restaurado com sucesso!\n"
+                    + (f"Cópia do banco anterior: {anterior}\n\n" if anterior else "\n")
+                    + "Feche e abra novamente as janelas abertas do sistema."
+                )
+
+        self.status_var.set("VERIFICANDO E RESTAURANDO...")
+        thread = threading.Thread(target=worker, name='austral-restore', daemon=True)
+        thread.start()
+        self._acompanhar(thread, concluido)
+
+
+if __name__ == "__main__":
+    root = ttk.Window(themename="litera")
+    app = RestoreApp(root)
+    root.mainloop()
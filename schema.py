@@ -0,0 +1,858 @@
+"""
+Esquema do banco de dados do sistema Austral.
+Concentra toda a DDL das tabelas e as migrações versionadas via PRAGMA user_version,
+sem depender dos módulos de interface.
+"""
+
+import argparse
+import logging
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger('austral.schema')
+
+
+def _migracao_001_tabelas_iniciais(cursor: sqlite3.Cursor) -> None:
+    """Cria as tabelas originais (defeitos, pedidos e users)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS defeitos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo_defeito TEXT,
+            codigo_produto TEXT,
+            descricao TEXT,
+            cor TEXT,
+            tamanho TEXT,
+            nome_cliente TEXT,
+            nome_vendedor TEXT,
+            data_defeito TEXT,
+            descricao_defeito TEXT,
+            observacoes TEXT,
+            loja TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pedidos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_faturamento TEXT,
+            responsavel_faturamento TEXT,
+            numero_pedido TEXT UNIQUE,
+            status TEXT DEFAULT 'Faturado',
+            data_envio TEXT,
+            responsavel_envio TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE,
+            password TEXT,
+            role TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP
+        )
+    ''')
+
+
+def _migracao_002_indices(cursor: sqlite3.Cursor) -> None:
+    """Índices para os filtros e exportações de defeitos e pedidos"""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_defeitos_codigo_data ON defeitos (codigo_produto, data_defeito)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_defeitos_loja_data ON defeitos (loja, data_defeito)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_defeitos_tipo_data ON defeitos (tipo_defeito, data_defeito)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_defeitos_data ON defeitos (data_defeito)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pedidos_status_data ON pedidos (status, data_faturamento)')
+
+    # Metadados de manutenção compartilhados entre os terminais
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS metadados (
+            chave TEXT PRIMARY KEY,
+            valor TEXT
+        )
+    ''')
+    cursor.execute('ANALYZE')
+    cursor.execute(
+        "INSERT OR REPLACE INTO metadados (chave, valor) VALUES ('ultimo_analyze', ?)",
+        (datetime.now().isoformat(timespec='seconds'),)
+    )
+
+
+def _migracao_003_busca_defeitos(cursor: sqlite3.Cursor) -> None:
+    """Índice de busca textual (FTS5) dos defeitos, mantido por triggers"""
+    # Tabela FTS com conteúdo próprio (rowid = defeitos.id); remove_diacritics
+    # permite encontrar "ZÍPER" buscando "ziper"
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS defeitos_fts USING fts5(
+            descricao,
+            descricao_defeito,
+            observacoes,
+            nome_cliente,
+            codigo_produto,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    ''')
+    # Pesos do bm25 por coluna, usados por ORDER BY rank
+    cursor.execute(
+        "INSERT INTO defeitos_fts (defeitos_fts, rank) VALUES ('rank', 'bm25(2.0, 2.0, 1.0, 0.5, 3.0)')"
+    )
+    cursor.execute('''
+        INSERT INTO defeitos_fts (rowid, descricao, descricao_defeito, observacoes, nome_cliente, codigo_produto)
+        SELECT id, descricao, descricao_defeito, observacoes, nome_cliente, codigo_produto FROM defeitos
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS defeitos_fts_ai AFTER INSERT ON defeitos BEGIN
+            INSERT INTO defeitos_fts (rowid, descricao, descricao_defeito, observacoes, nome_cliente, codigo_produto)
+            VALUES (new.id, new.descricao, new.descricao_defeito, new.observacoes, new.nome_cliente, new.codigo_produto);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS defeitos_fts_ad AFTER DELETE ON defeitos BEGIN
+            DELETE FROM defeitos_fts WHERE rowid = old.id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS defeitos_fts_au
+        AFTER UPDATE OF descricao, descricao_defeito, observacoes, nome_cliente, codigo_produto ON defeitos
+        BEGIN
+            UPDATE defeitos_fts SET
+                descricao = new.descricao,
+                descricao_defeito = new.descricao_defeito,
+                observacoes = new.observacoes,
+                nome_cliente = new.nome_cliente,
+                codigo_produto = new.codigo_produto
+            WHERE rowid = new.id;
+        END
+    ''')
+
+
+# Dimensões do resumo de defeitos: nome -> expressão SQL sobre a linha ({row} = new/old)
+_MES_DEFEITO = (
+    "CASE WHEN {row}.data_defeito LIKE '__/__/____' "
+    "THEN substr({row}.data_defeito, 7, 4) || '-' || substr({row}.data_defeito, 4, 2) "
+    "ELSE substr({row}.data_defeito, 1, 7) END"
+)
+_DIMENSOES_RESUMO_V1 = {
+    'categoria': "COALESCE({row}.descricao_defeito, '')",
+    'loja': "COALESCE({row}.loja, '')",
+    'produto': "COALESCE({row}.codigo_produto, '')",
+    'mes': f"COALESCE({_MES_DEFEITO}, '')",
+    'mes_categoria': f"COALESCE({_MES_DEFEITO}, '') || '|' || COALESCE({{row}}.descricao_defeito, '')",
+}
+
+
+def _criar_triggers_resumo(cursor: sqlite3.Cursor, dimensoes: Dict[str, str],
+                           colunas: Sequence[str]) -> None:
+    """
+    Cria os triggers que mantêm defeitos_resumo a cada inclusão, alteração e
+    exclusão em defeitos
+
+    Args:
+        cursor: Cursor da migração
+        dimensoes: Nome da dimensão -> expressão SQL com {row}
+        colunas: Colunas de defeitos usadas pelas expressões (disparam o UPDATE)
+    """
+    def incrementa(row: str) -> str:
+        return "\n".join(
+            f"INSERT INTO defeitos_resumo (dimensao, chave, total) "
+            f"VALUES ('{nome}', {expr.format(row=row)}, 1) "
+            f"ON CONFLICT (dimensao, chave) DO UPDATE SET total = total + 1;"
+            for nome, expr in dimensoes.items()
+        )
+
+    def decrementa(row: str) -> str:
+        return "\n".join(
+            f"UPDATE defeitos_resumo SET total = total - 1 "
+            f"WHERE dimensao = '{nome}' AND chave = {expr.format(row=row)};"
+            for nome, expr in dimensoes.items()
+        ) + "\nDELETE FROM defeitos_resumo WHERE total <= 0;"
+
+    cursor.execute(f"""
+        CREATE TRIGGER defeitos_resumo_ai AFTER INSERT ON defeitos BEGIN
+            {incrementa('new')}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER defeitos_resumo_ad AFTER DELETE ON defeitos BEGIN
+            {decrementa('old')}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER defeitos_resumo_au AFTER UPDATE OF {', '.join(colunas)} ON defeitos BEGIN
+            {decrementa('old')}
+            {incrementa('new')}
+        END
+    """)
+
+
+def _preencher_resumo(cursor: sqlite3.Cursor, dimensoes: Dict[str, str], origem: str) -> None:
+    """Recalcula defeitos_resumo a partir da tabela (ou junção) origem, com alias d"""
+    cursor.execute('DELETE FROM defeitos_resumo')
+    for nome, expr in dimensoes.items():
+        chave = expr.format(row='d')
+        cursor.execute(f"""
+            INSERT INTO defeitos_resumo (dimensao, chave, total)
+            SELECT '{nome}', {chave}, COUNT(*) FROM {origem} GROUP BY {chave}
+        """)
+
+
+def _migracao_004_resumo_defeitos(cursor: sqlite3.Cursor) -> None:
+    """Contagens de defeitos por categoria, loja, produto e mês, mantidas por triggers"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS defeitos_resumo (
+            dimensao TEXT NOT NULL,
+            chave TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (dimensao, chave)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_resumo_total ON defeitos_resumo (dimensao, total DESC)')
+    _preencher_resumo(cursor, _DIMENSOES_RESUMO_V1, 'defeitos d')
+    _criar_triggers_resumo(
+        cursor, _DIMENSOES_RESUMO_V1,
+        ('descricao_defeito', 'loja', 'codigo_produto', 'data_defeito')
+    )
+
+
+# Taxonomia de defeitos publicada na migração 005 (grupo -> tipos, na ordem
+# exibida). Alterações posteriores vão direto nas tabelas de referência.
+_TAXONOMIA_INICIAL: List[Tuple[str, List[str]]] = [
+    ('DEFEITOS EM PEÇAS NOVAS', [
+        '1. FUROS EM PEÇA NOVA',
+        '2. MANCHA EM PEÇA NOVA',
+        '3. FIO PUXADO EM PEÇA NOVA',
+        '4. COSTURA TORTA',
+        '5. COSTURA FROUXA',
+        '6. COSTURA ROMPIDA',
+        '7. ACABAMENTO IRREGULAR - SOBRAS DE LINHAS',
+        '8. ACABAMENTO IRREGULAR - SOBRAS DE TECIDO',
+        '9. ACABAMENTO IRREGULAR - PONTO SOLTO',
+        '10. TECIDO TRANSPARENTE',
+        '11. TECIDO COM FALHA DE TECELAGEM',
+        '12. TECIDO COM FALHA DE TINGIMENTO',
+        '13. TAMANHO INCORRETO',
+        '14. ETIQUETA FALTANDO',
+        '15. ETIQUETA COM INFORMAÇÃO INCORRETA',
+        '16. ETIQUETA MAL POSICIONADA',
+        '17. BOTÃO DIFERENTE DO PADRÃO',
+        '18. BOTÃO MAL POSICIONADO',
+        '19. ZÍPER QUEBRADO',
+        '20. ZÍPER TRAVANDO',
+        '21. BARRA SOLTA',
+        '22. BARRA TORTA',
+        '23. BARRA DESALINHADA',
+        '24. PRODUTO TROCADO',
+        '25. PRODUTO INCOMPLETO',
+    ]),
+    ('DEFEITOS EM AVIAMENTOS E ACABAMENTOS', [
+        '26. APLICAÇÃO SOLTANDO',
+        '27. APLICAÇÃO MAL POSICIONADA',
+        '28. APLICAÇÃO COM DEFEITO',
+        '29. FALTA DE AVIAMENTOS',
+        '30. AVIAMENTOS INCORRETOS',
+        '31. AVIAMENTOS DANIFICADOS',
+        '32. DEFEITO NA ESTAMPA - RACHADURA',
+        '33. DEFEITO NA ESTAMPA - DESBOTAMENTO',
+        '34. DEFEITO NA ESTAMPA - DESCASCAMENTO',
+        '35. DEFEITO NA ESTAMPA - MANCHAS',
+        '36. DEFEITO NO BORDADO - FALHAS',
+        '37. DEFEITO NO BORDADO - PONTOS SOLTOS',
+        '38. DEFEITO NO BORDADO - DESALINHAMENTO',
+        '39. DEFEITO NO FORRO - COSTURA',
+        '40. DEFEITO NO FORRO - MATERIAL',
+    ]),
+    ('DEFEITOS APÓS USO E LAVAGEM', [
+        '41. PILLING OU BOLINHAS',
+        '42. PENUGEM APÓS LAVAGEM',
+        '43. FURO APÓS USO',
+        '44. FURO APÓS LAVAGEM',
+        '45. MANCHA APÓS USO',
+        '46. MANCHA APÓS LAVAGEM',
+        '47. PEÇA DESCOSTURADA APÓS USO',
+        '48. PEÇA DESCOSTURADA APÓS LAVAGEM',
+        '49. DESBOTAMENTO APÓS USO',
+        '50. DESBOTAMENTO APÓS LAVAGEM',
+        '51. DESCOLORAÇÃO APÓS USO',
+        '52. DESCOLORAÇÃO APÓS LAVAGEM',
+        '53. MIGRAÇÃO DE COR',
+        '54. BOTÃO CAINDO',
+        '55. ENCOLHIMENTO APÓS LAVAGEM',
+        '56. ENCOLHIMENTO IRREGULAR',
+        '57. DEFORMAÇÃO APÓS LAVAGEM',
+    ]),
+    ('DEFEITOS POR CONDIÇÕES ESPECÍFICAS', [
+        '58. DEFEITO APÓS LAVAGEM E SECAGEM',
+        '59. DEFEITO APÓS LAVAGEM E PASSAGEM',
+        '60. DEFEITO APÓS ARMAZENAMENTO',
+        '61. DEFEITO APÓS EXPOSIÇÃO AO SOL',
+        '62. DEFEITO APÓS EXPOSIÇÃO À UMIDADE',
+        '63. DESGASTE PRECOCE DO TECIDO',
+        '64. DESGASTE IRREGULAR',
+        '65. DESGASTE EM COSTURA',
+    ]),
+    ('DEFEITOS DE ODOR E CONSERVAÇÃO', [
+        '66. MAU CHEIRO PERSISTENTE',
+        '67. MAU CHEIRO APÓS LAVAGEM',
+        '68. MOFO',
+        '69. MANCHAS DE UMIDADE',
+        '70. AMARELAMENTO DO TECIDO',
+    ]),
+    ('DEFEITOS ESTRUTURAIS', [
+        '71. MODELAGEM INCORRETA',
+        '72. PROPORÇÕES INCORRETAS',
+        '73. CAIMENTO IRREGULAR',
+        '74. ASSIMETRIA',
+        '75. DEFEITO NA ESTRUTURA DO TECIDO',
+    ]),
+    ('DEFEITOS EM DETALHES E ACESSÓRIOS', [
+        '76. DETALHE DESCOLADO',
+        '77. DETALHE QUEBRADO',
+        '78. DETALHE MAL POSICIONADO',
+        '79. ACESSÓRIO DANIFICADO',
+        '80. ACESSÓRIO FALTANTE',
+    ]),
+    ('DEFEITOS DE ACABAMENTO ESPECIAL', [
+        '81. DEFEITO EM LAVANDERIA',
+        '82. DEFEITO EM TINGIMENTO',
+        '83. DEFEITO EM ESTAMPARIA',
+        '84. DEFEITO EM BORDADO INDUSTRIAL',
+        '85. DEFEITO EM TERMOCOLANTE',
+    ]),
+    ('DEFEITOS DE CARACTERÍSTICAS FUNCIONAIS', [
+        '86. PERDA DE ELASTICIDADE',
+        '87. PERDA DE FORMA',
+        '88. PERDA DE TEXTURA',
+        '89. PERDA DE BRILHO',
+        '90. FALHA NO ACABAMENTO ANTÍPILLING',
+    ]),
+    ('OUTROS DEFEITOS', [
+        '91. FALHA NA COSTURA DECORATIVA',
+        '92. FALHA NO ACABAMENTO IMPERMEÁVEL',
+        '93. FALHA NO ACABAMENTO UV',
+        '94. DEFEITO EM PEDRARIA',
+        '95. DEFEITO EM APLICAÇÕES METÁLICAS',
+    ]),
+]
+_ORIGENS_INICIAIS = ['CLIENTE', 'LOJA', 'UNIFORME']
+_TAMANHOS_INICIAIS = [
+    'ÚNICO', 'XPP', 'PP', 'P', 'M', 'G', 'GG', 'XGG', '36', '38', '40', '42', '44', '46', '48',
+    '38-39', '40-41', '42-43', '44-45', '36-37', '34-35'
+]
+
+# Rótulo do tipo de defeito de uma linha de defeitos ({row} = new/old/d)
+_ROTULO_TIPO = "(SELECT rotulo FROM defeito_tipos WHERE id = {row}.tipo_id)"
+
+_DIMENSOES_RESUMO_V2 = {
+    'categoria': "COALESCE({row}.tipo_id, '')",
+    'origem': "COALESCE({row}.origem_id, '')",
+    'loja': "COALESCE({row}.loja, '')",
+    'produto': "COALESCE({row}.codigo_produto, '')",
+    'mes': f"COALESCE({_MES_DEFEITO}, '')",
+    'mes_categoria': f"COALESCE({_MES_DEFEITO}, '') || '|' || COALESCE({{row}}.tipo_id, '')",
+}
+
+
+def _migracao_005_taxonomia(cursor: sqlite3.Cursor) -> None:
+    """
+    Tabelas de referência para grupo, tipo, origem e tamanho dos defeitos.
+    Reconstrói defeitos com chaves inteiras no lugar dos textos; rótulos
+    antigos que não constam da taxonomia são acrescentados a ela.
+    """
+    cursor.execute('''
+        CREATE TABLE defeito_grupos (
+            id INTEGER PRIMARY KEY,
+            nome TEXT NOT NULL UNIQUE,
+            ordem INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE defeito_tipos (
+            id INTEGER PRIMARY KEY,
+            rotulo TEXT NOT NULL UNIQUE,
+            grupo_id INTEGER REFERENCES defeito_grupos (id),
+            ordem INTEGER NOT NULL DEFAULT 0,
+            ativo INTEGER NOT NULL DEFAULT 1
+        )
+    ''')
+    for tabela in ('defeito_origens', 'tamanhos'):
+        cursor.execute(f'''
+            CREATE TABLE {tabela} (
+                id INTEGER PRIMARY KEY,
+                nome TEXT NOT NULL UNIQUE,
+                ordem INTEGER NOT NULL DEFAULT 0,
+                ativo INTEGER NOT NULL DEFAULT 1
+            )
+        ''')
+
+    ordem = 0
+    for grupo_ordem, (grupo, tipos) in enumerate(_TAXONOMIA_INICIAL, start=1):
+        cursor.execute(
+            'INSERT INTO defeito_grupos (id, nome, ordem) VALUES (?, ?, ?)',
+            (grupo_ordem, grupo, grupo_ordem)
+        )
+        for rotulo in tipos:
+            ordem += 1
+            # O código numérico do rótulo ("19. ZÍPER QUEBRADO") vira o id
+            cursor.execute(
+                'INSERT INTO defeito_tipos (id, rotulo, grupo_id, ordem) VALUES (?, ?, ?, ?)',
+                (int(rotulo.split('.', 1)[0]), rotulo, grupo_ordem, ordem)
+            )
+    cursor.executemany(
+        'INSERT INTO defeito_origens (nome, ordem) VALUES (?, ?)',
+        [(nome, idx) for idx, nome in enumerate(_ORIGENS_INICIAIS, start=1)]
+    )
+    cursor.executemany(
+        'INSERT INTO tamanhos (nome, ordem) VALUES (?, ?)',
+        [(nome, idx) for idx, nome in enumerate(_TAMANHOS_INICIAIS, start=1)]
+    )
+
+    # Rótulos gravados que não fazem parte da taxonomia (texto livre, versões antigas),
+    # depois dos valores iniciais e em ordem alfabética
+    for tabela, coluna_ref, coluna in (('defeito_tipos', 'rotulo', 'descricao_defeito'),
+                                       ('defeito_origens', 'nome', 'tipo_defeito'),
+                                       ('tamanhos', 'nome', 'tamanho')):
+        cursor.execute(f'''
+            INSERT INTO {tabela} ({coluna_ref}, ordem)
+            SELECT legado.rotulo, base.ordem + ROW_NUMBER() OVER (ORDER BY legado.rotulo)
+            FROM (
+                SELECT DISTINCT {coluna} AS rotulo FROM defeitos
+                WHERE {coluna} IS NOT NULL AND {coluna} != ''
+                  AND {coluna} NOT IN (SELECT {coluna_ref} FROM {tabela})
+            ) legado,
+            (SELECT COALESCE(MAX(ordem), 0) + 1000 AS ordem FROM {tabela}) base
+        ''')
+
+    sequencia = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'defeitos'").fetchone()
+
+    cursor.execute('''
+        CREATE TABLE defeitos_v5 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            origem_id INTEGER REFERENCES defeito_origens (id),
+            codigo_produto TEXT,
+            descricao TEXT,
+            cor TEXT,
+            tamanho_id INTEGER REFERENCES tamanhos (id),
+            nome_cliente TEXT,
+            nome_vendedor TEXT,
+            data_defeito TEXT,
+            tipo_id INTEGER REFERENCES defeito_tipos (id),
+            observacoes TEXT,
+            loja TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO defeitos_v5 (
+            id, origem_id, codigo_produto, descricao, cor, tamanho_id, nome_cliente,
+            nome_vendedor, data_defeito, tipo_id, observacoes, loja, created_at, updated_at
+        )
+        SELECT d.id, o.id, d.codigo_produto, d.descricao, d.cor, tm.id, d.nome_cliente,
+               d.nome_vendedor, d.data_defeito, t.id, d.observacoes, d.loja, d.created_at, d.updated_at
+        FROM defeitos d
+        LEFT JOIN defeito_origens o ON o.nome = d.tipo_defeito
+        LEFT JOIN tamanhos tm ON tm.nome = d.tamanho
+        LEFT JOIN defeito_tipos t ON t.rotulo = d.descricao_defeito
+    ''')
+    # Remove junto os índices e triggers da tabela antiga
+    cursor.execute('DROP TABLE defeitos')
+    cursor.execute('ALTER TABLE defeitos_v5 RENAME TO defeitos')
+    if sequencia:
+        # Preserva a numeração mesmo que os últimos registros (ou todos) tenham sido
+        # excluídos; sem linhas copiadas a tabela nova ainda não tem sequência
+        if cursor.execute("SELECT 1 FROM sqlite_sequence WHERE name = 'defeitos'").fetchone():
+            cursor.execute(
+                "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'defeitos'",
+                (sequencia[0],)
+            )
+        else:
+            cursor.execute(
+                "INSERT INTO sqlite_sequence (name, seq) VALUES ('defeitos', ?)",
+                (sequencia[0],)
+            )
+
+    cursor.execute('CREATE INDEX idx_defeitos_codigo_data ON defeitos (codigo_produto, data_defeito)')
+    cursor.execute('CREATE INDEX idx_defeitos_loja_data ON defeitos (loja, data_defeito)')
+    cursor.execute('CREATE INDEX idx_defeitos_origem_data ON defeitos (origem_id, data_defeito)')
+    cursor.execute('CREATE INDEX idx_defeitos_tipo_data ON defeitos (tipo_id, data_defeito)')
+    cursor.execute('CREATE INDEX idx_defeitos_data ON defeitos (data_defeito)')
+    cursor.execute('CREATE INDEX idx_defeito_tipos_grupo ON defeito_tipos (grupo_id)')
+
+    # Busca textual: o rótulo do tipo continua indexado em descricao_defeito.
+    # Os rowids não mudaram, então o conteúdo atual de defeitos_fts segue válido.
+    cursor.execute(f'''
+        CREATE TRIGGER defeitos_fts_ai AFTER INSERT ON defeitos BEGIN
+            INSERT INTO defeitos_fts (rowid, descricao, descricao_defeito, observacoes, nome_cliente, codigo_produto)
+            VALUES (new.id, new.descricao, {_ROTULO_TIPO.format(row='new')}, new.observacoes,
+                    new.nome_cliente, new.codigo_produto);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER defeitos_fts_ad AFTER DELETE ON defeitos BEGIN
+            DELETE FROM defeitos_fts WHERE rowid = old.id;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER defeitos_fts_au
+        AFTER UPDATE OF descricao, tipo_id, observacoes, nome_cliente, codigo_produto ON defeitos
+        BEGIN
+            UPDATE defeitos_fts SET
+                descricao = new.descricao,
+                descricao_defeito = {_ROTULO_TIPO.format(row='new')},
+                observacoes = new.observacoes,
+                nome_cliente = new.nome_cliente,
+                codigo_produto = new.codigo_produto
+            WHERE rowid = new.id;
+        END
+    ''')
+    # Renomear um tipo reindexa apenas os defeitos daquele tipo
+    cursor.execute('''
+        CREATE TRIGGER defeito_tipos_fts_au AFTER UPDATE OF rotulo ON defeito_tipos BEGIN
+            UPDATE defeitos_fts SET descricao_defeito = new.rotulo
+            WHERE rowid IN (SELECT id FROM defeitos WHERE tipo_id = new.id);
+        END
+    ''')
+
+    # Resumo passa a ser agrupado pelas chaves inteiras
+    _preencher_resumo(cursor, _DIMENSOES_RESUMO_V2, 'defeitos d')
+    _criar_triggers_resumo(
+        cursor, _DIMENSOES_RESUMO_V2,
+        ('tipo_id', 'origem_id', 'loja', 'codigo_produto', 'data_defeito')
+    )
+    cursor.execute('ANALYZE')
+
+
+def _migracao_006_datas_pedidos(cursor: sqlite3.Cursor) -> None:
+    """Datas dos pedidos em ISO (aaaa-mm-dd), comparáveis e ordenáveis como texto"""
+    for coluna in ('data_faturamento', 'data_envio'):
+        cursor.execute(f'''
+            UPDATE pedidos
+            SET {coluna} = substr({coluna}, 7, 4) || '-' || substr({coluna}, 4, 2) || '-' || substr({coluna}, 1, 2)
+            WHERE {coluna} LIKE '__/__/____'
+        ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pedidos_data ON pedidos (data_faturamento)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pedidos_envio ON pedidos (data_envio)')
+
+
+def _horario_evento(coluna: str) -> str:
+    """Expressão SQL do horário de um evento: a data da coluna, se anterior a hoje, ou agora"""
+    return (f"CASE WHEN date({coluna}) < date('now', 'localtime') THEN datetime({coluna}) "
+            f"ELSE datetime('now', 'localtime') END")
+
+
+def _migracao_007_eventos_pedidos(cursor: sqlite3.Cursor) -> None:
+    """
+    Loja de origem dos pedidos e histórico (somente inclusão) das mudanças de
+    status em pedido_eventos, gravado por triggers
+    """
+    cursor.execute('ALTER TABLE pedidos ADD COLUMN loja TEXT')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pedido_eventos (
+            id INTEGER PRIMARY KEY,
+            pedido_id INTEGER NOT NULL,
+            numero_pedido TEXT,
+            status_anterior TEXT,
+            status TEXT NOT NULL,
+            usuario TEXT,
+            loja TEXT,
+            ocorrido_em TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_eventos_pedido ON pedido_eventos (pedido_id, status, ocorrido_em)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_eventos_status_data ON pedido_eventos (status, ocorrido_em)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pedidos_loja ON pedidos (loja)')
+
+    # Histórico dos pedidos existentes, com as datas que eles já registram
+    # (em data e hora, no mesmo formato dos eventos gravados pelos triggers)
+    cursor.execute('''
+        INSERT INTO pedido_eventos (pedido_id, numero_pedido, status_anterior, status, usuario, loja, ocorrido_em)
+        SELECT id, numero_pedido, NULL, 'Faturado', responsavel_faturamento, loja,
+               COALESCE(datetime(data_faturamento), data_faturamento)
+        FROM pedidos WHERE data_faturamento IS NOT NULL
+    ''')
+    cursor.execute('''
+        INSERT INTO pedido_eventos (pedido_id, numero_pedido, status_anterior, status, usuario, loja, ocorrido_em)
+        SELECT id, numero_pedido, 'Faturado', status, responsavel_envio, loja,
+               COALESCE(datetime(data_envio), data_envio)
+        FROM pedidos WHERE status IS NOT 'Faturado' AND data_envio IS NOT NULL
+    ''')
+
+    # Pedidos incluídos com data anterior a hoje (importações) registram os
+    # eventos nas datas do pedido, e os já enviados também o faturamento;
+    # os incluídos hoje registram o horário da inclusão.
+    faturado_em = _horario_evento('new.data_faturamento')
+    enviado_em = _horario_evento('new.data_envio')
+    cursor.execute(f'''
+        CREATE TRIGGER pedidos_eventos_ai AFTER INSERT ON pedidos BEGIN
+            INSERT INTO pedido_eventos (pedido_id, numero_pedido, status_anterior, status, usuario, loja, ocorrido_em)
+            SELECT new.id, new.numero_pedido, NULL, 'Faturado', new.responsavel_faturamento, new.loja,
+                   {faturado_em}
+            WHERE new.status = 'Enviado';
+            INSERT INTO pedido_eventos (pedido_id, numero_pedido, status_anterior, status, usuario, loja, ocorrido_em)
+            VALUES (new.id, new.numero_pedido,
+                    CASE WHEN new.status = 'Enviado' THEN 'Faturado' END,
+                    COALESCE(new.status, 'Faturado'),
+                    CASE WHEN new.status = 'Enviado' THEN new.responsavel_envio
+                         ELSE new.responsavel_faturamento END,
+                    new.loja,
+                    CASE WHEN new.status = 'Enviado' THEN {enviado_em} ELSE {faturado_em} END);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER pedidos_eventos_au AFTER UPDATE OF status ON pedidos
+        WHEN old.status IS NOT new.status
+        BEGIN
+            INSERT INTO pedido_eventos (pedido_id, numero_pedido, status_anterior, status, usuario, loja)
+            VALUES (new.id, new.numero_pedido, old.status, new.status,
+                    CASE WHEN new.status = 'Enviado' THEN new.responsavel_envio
+                         ELSE new.responsavel_faturamento END,
+                    new.loja);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER pedidos_eventos_ad AFTER DELETE ON pedidos BEGIN
+            INSERT INTO pedido_eventos (pedido_id, numero_pedido, status_anterior, status, usuario, loja)
+            VALUES (old.id, old.numero_pedido, old.status, 'Excluído', NULL, old.loja);
+        END
+    ''')
+    # O histórico não pode ser alterado nem apagado
+    for operacao in ('UPDATE', 'DELETE'):
+        cursor.execute(f'''
+            CREATE TRIGGER pedido_eventos_somente_inclusao_{operacao.lower()}
+            BEFORE {operacao} ON pedido_eventos BEGIN
+                SELECT RAISE(ABORT, 'pedido_eventos aceita apenas inclusões');
+            END
+        ''')
+
+
+# Migrações em ordem; a versão do esquema é a posição na lista (1, 2, ...).
+# Nunca altere uma migração já publicada: acrescente uma nova ao final.
+MIGRATIONS: List[Callable[[sqlite3.Cursor], None]] = [
+    _migracao_001_tabelas_iniciais,
+    _migracao_002_indices,
+    _migracao_003_busca_defeitos,
+    _migracao_004_resumo_defeitos,
+    _migracao_005_taxonomia,
+    _migracao_006_datas_pedidos,
+    _migracao_007_eventos_pedidos,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    """Retorna a versão atual do esquema gravada no banco"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection,
+            migrations: Optional[List[Callable[[sqlite3.Cursor], None]]] = None) -> int:
+    """
+    Aplica as migrações pendentes, cada uma em sua própria transação
+
+    Args:
+        conn: Conexão aberta com o banco
+        migrations: Lista de migrações do banco (padrão: MIGRATIONS)
+
+    Returns:
+        int: Versão do esquema após a migração
+    """
+    migrations = MIGRATIONS if migrations is None else migrations
+    version = get_version(conn)
+    if version > len(migrations):
+        logger.warning(
+            f"Banco na versão {version}, mais nova que a suportada ({len(migrations)})"
+        )
+        return version
+
+    for numero in range(version + 1, len(migrations) + 1):
+        migracao = migrations[numero - 1]
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            # Outro terminal pode ter migrado enquanto aguardávamos o bloqueio
+            if get_version(conn) >= numero:
+                cursor.execute('COMMIT')
+                continue
+            migracao(cursor)
+            cursor.execute(f'PRAGMA user_version = {numero}')
+            cursor.execute('COMMIT')
+            logger.info(f"Migração {numero} aplicada: {migracao.__name__}")
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+
+    return get_version(conn)
+
+
+def ensure_schema(db_path: str) -> int:
+    """
+    Garante que o banco esteja na versão atual do esquema.
+    Quando já está atualizado, custa apenas a leitura do PRAGMA user_version.
+
+    Args:
+        db_path: Caminho do arquivo do banco
+
+    Returns:
+        int: Versão do esquema
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        if get_version(conn) == SCHEMA_VERSION:
+            return SCHEMA_VERSION
+        return migrate(conn)
+    finally:
+        conn.close()
+
+
+def optimize(conn: sqlite3.Connection, analyze_interval_days: int = 7) -> bool:
+    """
+    Mantém as estatísticas do planejador atualizadas.
+    Executa PRAGMA optimize sempre e um ANALYZE completo quando o último
+    tem mais de analyze_interval_days dias.
+
+    Returns:
+        bool: True se um ANALYZE completo foi executado
+    """
+    row = conn.execute("SELECT valor FROM metadados WHERE chave = 'ultimo_analyze'").fetchone()
+    ultimo = datetime.fromisoformat(row[0]) if row else None
+
+    executou_analyze = False
+    if ultimo is None or datetime.now() - ultimo >= timedelta(days=analyze_interval_days):
+        conn.execute('ANALYZE')
+        conn.execute(
+            "INSERT OR REPLACE INTO metadados (chave, valor) VALUES ('ultimo_analyze', ?)",
+            (datetime.now().isoformat(timespec='seconds'),)
+        )
+        executou_analyze = True
+
+    conn.execute('PRAGMA optimize')
+    return executou_analyze
+
+
+# Consultas principais do sistema, usadas para inspecionar os planos de execução
+MAIN_QUERIES: Dict[str, Tuple[str, Sequence[Any]]] = {
+    'defeitos_lista': (
+        '''SELECT id, origem_id, codigo_produto, descricao, nome_vendedor, data_defeito,
+                  cor, tamanho_id, loja, observacoes
+           FROM defeitos ORDER BY id DESC''',
+        ()
+    ),
+    'defeitos_por_produto': (
+        'SELECT id, data_defeito FROM defeitos WHERE codigo_produto = ? ORDER BY data_defeito',
+        ('000000',)
+    ),
+    'defeitos_por_loja_periodo': (
+        'SELECT id FROM defeitos WHERE loja = ? AND data_defeito BETWEEN ? AND ?',
+        ('AUSTRAL MORUMBI', '2024-01-01', '2024-12-31')
+    ),
+    'defeitos_por_origem_periodo': (
+        'SELECT COUNT(*) FROM defeitos WHERE origem_id = ? AND data_defeito >= ?',
+        (1, '2024-01-01')
+    ),
+    'defeitos_por_grupo': (
+        '''SELECT t.grupo_id, COUNT(*) FROM defeitos d JOIN defeito_tipos t ON t.id = d.tipo_id
+           WHERE d.data_defeito BETWEEN ? AND ? GROUP BY t.grupo_id''',
+        ('2024-01-01', '2024-12-31')
+    ),
+    'defeitos_periodo': (
+        'SELECT id FROM defeitos WHERE data_defeito BETWEEN ? AND ?',
+        ('2024-01-01', '2024-12-31')
+    ),
+    'defeitos_busca': (
+        '''SELECT d.id FROM defeitos_fts f JOIN defeitos d ON d.id = f.rowid
+           WHERE defeitos_fts MATCH ? ORDER BY f.rank LIMIT 500''',
+        ('"ziper"*',)
+    ),
+    'resumo_top_produtos': (
+        'SELECT chave, total FROM defeitos_resumo WHERE dimensao = ? ORDER BY total DESC LIMIT 20',
+        ('produto',)
+    ),
+    'pedidos_lista': (
+        '''SELECT id, data_faturamento, responsavel_faturamento, numero_pedido, status,
+                  data_envio, responsavel_envio
+           FROM pedidos ORDER BY id DESC LIMIT 201''',
+        ()
+    ),
+    'pedidos_periodo': (
+        '''SELECT id FROM pedidos WHERE data_faturamento BETWEEN ? AND ?
+           ORDER BY id DESC LIMIT 201''',
+        ('2024-01-01', '2024-12-31')
+    ),
+    'pedidos_periodo_total': (
+        'SELECT COUNT(*) FROM pedidos WHERE data_faturamento BETWEEN ? AND ?',
+        ('2024-01-01', '2024-12-31')
+    ),
+    'pedidos_pendentes': (
+        'SELECT numero_pedido, data_faturamento FROM pedidos WHERE status = ? ORDER BY data_faturamento',
+        ('Faturado',)
+    ),
+    'pedido_por_numero': (
+        'SELECT id FROM pedidos WHERE numero_pedido = ?',
+        ('000000',)
+    ),
+}
+
+
+def explain(conn: sqlite3.Connection, sql: str, params: Sequence[Any] = ()) -> List[str]:
+    """Retorna o plano de execução (EXPLAIN QUERY PLAN) de uma consulta"""
+    rows = conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+    # Colunas: id, parent, notused, detail
+    depth = {0: 0}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, 0) + 1
+        lines.append('  ' * (depth[node_id] - 1) + detail)
+    return lines
+
+
+def explain_main_queries(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """Planos de execução de todas as consultas em MAIN_QUERIES"""
+    return {name: explain(conn, sql, params) for name, (sql, params) in MAIN_QUERIES.items()}
+
+
+def main():
+    from config import ConfigManager
+
+    parser = argparse.ArgumentParser(description='Esquema do banco de dados Austral')
+    parser.add_argument('action', choices=['version', 'migrate', 'optimize', 'plans'],
+                        help='Ação a ser executada')
+    parser.add_argument('--query', help='Nome de uma consulta de MAIN_QUERIES (apenas para plans)')
+
+    args = parser.parse_args()
+    db_path = ConfigManager().get('database.path', 'austral.db')
+
+    if args.action == 'migrate':
+        print(f"Esquema na versão {ensure_schema(db_path)}")
+        return
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        if args.action == 'version':
+            print(f"Versão do banco: {get_version(conn)} (suportada: {SCHEMA_VERSION})")
+
+        elif args.action == 'optimize':
+            ensure_schema(db_path)
+            analisou = optimize(conn, analyze_interval_days=0)
+            print("ANALYZE e PRAGMA optimize executados" if analisou else "PRAGMA optimize executado")
+
+        elif args.action == 'plans':
+            ensure_schema(db_path)
+            planos = explain_main_queries(conn)
+            if args.query:
+                if args.query not in planos:
+                    print(f"ERRO: Consulta '{args.query}' não encontrada!")
+                    return
+                planos = {args.query: planos[args.query]}
+            for name, lines in planos.items():
+                print(f"\n{name}")
+                print("-" * 80)
+                for line in lines:
+                    print(f"  {line}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -68,6 +68,20 @@ def create_executable():
         'tkinter.ttk',
         'tkinter.messagebox',
         'tkinter.filedialog',
+        # Ferramentas carregadas sob demanda por main_app.load_tool
+        'mix',
+        'delivery',
+        'transfer',
+        'mail',
+        'defects',
+        'analytics',
+        'taxonomy',
+        'sinoms',
+        'sinoms_metrics',
+        'inventory',
+        'simulador',
+        'restore',
+        'action_metrics',
     ]
     
     # Configurações do PyInstaller
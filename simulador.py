@@ -3,9 +3,8 @@ from ttkbootstrap.constants import *
 from datetime import datetime
 from tkinter import messagebox, simpledialog
 import tkinter as tk
-import pandas as pd
 from utils import UIHelper, setup_window_icon
-from logger import AustralLogger, log_action
+from logger import AustralLogger, log_action, SCAN_LOG_AGGREGATE_S
 from config import ConfigManager
 import os
 from PIL import Image, ImageDraw, ImageFont
@@ -65,6 +64,7 @@ class PontoDeVendaApp:
 
     def carregar_dados(self):
         try:
+            import pandas as pd
             file_path = r"C:\\Users\\geren\\Downloads\\data.xlsx"
             df = pd.read_excel(file_path)
             self.produto_precos = {
@@ -239,7 +239,7 @@ class PontoDeVendaApp:
         self.time_label.config(text=now)
         self.root.after(1000, self.update_time)
 
-    @log_action("add_product")
+    @log_action("add_product", aggregate=SCAN_LOG_AGGREGATE_S)
     def adicionar_produto(self, event=None):
         codigo = self.codigo_entry.get().strip().lower()
         quantidade = self.quantidade_entry.get().strip()
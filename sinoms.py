@@ -2,20 +2,41 @@ import tkinter as tk
 from tkinter import messagebox, simpledialog, filedialog
 import ttkbootstrap as ttk
 import sqlite3
-import pandas as pd
 from datetime import datetime
 from config import ConfigManager
 from logger import AustralLogger, log_action
 from utils import FONT_LABEL, FONT_ENTRY
 from utils import setup_window_icon
 from utils import UIHelper
+from schema import ensure_schema
+from database import DatabaseManager
+from virtual_tree import KeysetTreeview, DataVersionWatcher
+from exporter import export_query, ExportCancelled, FILETYPES
+from jobs import JobRunner, JobCancelled
+from lojas import lojas
+from taxonomy import PLACEHOLDERS
+import importer
 
 class PedidoSinOMSApp:
+    # Modo leitura: espera após a última leitura antes de gravar o lote
+    SCAN_FLUSH_MS = 400
+    # Leituras acumuladas que disparam a gravação imediata
+    SCAN_BATCH_SIZE = 50
+
     def __init__(self, root):
         self.root = root
         self.root.title("SISTEMA AUSTRAL - CONTROLE DE ENVIO DE PEDIDOS SINOMS")
         self.config = ConfigManager()
         self.logger = AustralLogger()
+        self.db = DatabaseManager()
+        # Loja deste terminal, gravada em cada pedido; escolhida uma vez na tela
+        self.loja = self.config.get('terminal.loja', '')
+        self.nomes_lojas = [loja['loja'] for loja in lojas]
+
+        # Números já cadastrados (recarregados com a lista) e leituras ainda não gravadas
+        self.numeros_existentes = set()
+        self.leituras_pendentes = []
+        self._leituras_after_id = None
 
         self.setup_database()
         setup_window_icon(self.root)
@@ -23,33 +44,20 @@ class PedidoSinOMSApp:
         self.carregar_dados()
         self.center_window()
 
-    @staticmethod
-    def setup_database_static(config):
-        """Método estático para configurar o banco de dados sem instanciar a classe."""
-        try:
-            db_path = config.get('database.path', 'austral.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-
-            # Criação da tabela 'pedidos'
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS pedidos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    data_faturamento TEXT,
-                    responsavel_faturamento TEXT,
-                    numero_pedido TEXT UNIQUE,
-                    status TEXT DEFAULT 'Faturado',
-                    data_envio TEXT,
-                    responsavel_envio TEXT
-                )
-            ''')
-            conn.commit()
-        except Exception as e:
-            # ... tratamento de erro existente ...
-            pass
-        finally:
-            if 'conn' in locals():
-                conn.close()
+        # Recarrega a lista apenas quando outro terminal grava no banco
+        self.watcher = DataVersionWatcher(self.root, self.carregar_dados)
+        self.watcher.start()
+        self.root.bind('<Destroy>', self._on_destroy, add='+')
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self.watcher.stop()
+            # Não perde leituras ainda no buffer ao fechar a janela
+            if self._leituras_after_id is not None:
+                self.root.after_cancel(self._leituras_after_id)
+                self._leituras_after_id = None
+            if self.leituras_pendentes:
+                self.gravar_leituras(atualizar_tela=False)
 
     def center_window(self):
         """Centraliza a janela principal no ecrã."""
@@ -62,27 +70,14 @@ class PedidoSinOMSApp:
 
     def setup_database(self):
         db_path = self.config.get('database.path', 'austral.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS pedidos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                data_faturamento TEXT,
-                responsavel_faturamento TEXT,
-                numero_pedido TEXT UNIQUE,
-                status TEXT DEFAULT 'Faturado',
-                data_envio TEXT,
-                responsavel_envio TEXT
-            )
-        ''')
-        conn.commit()
-        conn.close()
+        ensure_schema(db_path)
 
     def setup_ui(self):
         # Configuração da grade da janela principal
         self.root.grid_rowconfigure(0, weight=0)
-        self.root.grid_rowconfigure(1, weight=1)
-        self.root.grid_rowconfigure(2, weight=0)
+        self.root.grid_rowconfigure(1, weight=0)
+        self.root.grid_rowconfigure(2, weight=1)
+        self.root.grid_rowconfigure(3, weight=0)
         self.root.grid_columnconfigure(0, weight=1)
 
         # Área de entrada de dados (Topo)
@@ -103,129 +98,367 @@ class PedidoSinOMSApp:
         self.numero_pedido_entry = ttk.Entry(entry_frame, font=FONT_ENTRY)
         self.numero_pedido_entry.grid(row=0, column=3, padx=5, pady=5, sticky="w")
 
+        ttk.Label(entry_frame, text="LOJA:", font=FONT_LABEL).grid(row=0, column=4, padx=5, pady=5, sticky="e")
+        self.loja_combo = ttk.Combobox(
+            entry_frame, values=[PLACEHOLDERS['loja'], *self.nomes_lojas],
+            font=FONT_ENTRY, width=24, state='readonly'
+        )
+        self.loja_combo.set(self.loja if self.loja in self.nomes_lojas else PLACEHOLDERS['loja'])
+        self.loja_combo.bind('<<ComboboxSelected>>', self.selecionar_loja)
+        self.loja_combo.grid(row=0, column=5, padx=5, pady=5, sticky="w")
+
         # Botão Registrar Pedido (Centralizado)
         add_button = ttk.Button(entry_frame, text="REGISTRAR PEDIDO", command=self.adicionar_pedido, style="primary.TButton")
-        add_button.grid(row=1, column=0, columnspan=4, pady=10)
+        add_button.grid(row=1, column=0, columnspan=6, pady=10)
+
+        # Modo leitura: cada ENTER do leitor de código de barras registra um pedido
+        self.modo_leitura_var = tk.BooleanVar()
+        ttk.Checkbutton(
+            entry_frame,
+            text="MODO LEITURA (LEITOR DE CÓDIGO DE BARRAS)",
+            variable=self.modo_leitura_var,
+            command=self.alternar_modo_leitura
+        ).grid(row=2, column=0, columnspan=2, padx=5, sticky="w")
+        self.leitura_var = tk.StringVar()
+        self.leitura_label = ttk.Label(entry_frame, textvariable=self.leitura_var, font=FONT_LABEL)
+        self.leitura_label.grid(row=2, column=2, columnspan=4, padx=5, sticky="w")
+        self.numero_pedido_entry.bind('<Return>', self.registrar_leitura)
+
+        # Filtros (período de faturamento e status), aplicados no SQL
+        filtro_frame = ttk.Frame(self.root, padding=(10, 0))
+        filtro_frame.grid(row=1, column=0, sticky='ew')
+
+        ttk.Label(filtro_frame, text="FATURADOS DE:", font=FONT_LABEL).pack(side=tk.LEFT, padx=5)
+        self.data_inicio_entry = ttk.Entry(filtro_frame, font=FONT_ENTRY, width=12)
+        self.data_inicio_entry.pack(side=tk.LEFT, padx=5)
+        ttk.Label(filtro_frame, text="ATÉ:", font=FONT_LABEL).pack(side=tk.LEFT, padx=5)
+        self.data_fim_entry = ttk.Entry(filtro_frame, font=FONT_ENTRY, width=12)
+        self.data_fim_entry.pack(side=tk.LEFT, padx=5)
+        ttk.Label(filtro_frame, text="STATUS:", font=FONT_LABEL).pack(side=tk.LEFT, padx=5)
+        self.status_filtro = ttk.Combobox(filtro_frame, values=self.STATUS_FILTRO, font=FONT_ENTRY, width=12, state='readonly')
+        self.status_filtro.set(self.STATUS_FILTRO[0])
+        self.status_filtro.pack(side=tk.LEFT, padx=5)
+        ttk.Button(filtro_frame, text="FILTRAR", command=self.aplicar_filtro, style="primary.TButton").pack(side=tk.LEFT, padx=5)
+        ttk.Button(filtro_frame, text="LIMPAR FILTRO", command=self.limpar_filtro, style="secondary.TButton").pack(side=tk.LEFT, padx=5)
+        self.total_var = tk.StringVar()
+        ttk.Label(filtro_frame, textvariable=self.total_var, font=FONT_LABEL).pack(side=tk.RIGHT, padx=5)
 
         # Tabela
-        self.tree = ttk.Treeview(self.root, columns=("DATA", "RESPONSÁVEL", "PEDIDO", "STATUS", "ENVIO", "RESPONSÁVEL ENVIO"), show="headings", selectmode="browse")
-        self.tree.grid(row=1, column=0, padx=10, pady=5, sticky='nsew')
+        tree_frame = ttk.Frame(self.root)
+        tree_frame.grid(row=2, column=0, padx=10, pady=5, sticky='nsew')
+        tree_frame.grid_rowconfigure(0, weight=1)
+        tree_frame.grid_columnconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(tree_frame, columns=("DATA", "RESPONSÁVEL", "PEDIDO", "STATUS", "ENVIO", "RESPONSÁVEL ENVIO"), show="headings", selectmode="extended")
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        vsb.grid(row=0, column=1, sticky='ns')
 
         # Configurar largura e centralização das colunas
         for col in self.tree["columns"]:
             self.tree.column(col, anchor="center", width=120)
             self.tree.heading(col, text=col, anchor="center")
 
+        # Lista paginada por id (mais recentes primeiro); datas e maiúsculas vêm do SQL
+        self.pager = KeysetTreeview(
+            self.tree,
+            vsb,
+            table='pedidos',
+            columns=self.COLUNAS_LISTA,
+            on_count=lambda total: self.total_var.set(f"TOTAL: {total} PEDIDOS"),
+            row_values=lambda row: row[1:]
+        )
+
         # Frame de Ações (Rodapé)
         action_frame = ttk.Frame(self.root, padding="10")
-        action_frame.grid(row=2, column=0, sticky='ew')
+        action_frame.grid(row=3, column=0, sticky='ew')
 
         # Configuração de colunas para centralizar os botões de ação
-        action_frame.grid_columnconfigure((0, 1, 2), weight=1)
+        action_frame.grid_columnconfigure((0, 1, 2, 3, 4), weight=1)
 
         # Botões de Ação em Maiúsculas
         ttk.Button(action_frame, text="MARCAR COMO ENVIADO", command=self.marcar_como_enviado, style="Warning.TButton").grid(row=0, column=0, padx=5, pady=5, sticky='ew')
         ttk.Button(action_frame, text="EXCLUIR PEDIDO", command=self.excluir_pedido, style="danger.TButton").grid(row=0, column=1, padx=5, pady=5, sticky='ew')
         ttk.Button(action_frame, text="EXPORTAR PARA EXCEL", command=self.exportar_excel, style="success.TButton").grid(row=0, column=2, padx=5, pady=5, sticky='ew')
+        ttk.Button(action_frame, text="IMPORTAR PEDIDOS", command=self.importar_pedidos, style="info.TButton").grid(row=0, column=3, padx=5, pady=5, sticky='ew')
+        ttk.Button(action_frame, text="RECARREGAR", command=self.carregar_dados, style="secondary.TButton").grid(row=0, column=4, padx=5, pady=5, sticky='ew')
+
+    def selecionar_loja(self, event=None):
+        """Grava a loja escolhida como a loja deste terminal"""
+        loja = self.loja_combo.get()
+        if loja in self.nomes_lojas:
+            self.loja = loja
+            self.config.set('terminal.loja', loja)
+
+    def _loja_selecionada(self) -> bool:
+        if self.loja in self.nomes_lojas:
+            return True
+        messagebox.showwarning("Atenção", "Selecione a loja deste terminal.")
+        self.loja_combo.focus_set()
+        return False
 
     @log_action("add_order")
     def adicionar_pedido(self):
-        """Adiciona um novo pedido usando a data atual no formato brasileiro"""
-        data_faturamento = datetime.now().strftime('%d/%m/%Y')
+        """Adiciona um novo pedido com a data atual (gravada em ISO)"""
+        data_faturamento = datetime.now().strftime('%Y-%m-%d')
         responsavel = self.responsavel_entry.get().upper()  # Converter para maiúsculas
         numero_pedido = self.numero_pedido_entry.get().upper()  # Converter para maiúsculas
 
         if not responsavel or not numero_pedido:
             messagebox.showwarning("Atenção", "Preencha todos os campos.")
             return
+        if not self._loja_selecionada():
+            return
 
-        db_path = self.config.get('database.path', 'austral.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
         try:
-            cursor.execute('''
-                INSERT INTO pedidos (data_faturamento, responsavel_faturamento, numero_pedido)
-                VALUES (?, ?, ?)
-            ''', (data_faturamento, responsavel, numero_pedido))
-            conn.commit()
-            self.carregar_dados()
+            with self.db.transaction() as conn:
+                cursor = conn.execute('''
+                    INSERT INTO pedidos (data_faturamento, responsavel_faturamento, numero_pedido, loja)
+                    VALUES (?, ?, ?, ?)
+                ''', (data_faturamento, responsavel, numero_pedido, self.loja))
+            self.numeros_existentes.add(numero_pedido)
+            self.atualizar_linha(cursor.lastrowid)
         except sqlite3.IntegrityError:
             messagebox.showwarning("Erro", "Número de pedido já existe.")
-        finally:
-            conn.close()
 
-    @log_action("load_orders")
+    # Modo leitura
+
+    def _mostrar_leitura(self, texto, estilo):
+        self.leitura_var.set(texto)
+        self.leitura_label.configure(bootstyle=estilo)
+
+    def alternar_modo_leitura(self):
+        if self.modo_leitura_var.get():
+            self.numero_pedido_entry.delete(0, tk.END)
+            self.numero_pedido_entry.focus_set()
+            self._mostrar_leitura("AGUARDANDO LEITURAS...", "info")
+        else:
+            if self.leituras_pendentes:
+                self.gravar_leituras()
+            self._mostrar_leitura("", "default")
+
+    def registrar_leitura(self, event=None):
+        """Acumula o número lido; duplicados são avisados na hora, sem janela modal"""
+        if not self.modo_leitura_var.get():
+            return
+
+        numero_pedido = self.numero_pedido_entry.get().strip().upper()
+        self.numero_pedido_entry.delete(0, tk.END)
+        if not numero_pedido:
+            return
+
+        responsavel = self.responsavel_entry.get().strip().upper()
+        if not responsavel:
+            self.root.bell()
+            self._mostrar_leitura("PREENCHA O RESPONSÁVEL ANTES DE LER OS PEDIDOS", "danger")
+            self.responsavel_entry.focus_set()
+            return
+
+        if self.loja not in self.nomes_lojas:
+            self.root.bell()
+            self._mostrar_leitura("SELECIONE A LOJA ANTES DE LER OS PEDIDOS", "danger")
+            self.loja_combo.focus_set()
+            return
+
+        if numero_pedido in self.numeros_existentes:
+            self.root.bell()
+            self._mostrar_leitura(f"PEDIDO {numero_pedido} JÁ REGISTRADO", "danger")
+            return
+
+        self.numeros_existentes.add(numero_pedido)
+        self.leituras_pendentes.append((numero_pedido, responsavel))
+        self._mostrar_leitura(f"PEDIDO {numero_pedido} LIDO", "success")
+
+        if len(self.leituras_pendentes) >= self.SCAN_BATCH_SIZE:
+            self.gravar_leituras()
+        elif self._leituras_after_id is None:
+            self._leituras_after_id = self.root.after(self.SCAN_FLUSH_MS, self.gravar_leituras)
+
+    @log_action("scan_orders")
+    def gravar_leituras(self, atualizar_tela=True):
+        """Grava as leituras acumuladas numa única transação"""
+        if self._leituras_after_id is not None:
+            self.root.after_cancel(self._leituras_after_id)
+            self._leituras_after_id = None
+
+        leituras, self.leituras_pendentes = self.leituras_pendentes, []
+        if not leituras:
+            return
+
+        data_faturamento = datetime.now().strftime('%Y-%m-%d')
+        novos_ids = []
+        duplicados = []
+        try:
+            with self.db.transaction() as conn:
+                for numero_pedido, responsavel in leituras:
+                    try:
+                        cursor = conn.execute('''
+                            INSERT INTO pedidos (data_faturamento, responsavel_faturamento, numero_pedido, loja)
+                            VALUES (?, ?, ?, ?)
+                        ''', (data_faturamento, responsavel, numero_pedido, self.loja))
+                        novos_ids.append(cursor.lastrowid)
+                    except sqlite3.IntegrityError:
+                        # Registrado por outro terminal depois da carga da lista
+                        duplicados.append(numero_pedido)
+        except sqlite3.Error as e:
+            self.logger.logger.error(f"Erro ao gravar leituras de pedidos: {str(e)}")
+            self.numeros_existentes.difference_update(numero for numero, _ in leituras)
+            if atualizar_tela:
+                self.root.bell()
+                self._mostrar_leitura(f"ERRO AO GRAVAR {len(leituras)} LEITURA(S): LEIA NOVAMENTE", "danger")
+            return
+
+        if not atualizar_tela:
+            return
+        self.atualizar_linhas(novos_ids)
+        if duplicados:
+            self.root.bell()
+            self._mostrar_leitura(f"JÁ REGISTRADO(S) EM OUTRO TERMINAL: {', '.join(duplicados)}", "danger")
+        else:
+            self._mostrar_leitura(f"{len(novos_ids)} PEDIDO(S) GRAVADO(S)", "success")
+
+    # Colunas da lista: o id (chave da paginação) e os valores já formatados para exibição
+    COLUNAS_LISTA = (
+        "id",
+        "COALESCE(strftime('%d/%m/%Y', data_faturamento), data_faturamento, '')",
+        "UPPER(COALESCE(responsavel_faturamento, ''))",
+        "UPPER(numero_pedido)",
+        "UPPER(COALESCE(status, ''))",
+        "COALESCE(strftime('%d/%m/%Y', data_envio), data_envio, '')",
+        "UPPER(COALESCE(responsavel_envio, ''))",
+    )
+
+    # Colunas da exportação: as mesmas da planilha de antes da loja e das
+    # datas em ISO, com as datas em dd/mm/aaaa
+    COLUNAS_EXPORTACAO = (
+        ("ID", "id"),
+        ("DATA_FATURAMENTO", "COALESCE(strftime('%d/%m/%Y', data_faturamento), data_faturamento)"),
+        ("RESPONSAVEL_FATURAMENTO", "responsavel_faturamento"),
+        ("NUMERO_PEDIDO", "numero_pedido"),
+        ("STATUS", "status"),
+        ("DATA_ENVIO", "COALESCE(strftime('%d/%m/%Y', data_envio), data_envio)"),
+        ("RESPONSAVEL_ENVIO", "responsavel_envio"),
+    )
+
+    STATUS_FILTRO = ["TODOS", "FATURADO", "ENVIADO"]
+
+    @staticmethod
+    def _data_iso(texto):
+        """Converte dd/mm/aaaa digitado no filtro para aaaa-mm-dd (None se vazio)"""
+        texto = texto.strip()
+        if not texto:
+            return None
+        return datetime.strptime(texto, '%d/%m/%Y').strftime('%Y-%m-%d')
+
+    def aplicar_filtro(self):
+        """Filtra a lista por período de faturamento e status, no próprio SQL"""
+        try:
+            inicio = self._data_iso(self.data_inicio_entry.get())
+            fim = self._data_iso(self.data_fim_entry.get())
+        except ValueError:
+            messagebox.showwarning("Atenção", "Informe as datas no formato DD/MM/AAAA.")
+            return
+
+        condicoes = []
+        params = []
+        if inicio:
+            condicoes.append("data_faturamento >= ?")
+            params.append(inicio)
+        if fim:
+            condicoes.append("data_faturamento <= ?")
+            params.append(fim)
+        status = self.status_filtro.get()
+        if status != self.STATUS_FILTRO[0]:
+            condicoes.append("status = ?")
+            params.append(status.capitalize())
+
+        self.pager.set_filter(' AND '.join(condicoes), params)
+        self.watcher.mark_seen()
+
+    def limpar_filtro(self):
+        self.data_inicio_entry.delete(0, tk.END)
+        self.data_fim_entry.delete(0, tk.END)
+        self.status_filtro.set(self.STATUS_FILTRO[0])
+        self.aplicar_filtro()
+
+    @log_action("load_orders", audit=False)
     def carregar_dados(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+        self.pager.reload()
 
-        db_path = self.config.get('database.path', 'austral.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT data_faturamento, responsavel_faturamento, numero_pedido, status, data_envio, responsavel_envio FROM pedidos')
-        
-        for row in cursor.fetchall():
-            valores = list(row)
-            if valores[0]:  # data_faturamento
-                try:
-                    data = datetime.strptime(valores[0], '%Y-%m-%d').strftime('%d/%m/%Y')
-                    valores[0] = data
-                except ValueError:
-                    pass
-            
-            if valores[4]:  # data_envio
-                try:
-                    data = datetime.strptime(valores[4], '%Y-%m-%d').strftime('%d/%m/%Y')
-                    valores[4] = data
-                except ValueError:
-                    pass
-                
-            self.tree.insert("", "end", values=[str(v).upper() for v in valores])  # Converter tudo para maiúsculas
-        conn.close()
+        # Base da checagem de duplicados do modo leitura (mais as leituras ainda no buffer)
+        cursor = self.db.connection().cursor()
+        cursor.execute('SELECT numero_pedido FROM pedidos')
+        self.numeros_existentes = {row[0] for row in cursor.fetchall()}
+        self.numeros_existentes.update(numero for numero, _ in self.leituras_pendentes)
+
+        if hasattr(self, 'watcher'):
+            self.watcher.mark_seen()
+
+    def atualizar_linha(self, pedido_id):
+        """Atualiza somente o item do pedido após uma inclusão, alteração ou exclusão"""
+        self.pager.refresh_row(pedido_id)
+
+    def atualizar_linhas(self, pedido_ids):
+        """Atualiza os itens de vários pedidos de uma vez, sem recarregar a lista"""
+        self.pager.refresh_rows(pedido_ids)
+
+    def _pedidos_selecionados(self):
+        """Ids dos pedidos selecionados na Treeview"""
+        return [int(iid) for iid in self.tree.selection()]
 
     @log_action("mark_as_sent")
     def marcar_como_enviado(self):
-        selected_item = self.tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Atenção", "Selecione um pedido.")
+        """Marca como enviados todos os pedidos selecionados, numa única transação"""
+        pedido_ids = self._pedidos_selecionados()
+        if not pedido_ids:
+            messagebox.showwarning("Atenção", "Selecione um ou mais pedidos.")
             return
 
-        pedido = self.tree.item(selected_item)["values"][2]
-        responsavel_envio = simpledialog.askstring("Responsável pelo Envio", "Digite o nome do responsável pelo envio:")
+        titulo = "Responsável pelo Envio"
+        if len(pedido_ids) > 1:
+            titulo += f" ({len(pedido_ids)} pedidos)"
+        responsavel_envio = simpledialog.askstring(titulo, "Digite o nome do responsável pelo envio:")
 
         if responsavel_envio:
-            data_envio = datetime.now().strftime("%d/%m/%Y")
-            db_path = self.config.get('database.path', 'austral.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE pedidos SET status="Enviado", data_envio=?, responsavel_envio=? WHERE numero_pedido=?
-            ''', (data_envio, responsavel_envio.upper(), pedido))
-            conn.commit()
-            conn.close()
-            self.carregar_dados()
+            data_envio = datetime.now().strftime("%Y-%m-%d")
+            try:
+                with self.db.transaction() as conn:
+                    conn.executemany('''
+                        UPDATE pedidos SET status="Enviado", data_envio=?, responsavel_envio=? WHERE id=?
+                    ''', [(data_envio, responsavel_envio.upper(), pedido_id) for pedido_id in pedido_ids])
+            except sqlite3.Error as e:
+                messagebox.showerror("Erro", f"Erro ao marcar pedidos como enviados: {str(e)}")
+                return
+            self.atualizar_linhas(pedido_ids)
 
     @log_action("delete_order")
     def excluir_pedido(self):
-        selected_item = self.tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Atenção", "Selecione um pedido para excluir.")
+        """Exclui todos os pedidos selecionados, numa única transação"""
+        pedido_ids = self._pedidos_selecionados()
+        if not pedido_ids:
+            messagebox.showwarning("Atenção", "Selecione um ou mais pedidos para excluir.")
             return
 
-        pedido = self.tree.item(selected_item)["values"][2]
-        if messagebox.askyesno("Confirmar Exclusão", f"Deseja realmente excluir o pedido {pedido}?"):
-            db_path = self.config.get('database.path', 'austral.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
+        if len(pedido_ids) == 1:
+            pedido = self.tree.set(str(pedido_ids[0]), "PEDIDO")
+            pergunta = f"Deseja realmente excluir o pedido {pedido}?"
+        else:
+            pergunta = f"Deseja realmente excluir os {len(pedido_ids)} pedidos selecionados?"
+
+        if messagebox.askyesno("Confirmar Exclusão", pergunta):
             try:
-                cursor.execute('DELETE FROM pedidos WHERE numero_pedido=?', (pedido,))
-                conn.commit()
-                messagebox.showinfo("Sucesso", "Pedido excluído com sucesso!")
-                self.carregar_dados()
+                numeros = [self.tree.set(str(pedido_id), "PEDIDO") for pedido_id in pedido_ids]
+                with self.db.transaction() as conn:
+                    conn.executemany('DELETE FROM pedidos WHERE id=?', [(pedido_id,) for pedido_id in pedido_ids])
+                self.numeros_existentes.difference_update(numeros)
+                for pedido_id in pedido_ids:
+                    self.pager.remove(pedido_id)
+                if len(pedido_ids) == 1:
+                    messagebox.showinfo("Sucesso", "Pedido excluído com sucesso!")
+                else:
+                    messagebox.showinfo("Sucesso", f"{len(pedido_ids)} pedidos excluídos com sucesso!")
             except sqlite3.Error as e:
                 messagebox.showerror("Erro", f"Erro ao excluir pedido: {str(e)}")
-            finally:
-                conn.close()
 
     @log_action("export_to_excel")
     def exportar_excel(self):
@@ -236,21 +469,66 @@ class PedidoSinOMSApp:
             defaultextension=".xlsx",
             initialfile=nome_arquivo,
             title="Salvar arquivo Excel",
-            filetypes=[("Excel files", "*.xlsx")]
+            filetypes=FILETYPES
         )
         
         if export_path:
-            db_path = self.config.get('database.path', 'austral.db')
-            conn = sqlite3.connect(db_path)
-            try:
-                df = pd.read_sql_query('SELECT * FROM pedidos', conn)
-                df.columns = [col.upper() for col in df.columns]  # Converter cabeçalhos para maiúsculas
-                df.to_excel(export_path, index=False)
-                messagebox.showinfo("Sucesso", f"Dados exportados para {export_path}")
-            except Exception as e:
-                messagebox.showerror("Erro", f"Erro ao exportar dados: {str(e)}")
-            finally:
-                conn.close()
+            def exportar(job):
+                # Roda no pool de tarefas, com a conexão da própria thread
+                conn = self.db.connection()
+                total = conn.execute('SELECT COUNT(*) FROM pedidos').fetchone()[0]
+                headers = [titulo for titulo, _ in self.COLUNAS_EXPORTACAO]
+                query = f"SELECT {', '.join(coluna for _, coluna in self.COLUNAS_EXPORTACAO)} FROM pedidos ORDER BY id"
+                try:
+                    return export_query(
+                        conn, query, export_path, headers=headers, sheet_name='Sheet1',
+                        progress=lambda n: job.report(n, total, f"{n} de {total} pedidos exportados"),
+                        cancelled=lambda: job.cancelled
+                    )
+                except ExportCancelled:
+                    raise JobCancelled()
+
+            JobRunner().run_with_progress(
+                self.root, "Exportando pedidos", exportar,
+                on_done=lambda _: messagebox.showinfo("Sucesso", f"Dados exportados para {export_path}"),
+                on_error=lambda e: messagebox.showerror("Erro", f"Erro ao exportar dados: {str(e)}")
+            )
+
+    @log_action("import_orders")
+    def importar_pedidos(self):
+        import_path = filedialog.askopenfilename(
+            title="Importar pedidos",
+            filetypes=importer.FILETYPES
+        )
+
+        if import_path:
+            def importar(job):
+                try:
+                    return importer.import_file(
+                        'pedidos', import_path,
+                        progress=lambda ok, rej: job.report(ok, None, f"{ok} importados, {rej} rejeitados"),
+                        cancelled=lambda: job.cancelled
+                    )
+                except importer.ImportCancelled:
+                    raise JobCancelled()
+
+            def concluido(resultado):
+                self.carregar_dados()
+                mensagem = f"{resultado.importados} pedido(s) importado(s)."
+                if resultado.rejeitados:
+                    mensagem += (
+                        f"\n{resultado.rejeitados} linha(s) rejeitada(s), "
+                        f"detalhadas em:\n{resultado.arquivo_rejeitados}"
+                    )
+                    messagebox.showwarning("Importação concluída", mensagem)
+                else:
+                    messagebox.showinfo("Importação concluída", mensagem)
+
+            JobRunner().run_with_progress(
+                self.root, "Importando pedidos", importar,
+                on_done=concluido,
+                on_error=lambda e: messagebox.showerror("Erro", f"Erro ao importar pedidos: {str(e)}")
+            )
 
 # Verificação do ambiente principal
 if __name__ == "__main__":
@@ -0,0 +1,201 @@
+"""
+Métricas de envio dos pedidos SinOMS.
+Calcula a mediana e o p90 do tempo entre faturamento e envio, por loja e por
+responsável, com consultas de janela sobre pedido_eventos, e lista os pedidos
+pendentes além do prazo configurado em sinoms.prazo_envio_dias.
+"""
+
+import tkinter as tk
+import ttkbootstrap as ttk
+from typing import List, Tuple
+from config import ConfigManager
+from logger import AustralLogger, log_action
+from database import DatabaseManager
+from virtual_tree import DataVersionWatcher
+from utils import FONT_TITLE, FONT_LABEL, UIHelper, setup_window_icon
+
+# Agrupamentos de LATENCIA_SQL: nome -> expressão sobre o evento de envio (e)
+GRUPOS = {
+    'loja': "COALESCE(e.loja, '')",
+    'responsavel': "COALESCE(e.usuario, '')",
+}
+
+# Cada pedido conta uma vez: do primeiro faturamento ao primeiro envio depois
+# dele (pedidos que voltam a Faturado e são reenviados não geram outra linha).
+# Percentis pelo método do posto mais próximo: o menor tempo cuja posição
+# na ordem crescente alcança p * total
+LATENCIA_SQL = '''
+    WITH faturados AS (
+        SELECT pedido_id, MIN(ocorrido_em) AS faturado_em
+        FROM pedido_eventos
+        WHERE status = 'Faturado' AND pedido_id IN (
+            SELECT pedido_id FROM pedido_eventos
+            WHERE status = 'Enviado' AND ocorrido_em >= date('now', 'localtime', :desde)
+        )
+        GROUP BY pedido_id
+    ),
+    primeiros_envios AS (
+        SELECT f.faturado_em,
+               (SELECT e.id FROM pedido_eventos e
+                WHERE e.pedido_id = f.pedido_id AND e.status = 'Enviado' AND e.ocorrido_em >= f.faturado_em
+                ORDER BY e.ocorrido_em, e.id LIMIT 1) AS envio_id
+        FROM faturados f
+    ),
+    envios AS (
+        SELECT {grupo} AS grupo,
+               (julianday(e.ocorrido_em) - julianday(p.faturado_em)) * 24 AS horas
+        FROM primeiros_envios p
+        JOIN pedido_eventos e ON e.id = p.envio_id
+        WHERE e.ocorrido_em >= date('now', 'localtime', :desde)
+    ),
+    ordenados AS (
+        SELECT grupo, horas,
+               ROW_NUMBER() OVER (PARTITION BY grupo ORDER BY horas) AS posicao,
+               COUNT(*) OVER (PARTITION BY grupo) AS total
+        FROM envios
+    )
+    SELECT grupo,
+           MAX(total),
+           MIN(CASE WHEN posicao >= 0.5 * total THEN horas END),
+           MIN(CASE WHEN posicao >= 0.9 * total THEN horas END)
+    FROM ordenados
+    GROUP BY grupo
+    ORDER BY 4 DESC
+'''
+
+ATRASADOS_SQL = '''
+    SELECT numero_pedido, COALESCE(loja, ''), COALESCE(responsavel_faturamento, ''), data_faturamento,
+           CAST(julianday('now', 'localtime') - julianday(data_faturamento) AS INTEGER)
+    FROM pedidos
+    WHERE status = 'Faturado' AND data_faturamento < date('now', 'localtime', ?)
+    ORDER BY data_faturamento
+    LIMIT ?
+'''
+
+
+def latencia_envio(conn, grupo: str, dias: int) -> List[Tuple[str, int, float, float]]:
+    """
+    Tempo entre faturamento e envio dos pedidos enviados nos últimos dias
+
+    Returns:
+        List[Tuple]: (grupo, envios, mediana em horas, p90 em horas), do maior p90 ao menor
+    """
+    return conn.execute(LATENCIA_SQL.format(grupo=GRUPOS[grupo]), {'desde': f'-{int(dias)} days'}).fetchall()
+
+
+def pedidos_atrasados(conn, prazo_dias: int, limite: int = 500) -> List[Tuple[str, str, str, str, int]]:
+    """Pedidos ainda faturados há mais de prazo_dias: (pedido, loja, responsável, data, dias)"""
+    return conn.execute(ATRASADOS_SQL, (f'-{int(prazo_dias)} days', limite)).fetchall()
+
+
+class SinOMSMetricsApp:
+    """Mediana e p90 do prazo de envio por loja e responsável, e pedidos em atraso"""
+
+    PERIODOS = ["30", "90", "180", "365"]
+    ATRASADOS_LIMITE = 500
+
+    def __init__(self, root):
+        self.root = root
+        self.root.title("SISTEMA AUSTRAL - MÉTRICAS DE ENVIO SINOMS")
+        self.config = ConfigManager()
+        self.logger = AustralLogger()
+        self.db = DatabaseManager()
+
+        setup_window_icon(self.root)
+        self.setup_ui()
+        self.carregar_dados()
+        UIHelper.center_window(self.root, 1100, 700)
+
+        self.watcher = DataVersionWatcher(self.root, self.carregar_dados)
+        self.watcher.start()
+        self.root.bind('<Destroy>', self._on_destroy, add='+')
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self.watcher.stop()
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.root, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        header = ttk.Frame(main_frame)
+        header.pack(fill=tk.X, pady=(0, 10))
+        ttk.Label(header, text="MÉTRICAS DE ENVIO", font=FONT_TITLE, bootstyle="primary").pack(side=tk.LEFT)
+        ttk.Button(header, text="ATUALIZAR", command=self.carregar_dados, bootstyle="secondary").pack(side=tk.RIGHT)
+
+        self.periodo = ttk.Combobox(header, values=self.PERIODOS, width=5, state='readonly')
+        self.periodo.set(str(self.config.get('sinoms.metricas_dias', 90)))
+        self.periodo.bind('<<ComboboxSelected>>', lambda e: self.carregar_dados())
+        self.periodo.pack(side=tk.RIGHT, padx=5)
+        ttk.Label(header, text="ENVIOS DOS ÚLTIMOS (DIAS):", font=FONT_LABEL).pack(side=tk.RIGHT)
+
+        body = ttk.Frame(main_frame)
+        body.pack(fill=tk.BOTH, expand=True)
+        body.grid_columnconfigure((0, 1), weight=1)
+        body.grid_rowconfigure((0, 1), weight=1)
+
+        colunas_latencia = ("ENVIOS", "MEDIANA (H)", "P90 (H)")
+        self.tree_loja = self._criar_tabela(body, "POR LOJA", ("LOJA", *colunas_latencia), 0, 0)
+        self.tree_responsavel = self._criar_tabela(
+            body, "POR RESPONSÁVEL PELO ENVIO", ("RESPONSÁVEL", *colunas_latencia), 0, 1
+        )
+
+        self.tree_atrasados = self._criar_tabela(
+            body, "PEDIDOS EM ATRASO",
+            ("PEDIDO", "LOJA", "RESPONSÁVEL", "FATURADO EM", "DIAS"), 1, 0, columnspan=2
+        )
+
+    def _criar_tabela(self, parent, titulo, colunas, row, column, columnspan=1):
+        frame = ttk.Labelframe(parent, text=titulo, padding=5)
+        frame.grid(row=row, column=column, columnspan=columnspan, sticky='nsew', padx=5, pady=5)
+        frame.grid_rowconfigure(0, weight=1)
+        frame.grid_columnconfigure(0, weight=1)
+
+        tree = ttk.Treeview(frame, columns=colunas, show="headings", height=8)
+        for idx, coluna in enumerate(colunas):
+            tree.heading(coluna, text=coluna, anchor='center')
+            tree.column(coluna, width=260 if idx == 0 else 100, anchor='w' if idx == 0 else 'center')
+
+        vsb = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=vsb.set)
+        tree.grid(row=0, column=0, sticky='nsew')
+        vsb.grid(row=0, column=1, sticky='ns')
+        return tree
+
+    @staticmethod
+    def _horas(valor):
+        return "" if valor is None else f"{valor:.1f}"
+
+    @log_action("load_sinoms_metrics", audit=False)
+    def carregar_dados(self):
+        try:
+            conn = self.db.connection()
+            dias = int(self.periodo.get())
+            for tree, grupo in ((self.tree_loja, 'loja'), (self.tree_responsavel, 'responsavel')):
+                tree.delete(*tree.get_children())
+                for nome, envios, mediana, p90 in latencia_envio(conn, grupo, dias):
+                    tree.insert("", "end", values=(nome or "(NÃO INFORMADO)", envios,
+                                                   self._horas(mediana), self._horas(p90)))
+
+            prazo = int(self.config.get('sinoms.prazo_envio_dias', 2))
+            atrasados = pedidos_atrasados(conn, prazo, self.ATRASADOS_LIMITE)
+            self.tree_atrasados.master.configure(
+                text=f"PEDIDOS EM ATRASO (FATURADOS HÁ MAIS DE {prazo} DIAS): {len(atrasados)}"
+                     + ("+" if len(atrasados) == self.ATRASADOS_LIMITE else "")
+            )
+            self.tree_atrasados.delete(*self.tree_atrasados.get_children())
+            for numero, loja, responsavel, data, atraso in atrasados:
+                data_br = f"{data[8:10]}/{data[5:7]}/{data[:4]}" if data and len(data) >= 10 else data
+                self.tree_atrasados.insert("", "end", values=(numero, loja, responsavel, data_br, atraso))
+
+            if hasattr(self, 'watcher'):
+                self.watcher.mark_seen()
+        except Exception as e:
+            self.logger.logger.error(f"Erro ao carregar métricas de envio: {str(e)}")
+            UIHelper.show_message("ERRO", "Erro ao carregar métricas de envio", "error")
+
+
+if __name__ == "__main__":
+    root = ttk.Window(themename="litera")
+    app = SinOMSMetricsApp(root)
+    root.mainloop()
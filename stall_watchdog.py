@@ -0,0 +1,169 @@
+"""
+Detector de travamentos do loop de eventos Tk.
+Um batimento agendado com root.after mede o atraso do loop; uma thread de
+amostragem captura a pilha Python da thread principal enquanto o batimento
+está atrasado. Ao fim de cada travamento acima de diagnostics.stall_threshold_ms,
+registra a duração, a janela ativa e as funções em execução.
+Ativado por diagnostics.stall_watchdog.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import List, Optional
+
+from config import ConfigManager
+from metrics import MetricsRegistry
+
+logger = logging.getLogger('austral.watchdog')
+
+# Diretório dos módulos do sistema, para separar o código próprio das bibliotecas
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class StallWatchdog:
+    """Batimento no loop Tk e amostragem da pilha da thread principal nos travamentos"""
+
+    # Quadros da pilha registrados por amostra
+    STACK_LIMIT = 25
+    # Amostras guardadas por travamento
+    MAX_AMOSTRAS = 50
+    # Um travamento ainda em curso é registrado ao atingir este múltiplo do limite
+    TRAVAMENTO_LONGO = 10
+
+    def __init__(self, root):
+        self.root = root
+        self.config = ConfigManager()
+        self.heartbeat = max(int(self.config.get('diagnostics.heartbeat_ms', 100)), 10) / 1000
+        self.limite = max(int(self.config.get('diagnostics.stall_threshold_ms', 500)), 50) / 1000
+        self.main_ident = threading.main_thread().ident
+
+        self._lock = threading.Lock()
+        self._ultimo = time.monotonic()
+        self._pilha: Optional[List[str]] = None
+        self._amostras: Counter = Counter()
+        self._longo_registrado = False
+        self._janela = ''
+        self._after_id = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._janela = self.root.title()
+        self.root.bind_all('<FocusIn>', self._on_focus, add='+')
+        self.root.bind('<Destroy>', self._on_destroy, add='+')
+        self._ultimo = time.monotonic()
+        self._after_id = self.root.after(int(self.heartbeat * 1000), self._batimento)
+        self._thread = threading.Thread(target=self._amostrar, name='austral-stall-watchdog', daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Detector de travamentos ativo (batimento {self.heartbeat * 1000:.0f} ms, "
+            f"limite {self.limite * 1000:.0f} ms)"
+        )
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self.stop()
+
+    def _on_focus(self, event):
+        # Janela (Toplevel) da ferramenta em uso; alguns widgets internos chegam como texto
+        try:
+            self._janela = event.widget.winfo_toplevel().title()
+        except Exception:
+            pass
+
+    # Thread principal
+
+    def _batimento(self):
+        agora = time.monotonic()
+        with self._lock:
+            travado = agora - self._ultimo - self.heartbeat
+            pilha, amostras = self._pilha, self._amostras
+            self._ultimo = agora
+            self._pilha = None
+            self._amostras = Counter()
+            self._longo_registrado = False
+
+        if travado >= self.limite:
+            self._registrar(travado, pilha, amostras)
+        if not self._stop.is_set():
+            self._after_id = self.root.after(int(self.heartbeat * 1000), self._batimento)
+
+    def _registrar(self, travado: float, pilha: Optional[List[str]], amostras: Counter):
+        MetricsRegistry().record('ui_stall', travado)
+        mensagem = [f"Interface travada por {travado * 1000:.0f} ms na janela '{self._janela}'"]
+        if amostras:
+            total = sum(amostras.values())
+            mensagem.append("Funções em execução nas amostras:")
+            mensagem.extend(
+                f"  {qtd * 100 / total:.0f}% {local}" for local, qtd in amostras.most_common(5)
+            )
+        if pilha:
+            mensagem.append("Pilha da thread principal no início do travamento:")
+            mensagem.append(''.join(pilha).rstrip())
+        logger.warning('\n'.join(mensagem))
+
+    # Thread de amostragem
+
+    def _amostrar(self):
+        intervalo = min(self.heartbeat, self.limite / 2)
+        while not self._stop.wait(intervalo):
+            with self._lock:
+                atraso = time.monotonic() - self._ultimo - self.heartbeat
+            if atraso < self.limite:
+                continue
+
+            frame = sys._current_frames().get(self.main_ident)
+            if frame is None:
+                continue
+            local = self._local(frame)
+            pilha = traceback.format_stack(frame, limit=self.STACK_LIMIT) if self._pilha is None else None
+            del frame
+
+            longo = False
+            with self._lock:
+                # O batimento pode ter voltado enquanto a pilha era capturada
+                if time.monotonic() - self._ultimo - self.heartbeat < self.limite:
+                    continue
+                if pilha is not None and self._pilha is None:
+                    self._pilha = pilha
+                if sum(self._amostras.values()) < self.MAX_AMOSTRAS:
+                    self._amostras[local] += 1
+                if atraso >= self.limite * self.TRAVAMENTO_LONGO and not self._longo_registrado:
+                    self._longo_registrado = True
+                    longo = True
+                    pilha_atual = self._pilha
+
+            if longo:
+                # Registra já, caso a interface não volte a responder
+                logger.warning(
+                    f"Interface sem responder há {atraso * 1000:.0f} ms na janela '{self._janela}'\n"
+                    + ''.join(pilha_atual or []).rstrip()
+                )
+
+    @staticmethod
+    def _local(frame) -> str:
+        """
+        Função do sistema em execução, como 'arquivo:linha função'. Chamadas
+        bloqueadas em bibliotecas (rede, Excel) são atribuídas à função do
+        sistema que as fez.
+        """
+        atual = frame
+        while atual is not None and not atual.f_code.co_filename.startswith(APP_DIR):
+            atual = atual.f_back
+        atual = atual or frame
+        codigo = atual.f_code
+        return f"{os.path.basename(codigo.co_filename)}:{atual.f_lineno} {codigo.co_name}"
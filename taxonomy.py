@@ -0,0 +1,115 @@
+"""
+Taxonomia de defeitos do sistema Austral.
+Lê uma única vez as tabelas de referência (tipos, grupos, origens e tamanhos)
+e mantém em memória os rótulos exibidos nos comboboxes e a conversão entre
+rótulo e chave inteira gravada em defeitos.
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from database import DatabaseManager
+
+logger = logging.getLogger('austral.taxonomy')
+
+# Primeira opção dos comboboxes, que não é um valor válido
+PLACEHOLDERS = {
+    'tipo': "SELECIONE UM TIPO DE DEFEITO",
+    'origem': "SELECIONE A ORIGEM",
+    'tamanho': "SELECIONE O TAMANHO",
+    'loja': "SELECIONE A LOJA",
+}
+
+
+def campos_faltando(campos: Dict[str, Optional[str]]) -> List[str]:
+    """
+    Regra de preenchimento dos campos obrigatórios de um defeito
+
+    Args:
+        campos: Nome do campo (como exibido ao usuário) -> valor informado
+
+    Returns:
+        List[str]: Campos vazios ou ainda com a opção "SELECIONE ..."
+    """
+    invalidos = set(PLACEHOLDERS.values())
+    return [
+        campo for campo, valor in campos.items()
+        if not valor or not str(valor).strip() or valor in invalidos
+    ]
+
+
+class Taxonomy:
+    _instance = None
+
+    # Categoria -> consulta (id, rótulo, ativo) na ordem de exibição
+    CONSULTAS = {
+        'tipo': 'SELECT id, rotulo, ativo FROM defeito_tipos ORDER BY ordem, id',
+        'grupo': 'SELECT id, nome, 1 FROM defeito_grupos ORDER BY ordem, id',
+        'origem': 'SELECT id, nome, ativo FROM defeito_origens ORDER BY ordem, id',
+        'tamanho': 'SELECT id, nome, ativo FROM tamanhos ORDER BY ordem, id',
+    }
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.db = DatabaseManager()
+            self._lock = threading.Lock()
+            self._rotulos: Dict[str, Dict[int, str]] = {}
+            self._ids: Dict[str, Dict[str, int]] = {}
+            self._ativos: Dict[str, List[str]] = {}
+            self._grupo_do_tipo: Dict[int, Optional[int]] = {}
+            self._carregado = False
+            self.initialized = True
+
+    def _carregar(self) -> None:
+        with self._lock:
+            if self._carregado:
+                return
+            cursor = self.db.connection().cursor()
+            for categoria, sql in self.CONSULTAS.items():
+                cursor.execute(sql)
+                rows = cursor.fetchall()
+                self._rotulos[categoria] = {id_: rotulo for id_, rotulo, _ in rows}
+                self._ids[categoria] = {rotulo: id_ for id_, rotulo, _ in rows}
+                self._ativos[categoria] = [rotulo for _, rotulo, ativo in rows if ativo]
+            cursor.execute('SELECT id, grupo_id FROM defeito_tipos')
+            self._grupo_do_tipo = dict(cursor.fetchall())
+            self._carregado = True
+            logger.info(
+                f"Taxonomia carregada: {len(self._rotulos['tipo'])} tipos, "
+                f"{len(self._rotulos['tamanho'])} tamanhos"
+            )
+
+    def invalidate(self) -> None:
+        """Descarta o cache; a próxima consulta relê as tabelas de referência"""
+        with self._lock:
+            self._carregado = False
+
+    def opcoes(self, categoria: str, placeholder: bool = True) -> List[str]:
+        """Rótulos ativos da categoria, na ordem de exibição"""
+        self._carregar()
+        opcoes = list(self._ativos[categoria])
+        if placeholder and categoria in PLACEHOLDERS:
+            opcoes.insert(0, PLACEHOLDERS[categoria])
+        return opcoes
+
+    def id_de(self, categoria: str, rotulo: Optional[str]) -> Optional[int]:
+        """Chave do rótulo, ou None se ele não faz parte da taxonomia"""
+        self._carregar()
+        return self._ids[categoria].get(rotulo) if rotulo else None
+
+    def rotulo(self, categoria: str, id_: Optional[int]) -> str:
+        """Rótulo da chave ('' para chaves vazias ou desconhecidas)"""
+        if id_ is None:
+            return ''
+        self._carregar()
+        return self._rotulos[categoria].get(id_, '')
+
+    def grupo_de_tipo(self, tipo_id: Optional[int]) -> Optional[int]:
+        self._carregar()
+        return self._grupo_do_tipo.get(tipo_id)
@@ -0,0 +1,89 @@
+"""
+Banco de telemetria do sistema Austral (auditoria e métricas das ações).
+Fica em um arquivo separado, ao lado do banco principal: as gravações
+frequentes da auditoria e das métricas não alteram o PRAGMA data_version do
+banco principal, observado pelas listas abertas (DataVersionWatcher), que só
+devem recarregar quando os dados de negócio mudam.
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, List
+
+from database import DatabaseManager
+
+
+def _telemetria_001_auditoria(cursor: sqlite3.Cursor) -> None:
+    """
+    Eventos de auditoria das ações dos usuários (gravados em lote pelo
+    AustralLogger), consultados por período, usuário ou ação
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS auditoria (
+            id INTEGER PRIMARY KEY,
+            ts TEXT NOT NULL,
+            usuario TEXT NOT NULL,
+            acao TEXT NOT NULL,
+            terminal TEXT,
+            detalhes TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_auditoria_ts ON auditoria (ts)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_auditoria_usuario_ts ON auditoria (usuario, ts)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_auditoria_acao_ts ON auditoria (acao, ts)')
+
+
+def _telemetria_002_metricas_acoes(cursor: sqlite3.Cursor) -> None:
+    """
+    Histogramas de duração das ações (metrics.MetricsRegistry), um por
+    terminal, ação e dia
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS metricas_acoes (
+            terminal TEXT NOT NULL,
+            acao TEXT NOT NULL,
+            dia TEXT NOT NULL,
+            chamadas INTEGER NOT NULL DEFAULT 0,
+            erros INTEGER NOT NULL DEFAULT 0,
+            histograma TEXT NOT NULL,
+            PRIMARY KEY (terminal, acao, dia)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_metricas_dia ON metricas_acoes (dia)')
+
+
+# Migrações do banco de telemetria, com a mesma regra de schema.MIGRATIONS
+TELEMETRY_MIGRATIONS: List[Callable[[sqlite3.Cursor], None]] = [
+    _telemetria_001_auditoria,
+    _telemetria_002_metricas_acoes,
+]
+
+
+class TelemetryDatabase(DatabaseManager):
+    """
+    Conexões por thread com o banco de telemetria (mesma configuração do
+    DatabaseManager); o esquema é criado ou migrado na primeira conexão
+    """
+
+    _instance = None
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            super().__init__()
+            self._schema_lock = threading.Lock()
+            self._schema_ok = False
+
+    @property
+    def db_path(self) -> str:
+        principal = Path(self.config.get('database.path', 'austral.db'))
+        return str(principal.with_name(f"{principal.stem}_telemetria{principal.suffix or '.db'}"))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = super()._connect()
+        with self._schema_lock:
+            if not self._schema_ok:
+                from schema import migrate
+                migrate(conn, TELEMETRY_MIGRATIONS)
+                self._schema_ok = True
+        return conn
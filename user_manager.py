@@ -3,70 +3,40 @@ import hashlib
 import argparse
 from config import ConfigManager
 from logger import AustralLogger
+from schema import ensure_schema
+from database import DatabaseManager
 
 class UserManager:
     def __init__(self):
         self.config = ConfigManager()
         self.logger = AustralLogger()
         self.db_path = self.config.get('database.path')
-
-    @staticmethod
-    def setup_database_static(config):
-        """Configura a tabela de usuários no banco de dados."""
-        try:
-            db_path = config.get('database.path', 'austral.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            # Criação da tabela 'users'
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE,
-                    password TEXT,
-                    role TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_login TIMESTAMP
-                )
-            ''')
-            conn.commit()
-        except Exception as e:
-            print(f"Erro ao configurar o banco de dados de usuários: {str(e)}")
-        finally:
-            if 'conn' in locals():
-                conn.close()
+        self.db = DatabaseManager()
+        ensure_schema(self.db_path)
 
     def create_user(self, username: str, password: str, role: str = 'user'):
         """Cria um novo usuário"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             # Hash da senha
             hashed_password = hashlib.sha256(password.encode()).hexdigest()
             
-            cursor.execute('''
-                INSERT INTO users (username, password, role)
-                VALUES (?, ?, ?)
-            ''', (username, hashed_password, role))
+            with self.db.transaction() as conn:
+                conn.execute('''
+                    INSERT INTO users (username, password, role)
+                    VALUES (?, ?, ?)
+                ''', (username, hashed_password, role))
             
-            conn.commit()
             print(f"Usuário '{username}' criado com sucesso!")
             
         except sqlite3.IntegrityError:
             print(f"ERRO: Usuário '{username}' já existe!")
         except Exception as e:
             print(f"ERRO ao criar usuário: {str(e)}")
-        finally:
-            conn.close()
 
     def list_users(self):
         """Lista todos os usuários"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT username, role, created_at, last_login FROM users')
-            users = cursor.fetchall()
+            users = self.db.query('SELECT username, role, created_at, last_login FROM users')
             
             print("\nUsuários cadastrados:")
             print("-" * 80)
@@ -78,8 +48,6 @@ class UserManager:
                 
         except Exception as e:
             print(f"ERRO ao listar usuários: {str(e)}")
-        finally:
-            conn.close()
 
     def delete_user(self, username: str):
         """Remove um usuário"""
@@ -88,46 +56,36 @@ class UserManager:
             return
             
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('DELETE FROM users WHERE username = ?', (username,))
+            with self.db.transaction() as conn:
+                cursor = conn.execute('DELETE FROM users WHERE username = ?', (username,))
             
             if cursor.rowcount > 0:
-                conn.commit()
                 print(f"Usuário '{username}' removido com sucesso!")
             else:
                 print(f"Usuário '{username}' não encontrado!")
                 
         except Exception as e:
             print(f"ERRO ao remover usuário: {str(e)}")
-        finally:
-            conn.close()
 
     def change_password(self, username: str, new_password: str):
         """Altera a senha de um usuário"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             hashed_password = hashlib.sha256(new_password.encode()).hexdigest()
             
-            cursor.execute('''
-                UPDATE users 
-                SET password = ? 
-                WHERE username = ?
-            ''', (hashed_password, username))
+            with self.db.transaction() as conn:
+                cursor = conn.execute('''
+                    UPDATE users 
+                    SET password = ? 
+                    WHERE username = ?
+                ''', (hashed_password, username))
             
             if cursor.rowcount > 0:
-                conn.commit()
                 print(f"Senha do usuário '{username}' alterada com sucesso!")
             else:
                 print(f"Usuário '{username}' não encontrado!")
                 
         except Exception as e:
             print(f"ERRO ao alterar senha: {str(e)}")
-        finally:
-            conn.close()
 
 def main():
     parser = argparse.ArgumentParser(description='Gerenciador de Usuários Austral')
@@ -6,7 +6,7 @@ Contém definições de temas, recursos e funções utilitárias comuns.
 from pathlib import Path
 from typing import Dict, Optional, Any, Union, Tuple
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, ttk
 import sys
 import os
 import json
@@ -164,6 +164,69 @@ class ResourceManager:
                 file_path.unlink()
 
 
+class ProgressDialog:
+    """Janela de progresso para tarefas em segundo plano (ver jobs.JobRunner)"""
+
+    def __init__(self, parent, title: str):
+        self.window = tk.Toplevel(parent)
+        self.window.title(title)
+        self.window.resizable(False, False)
+        self.window.transient(parent.winfo_toplevel())
+        # Fechar pelo "X" equivale a cancelar
+        self.window.protocol("WM_DELETE_WINDOW", self._on_cancel)
+        self._cancel_callback = None
+
+        frame = ttk.Frame(self.window, padding=15)
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        self.message_var = tk.StringVar(value=f"{title}...")
+        ttk.Label(frame, textvariable=self.message_var, font=FONT_LABEL, width=45).pack(pady=(0, 10))
+
+        self.progressbar = ttk.Progressbar(frame, mode='indeterminate', length=350)
+        self.progressbar.pack(pady=(0, 10))
+        self.progressbar.start(15)
+
+        self.cancel_button = ttk.Button(frame, text="CANCELAR", command=self._on_cancel, state='disabled')
+        self.cancel_button.pack()
+
+        UIHelper.center_window(self.window)
+        self.window.grab_set()
+
+    def set_cancel(self, callback) -> None:
+        """Habilita o botão CANCELAR"""
+        self._cancel_callback = callback
+        self.cancel_button.config(state='normal')
+
+    def update_progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None) -> None:
+        """Atualiza a barra; sem total a barra fica em modo indeterminado"""
+        if not self.window.winfo_exists():
+            return
+        if total:
+            if str(self.progressbar.cget('mode')) != 'determinate':
+                self.progressbar.stop()
+                self.progressbar.config(mode='determinate', maximum=total)
+            self.progressbar.config(value=min(done, total))
+        if message:
+            self.message_var.set(message)
+        elif total:
+            self.message_var.set(f"{done} de {total}")
+        else:
+            self.message_var.set(f"{done} processados")
+
+    def _on_cancel(self) -> None:
+        if self._cancel_callback is None:
+            return
+        self._cancel_callback()
+        self.cancel_button.config(state='disabled')
+        self.message_var.set("Cancelando...")
+
+    def close(self) -> None:
+        if self.window.winfo_exists():
+            self.progressbar.stop()
+            self.window.grab_release()
+            self.window.destroy()
+
+
 class UIHelper:
     """Classe auxiliar para operações comuns de interface"""
 
@@ -213,6 +276,20 @@ class UIHelper:
         func = message_functions.get(message_type, messagebox.showinfo)
         return func(title, message)
 
+    @staticmethod
+    def show_progress(parent, title: str) -> ProgressDialog:
+        """
+        Mostra uma janela de progresso para uma tarefa em segundo plano
+
+        Args:
+            parent: Janela sobre a qual o diálogo é exibido
+            title: Título e mensagem inicial
+
+        Returns:
+            ProgressDialog: Diálogo aberto (feche com close())
+        """
+        return ProgressDialog(parent, title)
+
     @staticmethod
     def validate_entry(
         value: str,
@@ -0,0 +1,341 @@
+"""
+Lista virtual para Treeviews com muitos registros.
+Busca janelas de linhas com paginação por chave (keyset) conforme o usuário
+rola a lista e mantém apenas um número limitado de itens no Tk. Também
+detecta gravações feitas por outros terminais via PRAGMA data_version.
+"""
+
+import logging
+from typing import Any, Callable, List, Optional, Sequence
+
+from database import DatabaseManager
+
+logger = logging.getLogger('austral.virtual_tree')
+
+
+class KeysetTreeview:
+    """
+    Pagina um ttk.Treeview em ordem decrescente de chave.
+
+    Cada item do Treeview usa a chave do registro (str) como iid. Ao chegar
+    perto do fim da lista a próxima página é buscada com "chave < última", e
+    ao voltar ao topo a anterior com "chave > primeira"; as páginas que saem
+    da janela de max_pages são descartadas.
+    """
+
+    # Fração da barra de rolagem que dispara a busca da página seguinte/anterior
+    EDGE_FRACTION = 0.1
+    # Chaves por consulta em refresh_rows (limite de parâmetros do SQLite)
+    REFRESH_CHUNK = 500
+
+    def __init__(self, tree, scrollbar, table: str, columns: Sequence[str],
+                 key: str = 'id', page_size: int = 200, max_pages: int = 3,
+                 on_count: Optional[Callable[[int], None]] = None,
+                 row_values: Optional[Callable[[tuple], tuple]] = None):
+        """
+        Args:
+            tree: ttk.Treeview já criado
+            scrollbar: Scrollbar vertical ligada ao Treeview
+            table: Tabela (ou junção) consultada
+            columns: Colunas selecionadas; a primeira deve ser a chave
+            key: Coluna inteira usada na paginação
+            page_size: Linhas buscadas por página
+            max_pages: Páginas mantidas no Treeview ao mesmo tempo
+            on_count: Chamada com o total de registros a cada recarga
+            row_values: Converte a linha do banco nos valores exibidos
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.table = table
+        self.columns = list(columns)
+        self.key = key
+        self.page_size = page_size
+        self.max_items = page_size * max_pages
+        self.on_count = on_count
+        self.row_values = row_values or (lambda row: row)
+        self.db = DatabaseManager()
+
+        self.where = ''
+        self.params: Sequence[Any] = ()
+        self.total = 0
+        self.has_older = False  # Há registros após o último item carregado
+        self.has_newer = False  # Há registros antes do primeiro item carregado
+        self.static = False  # Exibindo uma lista fixa (ex.: resultado de busca)
+        self.max_key: Optional[int] = None  # Maior chave do filtro na última recarga
+        self._loading = False
+
+        self.tree.configure(yscrollcommand=self._on_yscroll)
+
+    # Consultas
+
+    def _select(self, condition: str, params: Sequence[Any], ascending: bool) -> List[tuple]:
+        clauses = [c for c in (self.where, condition) if c]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        order = 'ASC' if ascending else 'DESC'
+        sql = (
+            f"SELECT {', '.join(self.columns)} FROM {self.table} {where} "
+            f"ORDER BY {self.key} {order} LIMIT ?"
+        )
+        cursor = self.db.connection().cursor()
+        cursor.execute(sql, (*self.params, *params, self.page_size + 1))
+        return cursor.fetchall()
+
+    def count(self) -> int:
+        """Total de registros do filtro atual"""
+        where = f"WHERE {self.where}" if self.where else ''
+        cursor = self.db.connection().cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM {self.table} {where}", self.params)
+        return cursor.fetchone()[0]
+
+    # Carga
+
+    def set_filter(self, where: str = '', params: Sequence[Any] = ()) -> None:
+        """Define um filtro SQL (sem o WHERE) e recarrega a lista"""
+        self.where = where
+        self.params = tuple(params)
+        self.reload()
+
+    def reload(self) -> None:
+        """Descarta os itens e carrega a primeira página"""
+        self.tree.delete(*self.tree.get_children())
+        self.static = False
+        rows = self._select('', (), ascending=False)
+        self.has_older = len(rows) > self.page_size
+        self.has_newer = False
+        self.max_key = int(rows[0][0]) if rows else None
+        self._insert(rows[:self.page_size], at_end=True)
+        self.tree.yview_moveto(0)
+
+        self.total = self.count()
+        if self.on_count:
+            self.on_count(self.total)
+
+    def show_rows(self, rows: List[tuple], total: Optional[int] = None) -> None:
+        """
+        Exibe uma lista fixa de linhas (na ordem recebida), sem paginação.
+        reload() volta à lista paginada.
+        """
+        self.tree.delete(*self.tree.get_children())
+        self.static = True
+        self.has_older = False
+        self.has_newer = False
+        self._insert(rows, at_end=True)
+        self.tree.yview_moveto(0)
+        self._set_total(len(rows) if total is None else total)
+
+    def _insert(self, rows: List[tuple], at_end: bool) -> None:
+        # Páginas anteriores chegam em ordem crescente: cada linha entra no topo
+        position = 'end' if at_end else 0
+        for row in rows:
+            iid = str(row[0])
+            if not self.tree.exists(iid):
+                self.tree.insert('', position, iid=iid, values=self.row_values(row))
+
+    def _load_older(self) -> None:
+        children = self.tree.get_children()
+        if not children:
+            return
+        first_visible = self._first_visible_index(len(children))
+        rows = self._select(f"{self.key} < ?", (int(children[-1]),), ascending=False)
+        self.has_older = len(rows) > self.page_size
+        self._insert(rows[:self.page_size], at_end=True)
+
+        # Descarta do topo o que excede a janela, mantendo a linha visível no lugar
+        children = self.tree.get_children()
+        excess = len(children) - self.max_items
+        if excess > 0:
+            self.tree.delete(*children[:excess])
+            self.has_newer = True
+            first_visible -= excess
+        self._scroll_to_index(first_visible)
+
+    def _load_newer(self) -> None:
+        children = self.tree.get_children()
+        if not children:
+            return
+        first_visible = self._first_visible_index(len(children))
+        rows = self._select(f"{self.key} > ?", (int(children[0]),), ascending=True)
+        self.has_newer = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self._insert(rows, at_end=False)
+        first_visible += len(rows)
+
+        children = self.tree.get_children()
+        excess = len(children) - self.max_items
+        if excess > 0:
+            self.tree.delete(*children[-excess:])
+            self.has_older = True
+        self._scroll_to_index(first_visible)
+
+    # Atualização incremental
+
+    def item_id(self, key: Any) -> Optional[str]:
+        """Item do Treeview do registro, ou None se ele não está carregado"""
+        iid = str(key)
+        return iid if self.tree.exists(iid) else None
+
+    def _set_total(self, total: int) -> None:
+        self.total = max(total, 0)
+        if self.on_count:
+            self.on_count(self.total)
+
+    def refresh_row(self, key: Any) -> None:
+        """
+        Atualiza somente o item do registro após uma inclusão ou alteração.
+        Registros novos entram no topo quando a primeira página está carregada.
+        """
+        self.refresh_rows([key])
+
+    def refresh_rows(self, keys: Sequence[Any]) -> None:
+        """Como refresh_row para vários registros, lidos em poucas consultas"""
+        cursor = self.db.connection().cursor()
+        rows = {}
+        for start in range(0, len(keys), self.REFRESH_CHUNK):
+            chunk = list(keys[start:start + self.REFRESH_CHUNK])
+            clauses = [c for c in (self.where, f"{self.key} IN ({','.join('?' * len(chunk))})") if c]
+            cursor.execute(
+                f"SELECT {', '.join(self.columns)} FROM {self.table} WHERE {' AND '.join(clauses)}",
+                (*self.params, *chunk)
+            )
+            rows.update((str(row[0]), row) for row in cursor.fetchall())
+
+        # Novos registros entram no topo em ordem decrescente
+        recontar = False
+        for key in sorted(keys, key=int):
+            recontar |= self._apply_row(key, rows.get(str(key)))
+        if recontar:
+            self._set_total(self.count())
+
+    def _apply_row(self, key: Any, row: Optional[tuple]) -> bool:
+        """
+        Aplica a linha ao Treeview e ao total
+
+        Returns:
+            bool: True se o efeito no total é incerto (registro fora das
+            páginas carregadas) e ele precisa ser recontado
+        """
+        iid = self.item_id(key)
+
+        if row is None:
+            # Não existe mais ou deixou de atender ao filtro
+            if iid is not None:
+                self.tree.delete(iid)
+                self._set_total(self.total - 1)
+                return False
+            return not self.static
+
+        if iid is not None:
+            self.tree.item(iid, values=self.row_values(row))
+            return False
+
+        if self.static:
+            return False
+
+        if self.max_key is not None and int(key) <= self.max_key:
+            # Registro antigo fora das páginas carregadas, ou que passou a atender ao filtro
+            return True
+
+        # Registro novo: entra no topo se a primeira página está carregada
+        self.max_key = int(key)
+        children = self.tree.get_children()
+        if not self.has_newer:
+            self.tree.insert('', 0, iid=str(key), values=self.row_values(row))
+            if len(children) + 1 > self.max_items:
+                self.tree.delete(children[-1])
+                self.has_older = True
+        self._set_total(self.total + 1)
+        return False
+
+    def remove(self, key: Any) -> None:
+        """Remove o item de um registro excluído"""
+        iid = self.item_id(key)
+        if iid is not None:
+            self.tree.delete(iid)
+            self._set_total(self.total - 1)
+        elif not self.static:
+            # Fora das páginas carregadas ou do filtro: só a contagem sabe se mudou
+            self._set_total(self.count())
+
+    # Rolagem
+
+    def _first_visible_index(self, total_items: int) -> int:
+        first, _ = self.tree.yview()
+        return int(round(first * total_items))
+
+    def _scroll_to_index(self, index: int) -> None:
+        total_items = len(self.tree.get_children())
+        if total_items:
+            self.tree.yview_moveto(max(index, 0) / total_items)
+
+    def _on_yscroll(self, first: str, last: str) -> None:
+        self.scrollbar.set(first, last)
+        if self._loading:
+            return
+        if float(last) >= 1 - self.EDGE_FRACTION and self.has_older:
+            self._schedule(self._load_older)
+        elif float(first) <= self.EDGE_FRACTION and self.has_newer:
+            self._schedule(self._load_newer)
+
+    def _schedule(self, loader: Callable[[], None]) -> None:
+        # Fora do callback de rolagem: alterar o Treeview aqui dispararia novos callbacks
+        self._loading = True
+
+        def run():
+            try:
+                loader()
+            except Exception as e:
+                logger.error(f"Erro ao carregar página: {e}")
+            finally:
+                self._loading = False
+
+        self.tree.after_idle(run)
+
+
+class DataVersionWatcher:
+    """
+    Observa PRAGMA data_version da conexão da thread da interface e avisa
+    quando outra conexão (outro terminal ou uma thread de fundo) gravou no
+    banco. As gravações da própria conexão não alteram o valor, então as
+    atualizações incrementais não provocam recargas.
+    """
+
+    def __init__(self, widget, on_change: Callable[[], None], interval_ms: Optional[int] = None):
+        from config import ConfigManager
+
+        self.widget = widget
+        self.on_change = on_change
+        self.interval_ms = interval_ms or int(
+            ConfigManager().get('performance.data_version_poll_ms', 2000)
+        )
+        self.db = DatabaseManager()
+        self._after_id = None
+        self._version = self._read_version()
+
+    def _read_version(self) -> int:
+        return self.db.connection().execute('PRAGMA data_version').fetchone()[0]
+
+    def start(self) -> None:
+        if self._after_id is None and self.interval_ms > 0:
+            self._after_id = self.widget.after(self.interval_ms, self._poll)
+
+    def stop(self) -> None:
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def mark_seen(self) -> None:
+        """Considera vistas as alterações atuais (após uma recarga manual)"""
+        self._version = self._read_version()
+
+    def _poll(self) -> None:
+        self._after_id = None
+        try:
+            if not self.widget.winfo_exists():
+                return
+            version = self._read_version()
+            if version != self._version:
+                self._version = version
+                self.on_change()
+        except Exception as e:
+            logger.error(f"Erro ao verificar alterações do banco: {e}")
+        self.start()